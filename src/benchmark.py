@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.pipeline import _library_versions, build_stages, run_isolated  # noqa: E402
+
+# Directory the benchmark results are saved to
+BENCHMARKS_DIR = os.path.join(project_root, "benchmarks")
+
+# Number of generated policies at each scale, and the chunk size the cleaning and feature stages stream CSVs in,
+# so that the largest scale fits in memory
+SCALES = {
+    "15k": {"rows": 15_000, "chunksize": None},
+    "1m": {"rows": 1_000_000, "chunksize": None},
+    "10m": {"rows": 10_000_000, "chunksize": 1_000_000},
+}
+
+# Stages of the pipeline, followed by the cleaning functions timed on their own and inference with every saved model
+STAGES = ["generate", "clean", "features", "train", "clean_functions", "inference"]
+
+# Measurements compared between runs, for all of which a higher value is worse. Tail latencies are recorded but left
+# out, as they are too noisy to hold to a threshold.
+REGRESSION_METRICS = ["seconds", "peak_memory_mb", "quote_p50_us", "batch_seconds"]
+
+# Default relative slowdown or memory growth that counts as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def measure_cleaning(raw_path: str, repeats: int = 3) -> dict:
+    """
+    Times the cleaning functions on a whole raw dataset loaded into memory, leaving out reading and writing files.
+
+    Args:
+        raw_path (str): Raw policy records to clean.
+        repeats (int, optional): Number of runs of each function, the fastest of which is kept. Defaults to 3.
+
+    Returns:
+        dict: Per function ('fix_invalid_education_rows', 'fix_employment_status' and the whole 'clean_dataset'), the fastest run in 'seconds', the number of input 'rows' and the 'rows_per_second'.
+    """
+    from src.clean_data import clean_dataset, fix_employment_status, fix_invalid_education_rows
+    from src.schema import read_policies
+
+    raw = read_policies(raw_path)
+    deduplicated = raw.dropna(how="all").drop_duplicates().reset_index(drop=True)
+    functions = {
+        "fix_invalid_education_rows": (fix_invalid_education_rows, deduplicated),
+        "fix_employment_status": (fix_employment_status, fix_invalid_education_rows(deduplicated)),
+        "clean_dataset": (clean_dataset, raw),
+    }
+
+    results = {}
+    for name, (function, data) in functions.items():
+        seconds = []
+        for _ in range(repeats):
+            # The employment fix writes its column back, so every run gets its own copy
+            data_copy = data.copy()
+            start = time.perf_counter()
+            function(data_copy)
+            seconds.append(time.perf_counter() - start)
+        results[name] = {"seconds": min(seconds), "rows": len(data), "rows_per_second": len(data) / min(seconds)}
+    return results
+
+
+def measure_inference(bundle_dir: str, raw_path: str, n_quotes: int = 1000, batch_rows: int = 100_000) -> dict:
+    """
+    Times single-quote and batch scoring of raw policies with every model of a bundle.
+
+    Args:
+        bundle_dir (str): Directory of the model bundle.
+        raw_path (str): Raw policy records to score.
+        n_quotes (int, optional): Number of policies scored one at a time, as the prediction page does. Defaults to 1000.
+        batch_rows (int, optional): Number of policies scored as one batch, as batch scoring does. Defaults to 100000.
+
+    Returns:
+        dict: Per model, the median, 99th percentile and mean latency of a quote in 'quote_p50_us', 'quote_p99_us' and 'quote_mean_us', and the fastest of five 'batch_seconds' with its 'batch_rows' and 'batch_rows_per_second'.
+    """
+    from src.modeling.bundle import ModelBundle
+    from src.schema import CSV_DTYPES
+    from src.storage import iter_dataset
+
+    bundle = ModelBundle.load(bundle_dir)
+    batch = next(iter_dataset(raw_path, batch_rows, dtype=CSV_DTYPES)).drop(columns=["Premium_Amount"])
+    quotes = batch.head(n_quotes).astype(object).to_dict("records")
+
+    results = {}
+    for model_name in bundle.models:
+        # Keep each quote's fastest of three passes, so that a stray pause does not move the percentiles
+        latencies = np.empty((3, len(quotes)))
+        for repeat in range(3):
+            for i, quote in enumerate(quotes):
+                start = time.perf_counter()
+                bundle.score_quote(quote, model_name)
+                latencies[repeat, i] = time.perf_counter() - start
+        latencies = latencies.min(axis=0) * 1e6
+
+        batch_seconds = []
+        for _ in range(5):
+            start = time.perf_counter()
+            bundle.score_batch(batch, model_name)
+            batch_seconds.append(time.perf_counter() - start)
+
+        results[model_name] = {
+            "quote_p50_us": float(np.median(latencies)),
+            "quote_p99_us": float(np.quantile(latencies, 0.99)),
+            "quote_mean_us": float(latencies.mean()),
+            "batch_rows": len(batch),
+            "batch_seconds": min(batch_seconds),
+            "batch_rows_per_second": len(batch) / min(batch_seconds),
+        }
+    return results
+
+
+def run_scale(scale: str, work_dir: str, stages: list[str] = STAGES, data_format: str = "csv",
+              workers: int | None = None, n_quotes: int = 1000) -> dict:
+    """
+    Benchmarks the pipeline on a generated dataset of one scale, running every stage in a fresh process to measure its wall time and peak memory on their own.
+
+    Stages are run in pipeline order. A stage left out reuses the outputs an earlier run left in `work_dir`, and inference falls back to the project's model bundle when the models were not trained in `work_dir`.
+
+    Args:
+        scale (str): One of the keys of `SCALES`.
+        work_dir (str): Directory for the datasets and models of this scale.
+        stages (list[str], optional): Stages to run, out of `STAGES`. Defaults to all of them.
+        data_format (str, optional): Storage format of the datasets passed between stages. Defaults to 'csv'.
+        workers (int, optional): Number of worker processes of the generate and train stages. Defaults to the number of CPU cores.
+        n_quotes (int, optional): Number of single quotes timed per model. Defaults to 1000.
+
+    Returns:
+        dict: The scale's 'rows', and per stage, its 'seconds', 'peak_memory_mb' and 'rows_per_second'; the cleaning functions have the results of `measure_cleaning` under 'functions', and inference has the results of `measure_inference` per model under 'models'.
+    """
+    n_rows = SCALES[scale]["rows"]
+    chunksize = SCALES[scale]["chunksize"] if data_format == "csv" else None
+    models_dir = os.path.join(work_dir, "models")
+    pipeline_stages = build_stages(data_format, os.path.join(work_dir, "data"), models_dir,
+                                   generate_rows=n_rows, chunksize=chunksize, workers=workers)
+
+    results = {"rows": n_rows, "stages": {}}
+    for stage in pipeline_stages:
+        if stage["name"] not in stages:
+            continue
+        if stage["name"] == "generate":
+            stage["kwargs"]["workers"] = workers
+        for path in stage["outputs"]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        _, measured = run_isolated(stage["function"], stage["kwargs"])
+        measured["rows_per_second"] = n_rows / measured["seconds"]
+        results["stages"][stage["name"]] = measured
+        print(f"  {scale:>4} {stage['name']:<10} {measured['seconds']:9.2f}s  "
+              f"{measured['peak_memory_mb']:9.0f} MB peak")
+
+    raw_path = pipeline_stages[0]["outputs"][0]
+    if "clean_functions" in stages:
+        functions, measured = run_isolated(measure_cleaning, {"raw_path": raw_path})
+        results["stages"]["clean_functions"] = {**measured, "functions": functions}
+        for name, function_results in functions.items():
+            print(f"  {scale:>4} {name:<26} {function_results['seconds']:9.3f}s  "
+                  f"{function_results['rows_per_second']:12,.0f} rows/s")
+
+    if "inference" in stages:
+        bundle_dir = os.path.join(models_dir, "bundle")
+        if not os.path.exists(bundle_dir):
+            bundle_dir = os.path.join(project_root, "models", "bundle")
+        models, measured = run_isolated(measure_inference, {
+            "bundle_dir": bundle_dir, "raw_path": raw_path, "n_quotes": n_quotes})
+        results["stages"]["inference"] = {**measured, "bundle_dir": bundle_dir, "models": models}
+        for model_name, model_results in models.items():
+            print(f"  {scale:>4} {model_name:<14} quote p50 {model_results['quote_p50_us']:8.1f} us  "
+                  f"batch {model_results['batch_rows_per_second']:12,.0f} rows/s")
+    return results
+
+
+def run_benchmarks(scales: list[str], stages: list[str] = STAGES, data_format: str = "csv",
+                   workers: int | None = None, work_dir: str | None = None, n_quotes: int = 1000) -> dict:
+    """
+    Benchmarks the pipeline and inference at each scale.
+
+    Args:
+        scales (list[str]): Scales to run, out of `SCALES`.
+        stages (list[str], optional): Stages to run, out of `STAGES`. Defaults to all of them.
+        data_format (str, optional): Storage format of the datasets passed between stages. Defaults to 'csv'.
+        workers (int, optional): Number of worker processes of the generate and train stages. Defaults to the number of CPU cores.
+        work_dir (str, optional): Directory to keep the datasets and models in, one subdirectory per scale. Defaults to a temporary directory that is removed afterwards.
+        n_quotes (int, optional): Number of single quotes timed per model. Defaults to 1000.
+
+    Returns:
+        dict: When and where the benchmarks ran ('created_at', 'environment', 'format'), and the results of `run_scale` under 'scales'.
+    """
+    temporary = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        results = {scale: run_scale(scale, os.path.join(work_dir, scale), stages, data_format, workers, n_quotes)
+                   for scale in scales}
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {**_library_versions(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "format": data_format,
+        "scales": results,
+    }
+
+
+def _flatten(results: dict) -> dict:
+    # Maps each comparable measurement to a (scale, stage, function or model, metric) key
+    flat = {}
+    for scale, scale_results in results["scales"].items():
+        for stage, measured in scale_results["stages"].items():
+            for metric in REGRESSION_METRICS:
+                if metric in measured:
+                    flat[(scale, stage, metric)] = measured[metric]
+            for name, sub_results in {**measured.get("functions", {}), **measured.get("models", {})}.items():
+                for metric in REGRESSION_METRICS:
+                    if metric in sub_results:
+                        flat[(scale, name, metric)] = sub_results[metric]
+    return flat
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list[dict]:
+    """
+    Compares two benchmark runs measurement by measurement.
+
+    Args:
+        current (dict): The new results, as returned by `run_benchmarks`.
+        baseline (dict): The results to compare with.
+        threshold (float, optional): Relative increase of a time or memory measurement that counts as a regression. Defaults to 0.2.
+
+    Returns:
+        list[dict]: Every measurement both runs have, with its 'scale', 'stage' (or model), 'metric', 'baseline' and 'current' values, relative 'change' and whether it 'regressed'.
+    """
+    current_flat, baseline_flat = _flatten(current), _flatten(baseline)
+    comparison = []
+    for key in current_flat.keys() & baseline_flat.keys():
+        before, after = baseline_flat[key], current_flat[key]
+        change = after / before - 1 if before else 0.0
+        comparison.append({"scale": key[0], "stage": key[1], "metric": key[2], "baseline": before,
+                           "current": after, "change": change, "regressed": change > threshold})
+    return sorted(comparison, key=lambda row: (list(SCALES).index(row["scale"]), row["stage"], row["metric"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark every pipeline stage and inference with every model at several data scales.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["15k"],
+                        help="Data scales to benchmark.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="Stages to benchmark; skipped stages reuse the outputs left in --work-dir.")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv",
+                        help="Storage format of the datasets passed between stages.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes of the generate and train stages.")
+    parser.add_argument("--quotes", type=int, default=1000,
+                        help="Number of single quotes timed per model.")
+    parser.add_argument("--work-dir", default=None,
+                        help="Keep the generated datasets and models here. Defaults to a temporary directory.")
+    parser.add_argument("--output", default=None,
+                        help="JSON file to save the results to. Defaults to a timestamped file in 'benchmarks'.")
+    parser.add_argument("--compare", default=None,
+                        help="Earlier results to compare with; exits with status 1 if anything regressed.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Relative increase of a time or memory measurement that counts as a regression.")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.stages, args.format, args.workers, args.work_dir, args.quotes)
+
+    output_path = args.output or os.path.join(
+        BENCHMARKS_DIR, f"benchmark-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        comparison = compare_results(results, baseline, args.threshold)
+        for row in comparison:
+            flag = "REGRESSED" if row["regressed"] else ""
+            print(f"{row['scale']:>4} {row['stage']:<14} {row['metric']:<15} {row['baseline']:12.4g} -> "
+                  f"{row['current']:12.4g} ({row['change']:+.1%}) {flag}")
+        regressions = [row for row in comparison if row["regressed"]]
+        print(f"{len(regressions)} of {len(comparison)} measurements regressed by more than {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
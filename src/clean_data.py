@@ -1,7 +1,26 @@
+import argparse
+import os
+import sys
 from collections import Counter
 
+import numpy as np
 import pandas as pd
 
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.instrumentation import timed  # noqa: E402
+from src.schema import apply_schema, iter_policies, read_policies  # noqa: E402
+from src.storage import FORMAT_EXTENSIONS, with_format, write_dataset  # noqa: E402
+
+# Default locations of the raw and cleaned datasets
+RAW_DATA_PATH = os.path.join(
+    project_root, "data", "raw", "car_insurance_premiums_dataset.csv")
+CLEANED_DATA_PATH = os.path.join(
+    project_root, "data", "interim", "processed_data.csv")
+
 
 def fix_invalid_education_rows(data: pd.DataFrame) -> pd.DataFrame:
     """
@@ -28,13 +47,15 @@ def fix_invalid_education_rows(data: pd.DataFrame) -> pd.DataFrame:
         "Postgraduate": 21,
     }
 
-    data = data[data.apply(
-        lambda row: row["Age"] >= minimum_age_for_education_level.get(row["Education_Level"], float('inf')), axis=1)]
+    # Look up each row's threshold once and compare the whole column in a single mask
+    minimum_age = data["Education_Level"].map(
+        minimum_age_for_education_level).astype(float).fillna(float('inf'))
+    data = data[data["Age"] >= minimum_age]
 
     return data
 
 
-def fix_employment_status(data: pd.DataFrame) -> pd.DataFrame:
+def fix_employment_status(data: pd.DataFrame, current_counts: Counter | None = None, total_rows: int | None = None) -> pd.DataFrame:
     """
     Corrects inconsistent employment status entries based on age constraints and rebalances the distribution toward a defined target distribution.
 
@@ -54,8 +75,12 @@ def fix_employment_status(data: pd.DataFrame) -> pd.DataFrame:
         - Unemployed: 24.8917%
         - Self-Employed: 24.2140%
 
+    When the data is cleaned in chunks, pass the employment status counts and row total of the whole dataset so that every chunk rebalances against the same global distribution.
+
     Args:
         data (pd.DataFrame): A pandas DataFrame containing at least the columns 'Age' and 'Employment_Status'.
+        current_counts (Counter, optional): Employment status counts for the whole dataset. Updated in place with every reassignment. Defaults to the counts in `data`.
+        total_rows (int, optional): Number of rows in the whole dataset. Defaults to the length of `data`.
 
     Returns:
         pd.DataFrame: A DataFrame where all the employment status entries are age-appropriate and approximately balanced toward the target distribution.
@@ -76,39 +101,69 @@ def fix_employment_status(data: pd.DataFrame) -> pd.DataFrame:
         "Self-Employed": 0.243140
     }
 
-    total_rows = len(data)
-    current_counts = Counter(data["Employment_Status"])
-
-    def fix_employment_smart(row):
-        age = row["Age"]
-        current_status = row["Employment_Status"]
-
-        min_age, max_age = employment_age_limits.get(current_status, (0, 150))
-        if min_age <= age <= max_age:
-            return current_status
-
-        valid_statuses = [
-            status for status, (min_a, max_a) in employment_age_limits.items()
-            if min_a <= age <= max_a
-        ]
-
-        if not valid_statuses:
-            return current_status
-
-        best_status = None
-        smallest_gap = float("inf")
-        for status in valid_statuses:
-            current_prop = current_counts[status] / total_rows
-            target_prop = target_distribution.get(status, 0)
-            gap = abs(target_prop - current_prop)
-            if gap < smallest_gap:
-                smallest_gap = gap
-                best_status = status
-
-        current_counts[best_status] += 1
-        return best_status
-
-    data["Employment_Status"] = data.apply(fix_employment_smart, axis=1)
+    statuses = list(employment_age_limits)
+    if total_rows is None:
+        total_rows = len(data)
+    if current_counts is None:
+        current_counts = Counter(data["Employment_Status"].value_counts().to_dict())
+
+    # Interval lookup table of the age limits, in the same order as employment_age_limits
+    lower_limits = np.array([employment_age_limits[s][0] for s in statuses])
+    upper_limits = np.array([employment_age_limits[s][1] for s in statuses])
+
+    age = data["Age"].to_numpy(dtype=float)
+    current_status = data["Employment_Status"]
+
+    # Rows whose current status is already valid for their age are left untouched
+    min_age = current_status.map(
+        {s: lo for s, (lo, _) in employment_age_limits.items()}).astype(float).fillna(0).to_numpy()
+    max_age = current_status.map(
+        {s: hi for s, (_, hi) in employment_age_limits.items()}).astype(float).fillna(150).to_numpy()
+    invalid_rows = np.flatnonzero(~((min_age <= age) & (age <= max_age)))
+
+    if len(invalid_rows) == 0:
+        return data
+
+    # Encode the set of valid statuses for each offending row as a bitmask over statuses
+    invalid_ages = age[invalid_rows, None]
+    in_range = (lower_limits <= invalid_ages) & (invalid_ages <= upper_limits)
+    valid_masks = in_range.astype(np.int64) @ (1 << np.arange(len(statuses)))
+    candidates = [
+        [i for i in range(len(statuses)) if mask & (1 << i)]
+        for mask in range(1 << len(statuses))
+    ]
+
+    # The rebalancing is greedy: every reassignment shifts the counts seen by the next row.
+    # Only the offending rows are walked, on plain integers, and the result is written back at once.
+    counts = [current_counts[status] for status in statuses]
+    targets = [target_distribution.get(status, 0) for status in statuses]
+    gaps = [abs(targets[i] - counts[i] / total_rows) for i in range(len(statuses))]
+    new_codes = [-1] * len(invalid_rows)
+
+    for position, mask in enumerate(valid_masks.tolist()):
+        if not mask:
+            continue
+
+        # min() keeps the first of equal gaps, matching the original strict comparison
+        best_status = min(candidates[mask], key=gaps.__getitem__)
+        counts[best_status] += 1
+        gaps[best_status] = abs(
+            targets[best_status] - counts[best_status] / total_rows)
+        new_codes[position] = best_status
+
+    # Carry the reassignments over to the next chunk
+    for status, count in zip(statuses, counts):
+        current_counts[status] = count
+
+    new_codes = np.array(new_codes)
+    reassigned = new_codes >= 0
+    fixed_statuses = current_status.to_numpy(dtype=object, copy=True)
+    fixed_statuses[invalid_rows[reassigned]] = np.array(
+        statuses, dtype=object)[new_codes[reassigned]]
+
+    # Keep the column's categorical type, if it has one
+    data["Employment_Status"] = pd.Categorical(fixed_statuses, dtype=current_status.dtype) \
+        if isinstance(current_status.dtype, pd.CategoricalDtype) else fixed_statuses
     return data
 
 
@@ -133,6 +188,7 @@ def fix_invalid_driving_years(data: pd.DataFrame) -> pd.DataFrame:
     return data
 
 
+@timed("clean")
 def clean_dataset(data: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans the input dataset by applying a series of data quality checks and corrections.
@@ -158,11 +214,127 @@ def clean_dataset(data: pd.DataFrame) -> pd.DataFrame:
     return data
 
 
-# Load the raw dataset
-raw_dataset = pd.read_csv("../data/raw/car_insurance_premiums_dataset.csv")
+def _drop_seen_duplicates(data: pd.DataFrame, seen_rows: np.ndarray) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Removes rows that are duplicated within the chunk or that were already seen in an earlier chunk.
+
+    Rows are compared by a 64-bit hash of their values. Numeric and boolean columns are hashed as floats so that a value parses to the same hash whether its chunk was read as integers, booleans or floats. Each chunk costs a binary search per row plus one linear merge of the seen hashes, so the whole file costs O(n log n) lookups and O(n^2 / chunksize) copying for n unique rows.
+
+    Args:
+        data (pd.DataFrame): The current chunk of the dataset.
+        seen_rows (np.ndarray): Sorted array of the row hashes kept from earlier chunks.
+
+    Returns:
+        tuple[pd.DataFrame, np.ndarray]: The chunk without duplicate rows, and the updated sorted array of row hashes.
+    """
+    numeric_columns = data.select_dtypes(include=["number", "bool"]).columns
+    row_hashes = pd.util.hash_pandas_object(
+        data.astype({col: "float64" for col in numeric_columns}), index=False).to_numpy()
+
+    keep = ~pd.Series(row_hashes).duplicated().to_numpy()
+
+    # Look the chunk's hashes up in sorted order, so the binary searches walk the seen array front to back
+    if len(seen_rows):
+        order = np.argsort(row_hashes)
+        sorted_hashes = row_hashes[order]
+        positions = np.minimum(np.searchsorted(seen_rows, sorted_hashes), len(seen_rows) - 1)
+        seen_before = np.empty(len(row_hashes), dtype=bool)
+        seen_before[order] = seen_rows[positions] == sorted_hashes
+        keep &= ~seen_before
+
+    # A stable sort merges the two sorted runs in linear time instead of re-sorting every hash
+    seen_rows = np.concatenate([seen_rows, np.sort(row_hashes[keep])])
+    seen_rows.sort(kind="stable")
+    return data[keep], seen_rows
+
+
+def clean_dataset_in_chunks(input_path: str, output_path: str, chunksize: int = 100_000) -> int:
+    """
+    Cleans a CSV dataset in fixed-size chunks and appends the result to the output CSV, so that only one chunk of rows is held in memory at a time.
+
+    The input is read twice:
+        1. The first pass applies the row filters (empty rows, duplicates, invalid education levels) and counts the surviving rows and employment statuses.
+        2. The second pass applies the same filters and the remaining corrections, rebalancing employment statuses against the global counts from the first pass.
+
+    This produces the same rows as `clean_dataset` on the fully loaded file. Removing duplicates across chunks needs the 8-byte hash of every unique row seen so far, so memory is not bounded by the chunk size alone: it grows by 8 bytes per unique row, and twice that while a chunk's hashes are merged in (about 160 MB at peak for 10 million unique rows).
+
+    Args:
+        input_path (str): Path to the raw CSV dataset.
+        output_path (str): Path to write the cleaned CSV dataset to.
+        chunksize (int, optional): Number of rows to read at a time. Defaults to 100000.
+
+    Returns:
+        int: The number of rows written to the output file.
+    """
+    seen_rows = np.empty(0, dtype=np.uint64)
+    status_counts = Counter()
+    total_rows = 0
+
+    for chunk in iter_policies(input_path, chunksize):
+        # Retype once empty rows are gone, so every chunk hashes and writes its values alike
+        chunk, seen_rows = _drop_seen_duplicates(
+            apply_schema(chunk.dropna(how="all")), seen_rows)
+        chunk = fix_invalid_education_rows(chunk)
+        status_counts.update(chunk["Employment_Status"])
+        total_rows += len(chunk)
+
+    seen_rows = np.empty(0, dtype=np.uint64)
+    rows_written = 0
+
+    for chunk_number, chunk in enumerate(iter_policies(input_path, chunksize)):
+        chunk, seen_rows = _drop_seen_duplicates(
+            apply_schema(chunk.dropna(how="all")), seen_rows)
+        chunk = fix_invalid_education_rows(chunk)
+        chunk = fix_employment_status(chunk, status_counts, total_rows)
+        chunk = fix_invalid_driving_years(chunk)
+
+        chunk.to_csv(output_path, mode="a" if chunk_number else "w",
+                     header=chunk_number == 0, index=False)
+        rows_written += len(chunk)
+
+    return rows_written
+
+
+def clean_file(input_path: str = RAW_DATA_PATH, output_path: str = CLEANED_DATA_PATH,
+               chunksize: int | None = None) -> int:
+    """
+    Cleans a raw dataset file and saves the result, either fully loaded or streamed in chunks.
+
+    Args:
+        input_path (str, optional): Path to the raw CSV, Parquet or Arrow IPC dataset. Defaults to the raw dataset in 'data/raw'.
+        output_path (str, optional): Path to write the cleaned dataset to. The extension picks the format. Defaults to 'data/interim/processed_data.csv'.
+        chunksize (int, optional): Stream the dataset in chunks of this many rows, so memory grows with the chunk size plus 8 bytes per unique row rather than with the whole file. Only supported for CSV output. Defaults to loading the whole file.
+
+    Returns:
+        int: The number of rows written to the output file.
+    """
+    if chunksize:
+        if not output_path.endswith(FORMAT_EXTENSIONS["csv"]):
+            raise ValueError("Chunked cleaning only supports CSV output")
+        return clean_dataset_in_chunks(input_path, output_path, chunksize)
+
+    # Load the raw dataset
+    raw_dataset = read_policies(input_path)
+
+    # Clean the data
+    processed_dataset = clean_dataset(raw_dataset)
+
+    # Save the cleaned dataset
+    write_dataset(processed_dataset, output_path)
+    return len(processed_dataset)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Clean the raw car insurance premiums dataset.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the dataset in chunks of this many rows; memory grows with the chunk size plus 8 bytes per unique row.")
+    parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv",
+                        help="Storage format of the cleaned dataset.")
+    args = parser.parse_args()
 
-# Clean the data
-processed_dataset = clean_dataset(raw_dataset)
+    if args.chunksize and args.format != "csv":
+        parser.error("--chunksize only supports the csv format")
 
-# Save the cleaned dataset
-processed_dataset.to_csv("../data/interim/processed_data.csv", index=False)
+    clean_file(RAW_DATA_PATH, with_format(
+        CLEANED_DATA_PATH, args.format), args.chunksize)
@@ -0,0 +1,74 @@
+import bisect
+
+import numpy as np
+
+# Lower bounds of the credit score bands above 'Poor', and the category of each band
+CREDIT_SCORE_BINS = [580, 670, 740, 800]
+CREDIT_CATEGORIES = ["Poor", "Fair", "Good", "Very Good", "Excellent"]
+
+# The bands as stored alongside the models, with the column they are derived from
+CREDIT_BANDS = {"source": "Credit_Score", "bins": CREDIT_SCORE_BINS, "categories": CREDIT_CATEGORIES}
+
+
+def credit_categories(credit_scores, credit_bands: dict | None = None):
+    """
+    Maps credit scores onto their credit rating categories, the one place the bands are applied.
+
+    Args:
+        credit_scores (float | array-like): One credit score or an array of them. Missing scores have no category.
+        credit_bands (dict, optional): The 'bins' and 'categories' of the bands, such as those stored in a model bundle. Defaults to `CREDIT_BANDS`.
+
+    Returns:
+        str | np.ndarray: The category of a single score, or an object array of the category of each score.
+    """
+    bands = credit_bands or CREDIT_BANDS
+
+    # Single quotes are banded in plain Python, which is much faster than NumPy on one value
+    if not hasattr(credit_scores, "__len__"):
+        if credit_scores is None or credit_scores != credit_scores:
+            return None
+        return bands["categories"][bisect.bisect_right(bands["bins"], credit_scores)]
+
+    scores = np.asarray(credit_scores, dtype=float)
+    categories = np.asarray(bands["categories"], dtype=object)[
+        np.searchsorted(bands["bins"], scores, side="right")]
+    return np.where(np.isnan(scores), None, categories)
+
+
+def add_credit_category(data, credit_bands: dict | None = None):
+    """
+    Derives the 'Credit_Category' of one quote or a batch of records from its credit score, unless it already has one.
+
+    Args:
+        data (dict | pd.DataFrame): One quote's input dictionary, a dictionary of input arrays or a DataFrame of records, with the credit score column.
+        credit_bands (dict, optional): The 'source' column, 'bins' and 'categories' of the bands. Defaults to `CREDIT_BANDS`.
+
+    Returns:
+        dict | pd.DataFrame: The data itself if it has a 'Credit_Category', otherwise a copy with it added.
+    """
+    if "Credit_Category" in data:
+        return data
+    bands = credit_bands or CREDIT_BANDS
+    categories = credit_categories(data[bands["source"]], bands)
+    if isinstance(data, dict):
+        return {**data, "Credit_Category": categories}
+    return data.assign(Credit_Category=categories)
+
+
+def categorise_credit_score(credit_score):
+    """
+    Categorises a numerical credit score into a credit rating category
+
+    The categories are based on standard FICO credit score ranges:
+        - Poor: < 580
+        - Fair: 580-669
+        - Good: 670-739
+        - Very Good: 740-799
+        - Excellent: 800 and above
+    Args:
+        credit_score (int): The numerical credit score to categorise
+
+    Returns:
+        str: A string representing the credit score category ('Poor', 'Fair', 'Good', 'Very Good' or 'Excellent')
+    """
+    return credit_categories(credit_score)
@@ -1,16 +1,23 @@
-import random
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 
-# Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.storage import FORMAT_EXTENSIONS, with_format, write_dataset  # noqa: E402
 
 # Define sample values for categorical fields
 genders = ["Male", "Female"]
 regions = ["Gauteng", "Western Cape", "KwaZulu-Natal", "Eastern Cape",
-           "Free State", "Limpopo", "Mpumalanga", "North West", "Nothern Cape"]
+           "Free State", "Limpopo", "Mpumalanga", "North West", "Northern Cape"]
 employment_statuses = ["Employed", "Self-employed",
                        "Unemployed", "Student", "Retired"]
 education_levels = ["High School", "Diploma", "Degree", "Postgraduate"]
@@ -26,59 +33,165 @@ car_makes_models = {
 marital_statuses = ['Single', 'Married', 'Divorced', 'Widowed']
 vehicle_usages = ['Private', 'Business', 'Commercial']
 
-# Generate the dataset
-n = 15000
-data = {
-    'Customer_ID': np.arange(1, n+1),
-    'Age': np.random.randint(18, 75, size=n),
-    'Gender': np.random.choice(genders, size=n),
-    'Region': np.random.choice(regions, size=n),
-    'Employment_Status': np.random.choice(employment_statuses, size=n),
-    'Education_Level': np.random.choice(education_levels, size=n),
-    'Years_Driving': np.random.randint(1, 57, size=n),
-    'Car_Make': [],
-    'Car_Model': [],
-    'Manufacture_Year': np.random.randint(2000, 2024, size=n),
-    'Annual Mileage': np.random.randint(5000, 60000, size=n),
-    'Number_of_Accidents': np.random.poisson(0.5, size=n),
-    'Number_of_Claims': np.random.poisson(0.3, size=n),
-    'Car_Value': np.random.randint(50000, 1500000, size=n),
-    'Premium_Amount': [],
-    'Marital_Status': np.random.choice(marital_statuses, size=n),
-    'Has_AntiTheft_Device': np.random.choice([0, 1], size=n),
-    'Policy_Term': np.random.choice([6, 12, 24], size=n),
-    'Credit_Score': np.random.randint(300, 850, size=n),
-    'Vehicle_Usage': np.random.choice(vehicle_usages, size=n)
-}
+# Flattened car models, with the position of each make's first model and its number of models
+car_makes = list(car_makes_models)
+car_models = [model for models in car_makes_models.values()
+              for model in models]
+model_offsets = np.cumsum(
+    [0] + [len(models) for models in car_makes_models.values()])[:-1]
+model_counts = np.array([len(models) for models in car_makes_models.values()])
+
+
+def _choice(rng: np.random.Generator, values: list, size: int) -> pd.Categorical:
+    # Draw uniformly from a list of labels without materialising a Python string per row
+    return pd.Categorical.from_codes(rng.integers(0, len(values), size=size), categories=values)
+
+
+def generate_policies(n: int, seed=42, first_customer_id: int = 1) -> pd.DataFrame:
+    """
+    Generates a synthetic book of car insurance policies with their monthly premiums.
+
+    Every field is drawn independently. A car make is picked uniformly and then one of that make's models uniformly, and the premium is computed from the car value, driving history, credit score, vehicle usage and anti-theft device.
+
+    Args:
+        n (int): Number of policies to generate.
+        seed (int | np.random.SeedSequence, optional): Seed of the random generator. Defaults to 42.
+        first_customer_id (int, optional): Customer ID of the first policy. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: The policies, with the columns of the raw dataset. String columns are pandas categoricals.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Pick each car's make, then one of that make's models
+    make_codes = rng.integers(0, len(car_makes), size=n)
+    model_codes = model_offsets[make_codes] + \
+        (rng.random(n) * model_counts[make_codes]).astype(np.int64)
+
+    data = {
+        'Customer_ID': np.arange(first_customer_id, first_customer_id + n),
+        'Age': rng.integers(18, 75, size=n),
+        'Gender': _choice(rng, genders, n),
+        'Region': _choice(rng, regions, n),
+        'Employment_Status': _choice(rng, employment_statuses, n),
+        'Education_Level': _choice(rng, education_levels, n),
+        'Years_Driving': rng.integers(1, 57, size=n),
+        'Car_Make': pd.Categorical.from_codes(make_codes, categories=car_makes),
+        'Car_Model': pd.Categorical.from_codes(model_codes, categories=car_models),
+        'Manufacture_Year': rng.integers(2000, 2024, size=n),
+        'Annual_Mileage': rng.integers(5000, 60000, size=n),
+        'Number_of_Accidents': rng.poisson(0.5, size=n),
+        'Number_of_Claims': rng.poisson(0.3, size=n),
+        'Car_Value': rng.integers(50000, 1500000, size=n),
+        'Premium_Amount': None,
+        'Marital_Status': _choice(rng, marital_statuses, n),
+        'Has_AntiTheft_Device': rng.integers(0, 2, size=n),
+        'Policy_Term': np.array([6, 12, 24])[rng.integers(0, 3, size=n)],
+        'Credit_Score': rng.integers(300, 850, size=n),
+        'Vehicle_Usage': _choice(rng, vehicle_usages, n)
+    }
+
+    # Generate Premium_Amount(in ZAR per month) using a basic formula
+    usage_codes = data['Vehicle_Usage'].codes
+    base_premium = 300  # base premium in ZAR
+    premium_factors = (
+        base_premium +
+        0.02 * data['Car_Value'] +
+        5 * data['Number_of_Accidents'] +
+        3 * data['Number_of_Claims'] -
+        0.1 * data['Credit_Score'] -
+        2 * data['Years_Driving'] +
+        50 * (usage_codes == vehicle_usages.index('Commercial')) +
+        25 * (usage_codes == vehicle_usages.index('Business')) -
+        20 * data['Has_AntiTheft_Device']
+    )
+
+    # Ensure that the premium amount will always be greater than or equal to R200
+    data['Premium_Amount'] = np.maximum(200, premium_factors.astype(int))
+
+    return pd.DataFrame(data)
+
+
+def shard_paths(output_path: str, n_shards: int) -> list[str]:
+    """
+    Names the files a sharded dataset is written to.
+
+    Args:
+        output_path (str): Path of the dataset, e.g. 'car_insurance_premiums_dataset.parquet'.
+        n_shards (int): Number of shards.
+
+    Returns:
+        list[str]: `output_path` itself for a single shard, otherwise the path with a '-00000-of-00010' style suffix before the extension for each shard.
+    """
+    if n_shards == 1:
+        return [output_path]
+    stem, extension = os.path.splitext(output_path)
+    return [f"{stem}-{shard:05d}-of-{n_shards:05d}{extension}" for shard in range(n_shards)]
+
+
+def _write_shard(path: str, n: int, seed: np.random.SeedSequence, first_customer_id: int) -> int:
+    write_dataset(generate_policies(n, seed, first_customer_id), path)
+    return n
+
+
+def generate_dataset(output_path: str, n_rows: int = 15000, shard_size: int = 1_000_000, seed: int = 42,
+                     workers: int | None = None) -> list[str]:
+    """
+    Generates a synthetic policy book of any size and writes it in shards, generating the shards in parallel.
+
+    Each shard has its own seed spawned from `seed`, so the output depends only on `n_rows`, `shard_size` and `seed`, not on the number of workers. Customer IDs run on from one shard to the next.
+
+    Args:
+        output_path (str): Path of the dataset. The extension picks CSV, Parquet or Arrow IPC.
+        n_rows (int, optional): Total number of policies. Defaults to 15000.
+        shard_size (int, optional): Maximum number of policies per shard, which bounds the memory used by each worker. Defaults to 1000000.
+        seed (int, optional): Seed of the whole dataset. Defaults to 42.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPU cores.
+
+    Returns:
+        list[str]: The paths of the shards written, as named by `shard_paths`.
+    """
+    n_shards = max(1, -(-n_rows // shard_size))
+    paths = shard_paths(output_path, n_shards)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    shard_rows = [min(shard_size, n_rows - shard * shard_size)
+                  for shard in range(n_shards)]
+    first_ids = [1 + shard * shard_size for shard in range(n_shards)]
+
+    workers = min(workers or os.cpu_count() or 1, n_shards)
+    if workers == 1:
+        for shard_args in zip(paths, shard_rows, seeds, first_ids):
+            _write_shard(*shard_args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_shard, paths, shard_rows, seeds, first_ids))
+
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic car insurance premiums dataset.")
+    parser.add_argument("--rows", type=int, default=15000,
+                        help="Number of policies to generate.")
+    parser.add_argument("--shard-size", type=int, default=1_000_000,
+                        help="Maximum number of policies per output file.")
+    parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv",
+                        help="Storage format of the generated dataset.")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Seed of the whole dataset.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes. Defaults to the number of CPU cores.")
+    parser.add_argument("--output", default=None,
+                        help="Path of the dataset. Defaults to data/raw/car_insurance_premiums_dataset.")
+    args = parser.parse_args()
+
+    output_path = with_format(args.output or os.path.join(
+        project_root, "data", "raw", "car_insurance_premiums_dataset.csv"), args.format)
 
-# Populate Car_Make and Car_Model
-for _ in range(n):
-    make = random.choice(list(car_makes_models.keys()))
-    model = random.choice(car_makes_models[make])
-    data['Car_Make'].append(make)
-    data['Car_Model'].append(model)
-
-# Generate Premium_Amount(in ZAR per month) using a basic formula
-base_premium = 300  # base premium in ZAR
-premium_factors = (
-    base_premium +
-    0.02 * data['Car_Value'] +
-    5 * data['Number_of_Accidents'] +
-    3 * data['Number_of_Claims'] -
-    0.1 * data['Credit_Score'] -
-    2 * data['Years_Driving'] +
-    50 * (np.array(data['Vehicle_Usage']) == 'Commercial').astype(int) +
-    25 * (np.array(data['Vehicle_Usage']) == 'Business').astype(int) -
-    20 * np.array(data['Has_AntiTheft_Device'])
-)
-
-# Ensure that the premium amount will always be greater than or equal to R200
-data['Premium_Amount'] = np.maximum(200, premium_factors.astype(int))
-
-# Create DataFrame
-df = pd.DataFrame
-
-# Save to CSV
-file_path = ("/data/raw/car_insurance_premiums_dataset.csv")
-df.to_csv(file_path, index=False)
-file_path
+    start = time.perf_counter()
+    paths = generate_dataset(output_path, args.rows,
+                             args.shard_size, args.seed, args.workers)
+    seconds = time.perf_counter() - start
+    print(f"Generated {args.rows:,} policies in {len(paths)} file(s) in {seconds:.1f}s "
+          f"({args.rows / seconds:,.0f} policies/s)")
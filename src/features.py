@@ -1,10 +1,33 @@
+import argparse
 import os
+import sys
 
 import numpy as np
 import pandas as pd
 
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-def preprocess_features(df: pd.DataFrame) -> pd.DataFrame:
+from src.credit import (CREDIT_CATEGORIES, CREDIT_SCORE_BINS,  # noqa: E402,F401
+                        add_credit_category, categorise_credit_score)
+from src.instrumentation import timed  # noqa: E402
+from src.schema import CATEGORIES, iter_policies, read_policies  # noqa: E402
+from src.storage import FORMAT_EXTENSIONS, with_format, write_dataset  # noqa: E402
+
+# Default locations of the cleaned dataset and of the engineered features
+CLEANED_DATA_PATH = os.path.join(
+    project_root, "data", "interim", "processed_data.csv")
+FEATURES_DATA_PATH = os.path.join(
+    project_root, "data", "processed", "cleaned_data.csv")
+
+# Features that `preprocess_features` engineers from the raw columns
+ENGINEERED_FEATURES = ["Accident_Claim_Rate", "Claims_per_Year"]
+
+
+@timed("features")
+def preprocess_features(df: pd.DataFrame, categories: dict[str, list] | None = None) -> pd.DataFrame:
     """
     Preprocesses the input DataFrame by engineering new features, dropping non-informative columns, and encoding categorical variables. 
 
@@ -14,8 +37,11 @@ def preprocess_features(df: pd.DataFrame) -> pd.DataFrame:
         3. Dropping the 'Customer ID' column, if it exists, as it is non-informative for modelling.
         4. One-hot encoding all categorical features, dropping the first category in each to avoid multicollinearity.
 
+    Without `categories`, the dummy columns depend on the categories present in `df`. Passing the vocabulary of the full dataset makes every batch produce the same columns.
+
     Args:
         df (pd.DataFrame): A pandas DataFrame containing the raw feature data, including 'Number_of_Claims', 'Number_of_Accidents', 'Years_Driving', and possibly categorical columns
+        categories (dict[str, list], optional): Sorted categories for each categorical column, as returned by `collect_categories`. Defaults to the categories found in `df`.
 
     Returns:
         pd.DataFrame: A processed DataFrame with additional numerical features and encoded categorical features, ready for use in a machine learning model. 
@@ -37,26 +63,271 @@ def preprocess_features(df: pd.DataFrame) -> pd.DataFrame:
     df.drop(columns=["Customer_ID"], inplace=True, errors="ignore")
 
     # One-hot-encode categorical features
-    categorical_cols = df.select_dtypes(include=object).columns
+    if categories is None:
+        categorical_cols = df.select_dtypes(
+            include=[object, "category"]).columns
+        # Fixed-vocabulary categoricals only get dummies for the categories present, like strings
+        for col in df[categorical_cols].select_dtypes(include="category").columns:
+            df[col] = df[col].cat.remove_unused_categories()
+    else:
+        categorical_cols = list(categories)
+        for col in categorical_cols:
+            df[col] = pd.Categorical(df[col], categories=categories[col])
     df = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
 
     return df
 
 
-# Get the base absolute path of this file
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+class FeatureEncoder:
+    """
+    Encodes raw policy records into the model's feature matrix with a category vocabulary learned once at training time.
+
+    After fitting, `transform` produces the same columns as `preprocess_features` does on the training data, in the same order, whatever categories the input happens to contain. The dropped first category and missing values are encoded as all zeros, and values outside the fitted vocabulary are rejected rather than priced as the dropped category.
+
+    Attributes:
+        categories_ (dict[str, list]): Sorted categories of each categorical column.
+        feature_names_ (list[str]): Names of the output columns, in model column order.
+    """
+
+    def fit(self, df: pd.DataFrame) -> "FeatureEncoder":
+        """
+        Learns the category vocabulary and the output column order from the training data.
+
+        Args:
+            df (pd.DataFrame): The raw training features, without the target column.
+
+        Returns:
+            FeatureEncoder: The fitted encoder.
+        """
+        categorical_cols = df.drop(columns=["Customer_ID"], errors="ignore").select_dtypes(
+            include=[object, "category"]).columns
+        return self._fit_vocabulary(df, {col: sorted(df[col].dropna().unique()) for col in categorical_cols})
+
+    def fit_encoded(self, features: pd.DataFrame) -> "FeatureEncoder":
+        """
+        Learns the category vocabulary and the output column order from training data that `preprocess_features` has already encoded, such as the processed dataset `train.py` reads.
+
+        The kept categories are recovered from the dummy column names using the fixed vocabulary of `src.schema`. The dropped first category cannot be recovered, so the first vocabulary category without a dummy column stands in for it. As `get_dummies` drops the first of the sorted categories, that is the dropped one unless an earlier vocabulary category never occurs in the training data.
+
+        Args:
+            features (pd.DataFrame): The encoded training features, without the target column.
+
+        Returns:
+            FeatureEncoder: The fitted encoder, which encodes raw records.
+        """
+        categories = {}
+        for col, vocabulary in CATEGORIES.items():
+            kept = [category for category in vocabulary
+                    if f"{col}_{category}" in features.columns]
+            if kept:
+                categories[col] = [category for category in vocabulary
+                                   if category not in kept][:1] + kept
+
+        dummy_columns = [f"{col}_{category}" for col, col_categories in categories.items()
+                         for category in col_categories[1:]]
+        raw = features.iloc[:0].drop(
+            columns=dummy_columns + ENGINEERED_FEATURES, errors="ignore")
+        for col in categories:
+            raw[col] = pd.Series(dtype=object)
+        return self._fit_vocabulary(raw, categories)
+
+    @classmethod
+    def from_vocabulary(cls, numeric_columns: list[str], categories: dict[str, list]) -> "FeatureEncoder":
+        """
+        Rebuilds a fitted encoder from its raw numeric input columns and category vocabulary, such as those stored in a model bundle.
+
+        Args:
+            numeric_columns (list[str]): The raw numeric columns, in input order, without the engineered features.
+            categories (dict[str, list]): Categories of each categorical column, as in 'categories_'.
+
+        Returns:
+            FeatureEncoder: The fitted encoder.
+        """
+        empty = pd.DataFrame({**{col: pd.Series(dtype=float) for col in numeric_columns},
+                              **{col: pd.Series(dtype=object) for col in categories}})
+        return cls()._fit_vocabulary(empty, categories)
+
+    def _fit_vocabulary(self, df: pd.DataFrame, categories: dict[str, list]) -> "FeatureEncoder":
+        self.categories_ = categories
+        self.feature_names_ = list(preprocess_features(
+            df.iloc[:0], self.categories_).columns)
+
+        # Output column of every input column, engineered feature and kept category
+        positions = {name: i for i, name in enumerate(self.feature_names_)}
+        self._numeric_positions = [
+            (col, positions[col]) for col in df.columns if col in positions and col not in ENGINEERED_FEATURES]
+        self._accident_claim_rate_position = positions["Accident_Claim_Rate"]
+        self._claims_per_year_position = positions["Claims_per_Year"]
+        self._category_positions = {
+            col: {category: positions[f"{col}_{category}"]
+                  for category in categories[1:]}
+            for col, categories in self.categories_.items()
+        }
+
+        # For batches: an index to find each value's category, and the output column of each category
+        # (-1 for the dropped first category and for missing values)
+        self._category_lookups = {
+            col: (pd.Index(categories),
+                  np.array([-1] + [self._category_positions[col].get(category, -1) for category in categories]))
+            for col, categories in self.categories_.items()
+        }
+        return self
+
+    @property
+    def input_columns(self) -> list[str]:
+        """
+        The raw input columns that `transform` reads.
+        """
+        return [col for col, _ in self._numeric_positions] + list(self._category_positions)
+
+    def transform(self, data: dict | pd.DataFrame, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Writes one record or a batch of records straight into a feature matrix in model column order.
+
+        Args:
+            data (dict | pd.DataFrame): A single record such as the prediction page's input dictionary, or a DataFrame of records.
+            out (np.ndarray, optional): Preallocated float64 array of shape (rows, features) to write into. Defaults to a new array.
+
+        Returns:
+            np.ndarray: The encoded, unscaled feature matrix.
+
+        Raises:
+            ValueError: If a categorical column has a value outside the fitted vocabulary.
+        """
+        single_row = isinstance(data, dict)
+        n_rows = 1 if single_row else len(data)
+
+        if out is None:
+            out = np.zeros((n_rows, len(self.feature_names_)))
+        else:
+            out[:] = 0
+
+        def column(col):
+            return np.asarray([data[col]], dtype=float) if single_row else data[col].to_numpy(dtype=float)
+
+        for col, position in self._numeric_positions:
+            out[:, position] = column(col)
+
+        # Engineered features, with zero where the denominator is zero
+        claims = column("Number_of_Claims")
+        accidents = column("Number_of_Accidents")
+        years_driving = column("Years_Driving")
+        np.divide(claims, accidents, out=out[:, self._accident_claim_rate_position],
+                  where=accidents != 0)
+        np.divide(claims, years_driving, out=out[:, self._claims_per_year_position],
+                  where=years_driving != 0)
+
+        # Set the dummy column of each row's category, if it was kept
+        for col, category_positions in self._category_positions.items():
+            if single_row:
+                position = category_positions.get(data[col])
+                if position is not None:
+                    out[0, position] = 1
+                elif not pd.isna(data[col]) and data[col] != self.categories_[col][0]:
+                    raise ValueError(f"Unexpected values in {col}: {data[col]}")
+                continue
+
+            categories, lookup = self._category_lookups[col]
+            indices = categories.get_indexer(data[col])
+            unknown = (indices < 0) & data[col].notna().to_numpy()
+            if unknown.any():
+                raise ValueError(
+                    f"Unexpected values in {col}: {', '.join(map(str, sorted(set(data[col][unknown]))))}")
+            columns = lookup[indices + 1]
+            rows = np.flatnonzero(columns >= 0)
+            out[rows, columns[rows]] = 1
+
+        return out
+
+
+def collect_categories(data_path: str, chunksize: int = 100_000) -> dict[str, list]:
+    """
+    Collects the categories of every categorical column in a CSV dataset, reading it in chunks.
+
+    Args:
+        data_path (str): Path to the CSV dataset.
+        chunksize (int, optional): Number of rows to read at a time. Defaults to 100000.
+
+    Returns:
+        dict[str, list]: The sorted categories of each categorical column, in the column order of the file.
+    """
+    categories = {}
+    columns = []
+
+    for chunk in iter_policies(data_path, chunksize):
+        columns = chunk.columns
+        chunk = chunk.drop(columns=["Customer_ID"], errors="ignore")
+        for col in chunk.select_dtypes(include=[object, "category"]).columns:
+            categories.setdefault(col, set()).update(chunk[col].dropna())
+
+    return {col: sorted(categories[col]) for col in columns if col in categories}
+
+
+def preprocess_features_in_chunks(input_path: str, output_path: str, chunksize: int = 100_000) -> int:
+    """
+    Preprocesses a CSV dataset in fixed-size chunks and appends the result to the output CSV, so that memory use is bounded by the chunk size rather than the size of the file.
+
+    The category vocabulary is collected in a first pass so that every chunk is encoded into the same dummy columns as `preprocess_features` produces on the fully loaded file.
+
+    Args:
+        input_path (str): Path to the cleaned CSV dataset.
+        output_path (str): Path to write the preprocessed CSV dataset to.
+        chunksize (int, optional): Number of rows to read at a time. Defaults to 100000.
+
+    Returns:
+        int: The number of rows written to the output file.
+    """
+    categories = collect_categories(input_path, chunksize)
+    rows_written = 0
+
+    for chunk_number, chunk in enumerate(iter_policies(input_path, chunksize)):
+        chunk = preprocess_features(chunk, categories)
+        chunk.to_csv(output_path, mode="a" if chunk_number else "w",
+                     header=chunk_number == 0, index=False)
+        rows_written += len(chunk)
+
+    return rows_written
+
+
+def build_features_file(input_path: str = CLEANED_DATA_PATH, output_path: str = FEATURES_DATA_PATH,
+                        chunksize: int | None = None) -> int:
+    """
+    Engineers and encodes the features of a cleaned dataset file and saves the result, either fully loaded or streamed in chunks.
+
+    Args:
+        input_path (str, optional): Path to the cleaned CSV, Parquet or Arrow IPC dataset. Defaults to 'data/interim/processed_data.csv'.
+        output_path (str, optional): Path to write the features to. The extension picks the format. Defaults to 'data/processed/cleaned_data.csv'.
+        chunksize (int, optional): Stream the dataset in chunks of this many rows to bound memory use. Only supported for CSV output. Defaults to loading the whole file.
+
+    Returns:
+        int: The number of rows written to the output file.
+    """
+    if chunksize:
+        if not output_path.endswith(FORMAT_EXTENSIONS["csv"]):
+            raise ValueError("Chunked preprocessing only supports CSV output")
+        return preprocess_features_in_chunks(input_path, output_path, chunksize)
+
+    processed_dataset = read_policies(input_path)
+
+    # Preprocess the features
+    cleaned_df = preprocess_features(processed_dataset)
 
-# Build full path to the CSV relative to features.py location
-data_path = os.path.abspath(os.path.join(
-    BASE_DIR, '..', 'data', 'interim', 'processed_data.csv'))
+    # Save the cleaned data
+    write_dataset(cleaned_df, output_path)
+    return len(cleaned_df)
 
-processed_dataset = pd.read_csv(data_path)
 
-# Preprocess the features
-cleaned_df = preprocess_features(processed_dataset)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Engineer and encode the features of the cleaned dataset.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the dataset in chunks of this many rows to bound memory use.")
+    parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv",
+                        help="Storage format of the interim and processed datasets.")
+    args = parser.parse_args()
 
-# Save the cleaned data
-output_path = os.path.abspath(os.path.join(
-    BASE_DIR, '..', 'data', 'processed', 'cleaned_data.csv'))
+    if args.chunksize and args.format != "csv":
+        parser.error("--chunksize only supports the csv format")
 
-cleaned_df.to_csv(output_path, index=False)
+    build_features_file(with_format(CLEANED_DATA_PATH, args.format),
+                        with_format(FEATURES_DATA_PATH, args.format), args.chunksize)
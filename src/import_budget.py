@@ -0,0 +1,174 @@
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+PREDICTION_PAGE = os.path.join(project_root, "streamlit", "pages", "prediction.py")
+
+# Written to stderr between the interpreter's own startup imports and the profiled ones
+STARTUP_MARKER = "-- startup done --"
+
+# Libraries that only training, retraining and the joblib artifacts need
+TRAINING_LIBRARIES = ["sklearn", "xgboost", "scipy"]
+
+# Import-time budget of each entry point, and the packages it must not load at import time. The Streamlit page and
+# the bundle score quotes with NumPy alone, while batch scoring needs pandas but loads models only when asked to, and
+# incremental retraining loads its training libraries only when it updates models.
+IMPORT_BUDGETS = {
+    "prediction_page": {"budget_ms": 250, "forbidden": ["pandas", "joblib", *TRAINING_LIBRARIES]},
+    "src.modeling.bundle": {"budget_ms": 250, "forbidden": ["pandas", "joblib", *TRAINING_LIBRARIES]},
+    "src.modeling.predict": {"budget_ms": 1000, "forbidden": ["joblib", *TRAINING_LIBRARIES]},
+    "src.modeling.serve": {"budget_ms": 1000, "forbidden": ["joblib", *TRAINING_LIBRARIES]},
+    "src.pipeline": {"budget_ms": 1000, "forbidden": TRAINING_LIBRARIES},
+    "src.modeling.incremental": {"budget_ms": 1000, "forbidden": ["joblib", *TRAINING_LIBRARIES]},
+}
+
+
+def page_imports(page_path: str = PREDICTION_PAGE) -> list[str]:
+    """
+    Lists the modules a Streamlit page imports, apart from Streamlit itself, which every page pays for regardless.
+
+    Args:
+        page_path (str, optional): Path of the page. Defaults to the prediction page.
+
+    Returns:
+        list[str]: The imported modules, in the order the page imports them.
+    """
+    with open(page_path) as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names
+                       if name.split(".")[0] != "streamlit" and name not in modules)
+    return modules
+
+
+def entry_point_modules(entry_point: str) -> list[str]:
+    """
+    Resolves an entry point of `IMPORT_BUDGETS` to the modules it imports.
+
+    Args:
+        entry_point (str): 'prediction_page' or a module name.
+
+    Returns:
+        list[str]: The modules to import.
+    """
+    return page_imports() if entry_point == "prediction_page" else [entry_point]
+
+
+def profile_imports(modules: list[str]) -> dict:
+    """
+    Imports modules in a fresh interpreter under `-X importtime` and parses its report.
+
+    Args:
+        modules (list[str]): The modules to import.
+
+    Returns:
+        dict: The total cumulative import time in 'seconds', the cumulative 'module_seconds' of every module that was loaded, and the 'top_level' packages loaded.
+    """
+    code = f"import sys; sys.stderr.write({STARTUP_MARKER!r} + '\\n'); import {', '.join(modules)}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=project_root, capture_output=True, text=True, check=True)
+
+    # Skip the modules the interpreter loads at startup, such as `site` and its .pth files
+    report = result.stderr.split(STARTUP_MARKER, 1)[1]
+
+    module_seconds = {}
+    total_seconds = 0.0
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        seconds = int(cumulative) / 1e6
+        module_seconds[name.strip()] = seconds
+
+        # Entries at the outermost level are the modules imported directly; nested ones are already counted in them
+        if name[1:2] != " ":
+            total_seconds += seconds
+
+    return {
+        "seconds": total_seconds,
+        "module_seconds": module_seconds,
+        "top_level": {name.split(".")[0] for name in module_seconds},
+    }
+
+
+def time_in_fresh_interpreter(statement: str, repeats: int = 5) -> float:
+    """
+    Times a statement, imports included, in fresh interpreters started from the project root, as a newly started worker would run it.
+
+    Args:
+        statement (str): Python statement to time, such as loading a model and scoring a quote.
+        repeats (int, optional): Number of fresh interpreters to time it in; the median is kept. Defaults to 5.
+
+    Returns:
+        float: The median wall-clock time of the statement, in seconds.
+    """
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    return statistics.median(float(subprocess.run([sys.executable, "-c", code], cwd=project_root, check=True,
+                                                  capture_output=True, text=True).stdout)
+                             for _ in range(repeats))
+
+
+def check_budgets(budgets: dict = IMPORT_BUDGETS, repeats: int = 3, top: int = 5) -> dict:
+    """
+    Measures the import time of each entry point and checks it against its budget and its forbidden packages.
+
+    Args:
+        budgets (dict, optional): Budget and forbidden packages of each entry point. Defaults to `IMPORT_BUDGETS`.
+        repeats (int, optional): Number of fresh interpreters to time each entry point in; the median is kept. Defaults to 3.
+        top (int, optional): Number of slowest top-level packages to report per entry point. Defaults to 5.
+
+    Returns:
+        dict: Per entry point, the median import time in 'ms', its 'budget_ms', the 'forbidden' packages it loaded, its 'slowest' packages as (name, ms) and whether it 'passed'.
+    """
+    report = {}
+    for entry_point, budget in budgets.items():
+        modules = entry_point_modules(entry_point)
+        runs = [profile_imports(modules) for _ in range(repeats)]
+        median_ms = statistics.median(run["seconds"] for run in runs) * 1000
+        last = runs[-1]
+
+        loaded_forbidden = sorted(set(budget["forbidden"]) & last["top_level"])
+        slowest = sorted(((name, seconds * 1000) for name, seconds in last["module_seconds"].items()
+                          if "." not in name and name != "src"), key=lambda item: -item[1])[:top]
+        report[entry_point] = {
+            "ms": median_ms,
+            "budget_ms": budget["budget_ms"],
+            "forbidden": loaded_forbidden,
+            "slowest": slowest,
+            "passed": median_ms <= budget["budget_ms"] and not loaded_forbidden,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the import time of the Streamlit page and the scoring entry points against their budgets.")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Number of fresh interpreters to time each entry point in.")
+    args = parser.parse_args()
+
+    report = check_budgets(repeats=args.repeats)
+    for entry_point, result in report.items():
+        status = "ok" if result["passed"] else "OVER BUDGET"
+        slowest = ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["slowest"])
+        print(f"{entry_point:<26} {result['ms']:7.0f} ms / {result['budget_ms']} ms  {status}  ({slowest})")
+        if result["forbidden"]:
+            print(f"{'':<26} loads {', '.join(result['forbidden'])} at import time")
+
+    sys.exit(0 if all(result["passed"] for result in report.values()) else 1)
@@ -0,0 +1,351 @@
+import argparse
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Default file the recorded metrics are exported to
+METRICS_FILE = os.path.join(project_root, "metrics", "hot_path_metrics.json")
+
+# Environment variable that turns on profiling of the sections wrapped in `profiled`: 'cprofile', 'tracemalloc' or both,
+# separated by a comma. It can be set in the '.env' file the Streamlit app loads.
+PROFILE_ENV_VAR = "PREMIUM_PROFILE"
+
+# Upper bounds of the histogram buckets in seconds, doubling from 1 µs to about 4.5 minutes; longer spans go in a last,
+# open-ended bucket
+BUCKET_BOUNDS = [1e-6 * 2 ** i for i in range(29)]
+
+# Functions and allocation sites listed in each profile
+PROFILE_TOP = 25
+
+
+class Histogram:
+    """
+    Distribution of a span's durations over fixed, exponentially growing buckets, so that any number of timings is kept in constant memory.
+
+    Attributes:
+        counts (list[int]): Number of durations in each bucket of `BUCKET_BOUNDS`, plus the open-ended last bucket.
+        count (int): Number of durations recorded.
+        total (float): Sum of the durations in seconds.
+        minimum (float): Shortest duration in seconds.
+        maximum (float): Longest duration in seconds.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Adds one duration.
+
+        Args:
+            seconds (float): The duration in seconds.
+        """
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the durations as the upper bound of the bucket it falls in, capped at the longest duration.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated duration in seconds, or 0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS + [self.maximum], self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self) -> dict:
+        """
+        Summarises the durations in milliseconds.
+
+        Returns:
+            dict: The 'count', 'total_ms', 'mean_ms', 'min_ms', 'p50_ms', 'p90_ms', 'p99_ms' and 'max_ms', and the non-empty 'buckets' as (upper bound in ms, count) pairs.
+        """
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.minimum * 1000 if self.count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p90_ms": self.quantile(0.9) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.maximum * 1000,
+            "buckets": [(bound * 1000 if bound is not None else None, count) for bound, count
+                        in zip(BUCKET_BOUNDS + [None], self.counts) if count],
+        }
+
+
+class _Span:
+    # A class rather than a generator-based context manager, as it costs a fraction of the time on the hot path
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder: "Recorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Recorder:
+    """
+    Collects the duration histogram of every named span, and the latest profile of every profiled section, for the whole process.
+
+    The Streamlit app serves every session from threads of one process, so recording is guarded by a lock and a diagnostics page sees the timings of all sessions.
+
+    Attributes:
+        histograms (dict[str, Histogram]): Duration histogram of each span.
+        profiles (dict[str, dict]): Latest cProfile and tracemalloc results of each profiled section.
+        started_at (str): When recording started or was last reset, in ISO 8601 UTC.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.profiles = {}
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> _Span:
+        """
+        Times a block of code as one occurrence of a named span.
+
+        Args:
+            name (str): Name of the span, such as 'encode' or 'predict'.
+
+        Returns:
+            _Span: A context manager that records the time spent inside it.
+        """
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Records one duration of a named span.
+
+        Args:
+            name (str): Name of the span.
+            seconds (float): The duration in seconds.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(seconds)
+
+    def keep_profile(self, name: str, result: dict) -> None:
+        """
+        Keeps the latest profile of a profiled section, replacing the previous one.
+
+        Args:
+            name (str): Name of the section.
+            result (dict): The profile, as built by `profiled`.
+        """
+        with self._lock:
+            self.profiles[name] = result
+
+    def reset(self) -> None:
+        """
+        Discards every recorded duration and profile.
+        """
+        with self._lock:
+            self.histograms = {}
+            self.profiles = {}
+            self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def snapshot(self) -> dict:
+        """
+        Summarises everything recorded so far.
+
+        Returns:
+            dict: The 'started_at' and 'exported_at' times, the 'pid', the summary of each span in 'spans', as returned by `Histogram.summary`, and the 'profiles'.
+        """
+        with self._lock:
+            spans = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+            profiles = dict(self.profiles)
+        return {"started_at": self.started_at, "exported_at": datetime.now(timezone.utc).isoformat(),
+                "pid": os.getpid(), "spans": spans, "profiles": profiles}
+
+    def export(self, path: str = METRICS_FILE) -> str:
+        """
+        Writes the snapshot to a JSON metrics file, replacing it atomically so that readers never see a partial file.
+
+        Args:
+            path (str, optional): Path of the metrics file. Defaults to 'metrics/hot_path_metrics.json'.
+
+        Returns:
+            str: The path written.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        os.replace(temporary_path, path)
+        return path
+
+
+# The recorder shared by everything in the process
+RECORDER = Recorder()
+
+
+def span(name: str) -> _Span:
+    """
+    Times a block of code as one occurrence of a named span of the process-wide recorder.
+
+    Args:
+        name (str): Name of the span.
+
+    Returns:
+        _Span: A context manager that records the time spent inside it.
+    """
+    return RECORDER.span(name)
+
+
+def timed(name: str):
+    """
+    Decorates a function so that every call is timed as a span of the process-wide recorder.
+
+    Args:
+        name (str): Name of the span.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with RECORDER.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profilers() -> set[str]:
+    """
+    Reads which profilers `PREMIUM_PROFILE` turns on.
+
+    Returns:
+        set[str]: 'cprofile' and/or 'tracemalloc', or an empty set when profiling is off.
+    """
+    return {name.strip().lower() for name in os.environ.get(PROFILE_ENV_VAR, "").split(",")} & {"cprofile", "tracemalloc"}
+
+
+@contextmanager
+def profiled(name: str, recorder: Recorder = RECORDER):
+    """
+    Profiles a section of code with cProfile and/or tracemalloc when `PREMIUM_PROFILE` asks for them, and otherwise only times it as a span.
+
+    The profile of the latest run of the section is kept in the recorder, as the functions with the highest cumulative time and the lines that allocated the most memory.
+
+    Args:
+        name (str): Name of the section, also used as its span name.
+        recorder (Recorder, optional): The recorder to keep the results in. Defaults to the process-wide recorder.
+    """
+    enabled = profilers()
+    if not enabled:
+        with recorder.span(name):
+            yield
+        return
+
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile() if "cprofile" in enabled else None
+    trace_memory = "tracemalloc" in enabled and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        with recorder.span(name):
+            yield
+    finally:
+        result = {}
+        if profiler:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            result["cprofile"] = output.getvalue()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["tracemalloc"] = {
+                "peak_bytes": peak,
+                "top": [{"line": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                        for stat in snapshot.statistics("lineno")[:PROFILE_TOP]],
+            }
+        result["recorded_at"] = datetime.now(timezone.utc).isoformat()
+        recorder.keep_profile(name, result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the prediction hot path on synthetic quotes and export the span metrics.")
+    parser.add_argument("--quotes", type=int, default=1000,
+                        help="Number of synthetic quotes to score one at a time with each model.")
+    parser.add_argument("--batch-size", type=int, default=10_000,
+                        help="Number of synthetic records to score as one batch with each model.")
+    parser.add_argument("--bundle-dir", default=os.path.join(project_root, "models", "bundle"),
+                        help="Directory of the model bundle.")
+    parser.add_argument("--output", default=METRICS_FILE,
+                        help="Metrics file to write.")
+    args = parser.parse_args()
+
+    from src.credit import add_credit_category
+    from src.dataset import generate_policies
+    from src.modeling.bundle import ModelBundle
+
+    bundle = ModelBundle.load(args.bundle_dir)
+    records = generate_policies(max(args.quotes, args.batch_size)).drop(columns=["Premium_Amount"])
+    quotes = [add_credit_category({col: value.item() if hasattr(value, "item") else value
+                                   for col, value in row.items()})
+              for row in records.head(args.quotes).to_dict("records")]
+
+    for model_name in bundle.models:
+        with profiled(f"benchmark.{model_name}"):
+            for quote in quotes:
+                with span(f"quote.{model_name}"):
+                    bundle.score_quote(quote, model_name)
+            with span(f"batch.{model_name}"):
+                bundle.score_batch(records.head(args.batch_size), model_name)
+
+    path = RECORDER.export(args.output)
+    for name, summary in RECORDER.snapshot()["spans"].items():
+        print(f"{name:<24} {summary['count']:>7,} calls  mean {summary['mean_ms']:9.3f} ms  "
+              f"p50 {summary['p50_ms']:9.3f} ms  p99 {summary['p99_ms']:9.3f} ms")
+    print(f"Metrics written to {path}")
@@ -0,0 +1,400 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import CREDIT_BANDS, CREDIT_CATEGORIES, CREDIT_SCORE_BINS, add_credit_category  # noqa: E402
+from src.import_budget import time_in_fresh_interpreter  # noqa: E402
+from src.instrumentation import span  # noqa: E402
+from src.modeling.linear_scorer import LinearScorer  # noqa: E402
+from src.modeling.tree_ensemble import TreeEnsemble  # noqa: E402
+
+# Default location of the bundle, inside the models directory it is built from
+BUNDLE_DIR = os.path.join(project_root, "models", "bundle")
+MANIFEST_FILE = "manifest.json"
+
+# Version of the bundle layout; loaders refuse bundles of any other version. Version 2 added the mean value of each
+# tree split, which predictions are explained with.
+FORMAT_VERSION = 2
+
+# Class name of each model the bundle can hold, and the name it is stored under
+MODEL_NAMES = {"Ridge": "ridge", "RandomForestRegressor": "random_forest", "XGBRegressor": "xgboost"}
+
+
+def schema_hash(feature_names: list[str]) -> str:
+    """
+    Fingerprints the raw input schema and the model feature order a bundle was built for, so that a bundle can be checked against the code that feeds it.
+
+    Args:
+        feature_names (list[str]): The model features, in column order.
+
+    Returns:
+        str: A hex digest of the schema's categories, integer types and boolean columns, and of the feature order.
+    """
+    from src.schema import BOOLEAN_COLUMNS, CATEGORIES, INTEGER_DTYPES
+
+    schema = {"categories": CATEGORIES, "integer_dtypes": INTEGER_DTYPES,
+              "boolean_columns": BOOLEAN_COLUMNS, "feature_names": feature_names}
+    return hashlib.blake2b(json.dumps(schema, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def _read_metrics(models_dir: str) -> dict[str, dict]:
+    # Test metrics by model name; the 'model' column holds each model's repr, e.g. 'Ridge()'
+    path = os.path.join(models_dir, "model_metrics.csv")
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as file:
+        return {MODEL_NAMES.get(row.pop("model").split("(")[0], "unknown"): {key: float(value) for key, value in row.items() if value}
+                for row in csv.DictReader(file)}
+
+
+def write_bundle(models_dir: str, output_dir: str | None = None) -> dict:
+    """
+    Packs the saved models and their preprocessing artifacts into a single bundle: a JSON manifest and one memory-mappable array file.
+
+    The manifest holds the schema hash, the feature order, the encoder vocabulary, the scaler parameters and, for each model, its type, its training metrics and either its folded coefficient table (Ridge) or its tree metadata (XGBoost, Random Forest). The tree node arrays go into the array file, named after the bundle's content version, and the manifest is replaced last, so a reader never sees a manifest without its arrays.
+
+    Args:
+        models_dir (str): Directory containing the artifacts saved by `train.py`.
+        output_dir (str, optional): Directory to write the bundle to. Defaults to 'bundle' inside `models_dir`.
+
+    Returns:
+        dict: The written manifest.
+    """
+    import joblib
+
+    from src.modeling.linear_scorer import coefficient_table
+    from src.modeling.predict import load_artifacts
+    from src.modeling.tree_ensemble import export_random_forest, export_xgboost
+
+    output_dir = output_dir or os.path.join(models_dir, "bundle")
+    scaler, numeric_columns = joblib.load(
+        os.path.join(models_dir, "scaler.joblib"))
+    encoder = joblib.load(os.path.join(models_dir, "feature_encoder.joblib"))
+    metrics = _read_metrics(models_dir)
+
+    models = {}
+    arrays = {}
+    for model_name in MODEL_NAMES.values():
+        if not os.path.exists(os.path.join(models_dir, f"{model_name}_model.joblib")):
+            continue
+        model = load_artifacts(models_dir, model_name)["model"]
+        entry = {"class": type(model).__name__,
+                 "metrics": metrics.get(model_name, {})}
+
+        if model_name == "ridge":
+            entry["type"] = "linear"
+            entry["coefficients"] = coefficient_table(model, scaler, numeric_columns, encoder,
+                                                      (CREDIT_SCORE_BINS, CREDIT_CATEGORIES))
+        else:
+            layout, entry["trees"] = (export_xgboost if model_name == "xgboost"
+                                      else export_random_forest)(model)
+            entry["type"] = "tree_ensemble"
+            for field in layout.dtype.names:
+                arrays[f"{model_name}.{field}"] = layout[field]
+        models[model_name] = entry
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "schema_hash": schema_hash(encoder.feature_names_),
+        "feature_names": encoder.feature_names_,
+        "encoder": {
+            "numeric_columns": [col for col in encoder.input_columns if col not in encoder.categories_],
+            "categories": encoder.categories_,
+            "credit_bands": CREDIT_BANDS,
+        },
+        "scaler": {"columns": list(numeric_columns), "mean": scaler.mean_.tolist(), "scale": scaler.scale_.tolist()},
+        "models": models,
+    }
+
+    # Every array becomes a field of one record, so each stays contiguous and the file maps in one go
+    record = np.zeros((), dtype=[(name, array.dtype, array.shape)
+                      for name, array in arrays.items()])
+    for name, array in arrays.items():
+        record[name] = array
+
+    # The version identifies the bundle's content, and so also names its array file
+    digest = hashlib.blake2b(json.dumps(
+        manifest, sort_keys=True).encode(), digest_size=8)
+    digest.update(record.tobytes())
+    manifest["version"] = digest.hexdigest()
+    manifest["arrays_file"] = f"arrays-{manifest['version']}.npy"
+    manifest["created"] = datetime.now(timezone.utc).isoformat()
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, manifest["arrays_file"]), record)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    # Processes that mapped an older array file keep their mapping after it is unlinked
+    for file_name in os.listdir(output_dir):
+        if file_name.startswith("arrays-") and file_name != manifest["arrays_file"]:
+            os.remove(os.path.join(output_dir, file_name))
+    return manifest
+
+
+class ModelBundle:
+    """
+    Scores quotes with every model in a bundle written by `write_bundle`, without unpickling anything or importing scikit-learn or XGBoost.
+
+    Attributes:
+        manifest (dict): The bundle's manifest.
+        models (dict[str, LinearScorer | TreeEnsemble]): The scorer of each model, by name.
+        inputs (list[str]): The numeric features and categorical inputs that explanations break premiums down by.
+    """
+
+    def __init__(self, manifest: dict, arrays: np.ndarray | None):
+        if manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format {manifest['format_version']}; expected {FORMAT_VERSION}")
+        self.manifest = manifest
+        self.models = {}
+        for model_name, entry in manifest["models"].items():
+            if entry["type"] == "linear":
+                self.models[model_name] = LinearScorer(entry["coefficients"])
+            else:
+                prefix = f"{model_name}."
+                fields = {name[len(prefix):]: arrays[name]
+                          for name in arrays.dtype.names if name.startswith(prefix)}
+                self.models[model_name] = TreeEnsemble(fields, entry["trees"])
+
+        scaler = manifest["scaler"]
+        self._numeric_indices = [manifest["feature_names"].index(
+            col) for col in scaler["columns"]]
+        self._mean = np.asarray(scaler["mean"])
+        self._scale = np.asarray(scaler["scale"])
+        self._encoder = None
+
+        # The raw input behind each model feature, with a category's one-hot columns all mapping to its column
+        categories = manifest["encoder"]["categories"]
+        one_hot = {f"{col}_{category}": col for col,
+                   values in categories.items() for category in values}
+        feature_inputs = [one_hot.get(name, name)
+                          for name in manifest["feature_names"]]
+        self.inputs = list(dict.fromkeys(feature_inputs + list(categories)))
+        self._input_matrix = np.zeros((len(feature_inputs), len(self.inputs)))
+        self._input_matrix[np.arange(len(feature_inputs)), [
+            self.inputs.index(name) for name in feature_inputs]] = 1.0
+
+    @classmethod
+    def load(cls, bundle_dir: str = BUNDLE_DIR, mmap: bool = True) -> "ModelBundle":
+        """
+        Loads a bundle, memory-mapping its arrays read-only so that every process scoring with it shares one copy.
+
+        Args:
+            bundle_dir (str, optional): Directory of the bundle. Defaults to 'models/bundle'.
+            mmap (bool, optional): Memory-map the array file instead of reading it into memory. Defaults to True.
+
+        Returns:
+            ModelBundle: The loaded bundle.
+        """
+        with open(os.path.join(bundle_dir, MANIFEST_FILE)) as file:
+            manifest = json.load(file)
+        arrays = None
+        if any(entry["type"] == "tree_ensemble" for entry in manifest["models"].values()):
+            arrays = np.load(os.path.join(bundle_dir, manifest["arrays_file"]),
+                             mmap_mode="r" if mmap else None)
+        return cls(manifest, arrays)
+
+    @property
+    def version(self) -> str:
+        """
+        The content version of the bundle, which changes whenever any model or preprocessing parameter does.
+        """
+        return self.manifest["version"]
+
+    def check_schema(self) -> None:
+        """
+        Checks that the bundle was built for the current input schema and feature order.
+
+        Raises:
+            ValueError: If the schema hash recorded in the bundle differs from the current one.
+        """
+        if schema_hash(self.manifest["feature_names"]) != self.manifest["schema_hash"]:
+            raise ValueError(
+                "The model bundle was built for a different input schema; please retrain the models")
+
+    @property
+    def encoder(self):
+        """
+        The feature encoder rebuilt from the bundle's vocabulary, created on first use since only the tree ensembles need it.
+        """
+        if self._encoder is None:
+            from src.features import FeatureEncoder
+
+            vocabulary = self.manifest["encoder"]
+            self._encoder = FeatureEncoder.from_vocabulary(
+                vocabulary["numeric_columns"], vocabulary["categories"])
+        return self._encoder
+
+    def features(self, data) -> np.ndarray:
+        """
+        Encodes and scales raw records into the feature matrix the tree ensembles take, timing the two steps as the 'encode' and 'scale' spans.
+
+        Args:
+            data (dict | pd.DataFrame): One quote's input dictionary or a DataFrame of raw records. 'Credit_Category' is derived from 'Credit_Score' if the models use it and it is missing.
+
+        Returns:
+            np.ndarray: The scaled feature matrix.
+        """
+        with span("encode"):
+            if "Credit_Category" in self.manifest["encoder"]["categories"]:
+                data = add_credit_category(data, self.manifest["encoder"]["credit_bands"])
+
+            features = self.encoder.transform(data)
+
+        with span("scale"):
+            features[:, self._numeric_indices] = (
+                features[:, self._numeric_indices] - self._mean) / self._scale
+        return features
+
+    def score_batch(self, data, model_name: str = "ridge") -> np.ndarray:
+        """
+        Predicts the premiums of a batch of raw policy records with one of the bundle's models.
+
+        The model is timed as the 'predict' span. The Ridge model encodes, scales and predicts in that one span, as its coefficient table has the encoding and scaling folded in.
+
+        Args:
+            data (pd.DataFrame): Raw policy records with the same columns as the training data.
+            model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+        Returns:
+            np.ndarray: The predicted monthly premium of each record.
+        """
+        model = self.models[model_name]
+        if isinstance(model, LinearScorer):
+            with span("predict"):
+                return model.score_batch(data)
+        features = self.features(data)
+        with span("predict"):
+            return model.predict(features)
+
+    def score_quote(self, input_dictionary: dict, model_name: str = "ridge") -> float:
+        """
+        Predicts the premium of a single quote with one of the bundle's models, timed like `score_batch`.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+        Returns:
+            float: The predicted monthly premium.
+        """
+        model = self.models[model_name]
+        if isinstance(model, LinearScorer):
+            with span("predict"):
+                return model.score_quote(input_dictionary)
+        features = self.features(input_dictionary)
+        with span("predict"):
+            return float(model.predict(features)[0])
+
+    def explain_batch(self, data, model_name: str = "ridge") -> dict:
+        """
+        Predicts the premiums of a batch of raw policy records and breaks each one down by input.
+
+        The Ridge model's breakdown is exact: each numeric feature contributes its coefficient times its scaled value, and each category its coefficient. The tree ensembles' breakdown follows each record's path through the trees, as `TreeEnsemble.contributions` computes it, with the one-hot columns of a category added together. Either way, the expected value plus a record's contributions gives its premium.
+
+        Args:
+            data (pd.DataFrame | Mapping[str, array-like]): Raw policy records. The tree ensembles need a DataFrame.
+            model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+        Returns:
+            dict: The 'premiums', the model's 'expected_value' premium and the 'contributions' of each of `inputs` to each premium.
+        """
+        model = self.models[model_name]
+        if isinstance(model, LinearScorer):
+            with span("explain"):
+                return {"premiums": model.score_batch(data), "expected_value": model.expected_value,
+                        "contributions": model.contributions(data)}
+
+        features = self.features(data)
+        with span("explain"):
+            by_input = model.contributions(features) @ self._input_matrix
+            return {"premiums": model.predict(features), "expected_value": model.expected_value,
+                    "contributions": {name: by_input[:, i] for i, name in enumerate(self.inputs)}}
+
+    def explain_quote(self, input_dictionary: dict, model_name: str = "ridge") -> dict:
+        """
+        Predicts the premium of a single quote and breaks it down by input, as `explain_batch` does.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+        Returns:
+            dict: The 'premium', the model's 'expected_value' premium and the 'contributions' of each input to the premium.
+        """
+        if isinstance(self.models[model_name], LinearScorer):
+            explanation = self.explain_batch(
+                {col: [value] for col, value in input_dictionary.items()}, model_name)
+        else:
+            explanation = self.explain_batch(input_dictionary, model_name)
+        return {"premium": float(explanation["premiums"][0]), "expected_value": explanation["expected_value"],
+                "contributions": {name: float(values[0]) for name, values in explanation["contributions"].items()}}
+
+
+def cold_start(models_dir: str, bundle_dir: str, repeats: int = 5) -> dict:
+    """
+    Times how long a fresh scoring worker takes to load each model and score its first quote, from the loose joblib artifacts and from the bundle.
+
+    Args:
+        models_dir (str): Directory containing the artifacts saved by `train.py`.
+        bundle_dir (str): Directory of the bundle built from them.
+        repeats (int, optional): Number of fresh interpreters each measurement is taken in. Defaults to 5.
+
+    Returns:
+        dict: For each model, the median seconds to first premium from the 'artifacts' and from the 'bundle'.
+    """
+    from src.dataset import generate_policies
+
+    quote = {col: value.item() if hasattr(value, "item") else value
+             for col, value in generate_policies(1).iloc[0].items()}
+    quote_json = json.dumps(quote)
+
+    results = {}
+    for model_name in ModelBundle.load(bundle_dir).models:
+        results[model_name] = {
+            "artifacts": time_in_fresh_interpreter(
+                "import json; from src.modeling.predict import load_artifacts, score_batch; import pandas as pd; "
+                f"score_batch(pd.DataFrame([json.loads({quote_json!r})]), load_artifacts({models_dir!r}, {model_name!r}))",
+                repeats),
+            "bundle": time_in_fresh_interpreter(
+                "import json; from src.modeling.bundle import ModelBundle; "
+                f"ModelBundle.load({bundle_dir!r}).score_quote(json.loads({quote_json!r}), {model_name!r})",
+                repeats),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pack the saved models into a memory-mappable bundle, or time cold starts with and without it.")
+    parser.add_argument("--models-dir", default=os.path.dirname(BUNDLE_DIR),
+                        help="Directory containing the artifacts saved by train.py.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory to write the bundle to. Defaults to 'bundle' inside the models directory.")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="Time loading each model and scoring a first quote in a fresh interpreter.")
+    args = parser.parse_args()
+
+    bundle_dir = args.output_dir or os.path.join(args.models_dir, "bundle")
+    manifest = write_bundle(args.models_dir, bundle_dir)
+    print(f"Wrote bundle {manifest['version']} with {', '.join(manifest['models'])} to {bundle_dir}")
+
+    if args.cold_start:
+        for model_name, result in cold_start(args.models_dir, bundle_dir).items():
+            print(f"{model_name:<14} artifacts {result['artifacts'] * 1000:7.0f} ms, "
+                  f"bundle {result['bundle'] * 1000:7.0f} ms to first premium")
@@ -0,0 +1,476 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Baseline snapshot written by `train.py` next to 'model_metrics.csv'
+DRIFT_BASELINE_FILE = "drift_baseline.json"
+
+# Sketch of the predicted premium, alongside those of the raw inputs
+PREMIUM_SKETCH = "Predicted_Premium"
+
+# Number of equal-width bins of each numeric histogram, and the quantiles of the training data they span
+N_BINS = 20
+BIN_RANGE_QUANTILES = (0.005, 0.995)
+
+# Population stability index above which a feature has shifted moderately, and significantly
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+
+# Floor on bin shares, so that empty bins do not make the PSI infinite
+MIN_SHARE = 1e-4
+
+
+class NumericSketch:
+    """
+    Streaming summary of a numeric column in constant memory: count, running mean and variance, range, and a histogram over fixed, equal-width bins.
+
+    Equal-width bins place a value with a multiply and a floor rather than a binary search over the edges, which keeps the sketch cheap enough to update inline with scoring.
+
+    Attributes:
+        low (float): Lower edge of the first bin.
+        high (float): Upper edge of the last bin.
+        counts (np.ndarray): Number of values below `low`, in each of the bins, and from `high` up.
+        count (int): Number of non-missing values seen.
+        mean (float): Running mean.
+        m2 (float): Running sum of squared deviations from the mean.
+        minimum (float): Smallest value seen.
+        maximum (float): Largest value seen.
+        missing (int): Number of missing values seen.
+    """
+
+    def __init__(self, low: float, high: float, n_bins: int = N_BINS):
+        self.low = float(low)
+        self.high = float(high) if high > low else float(low) + 1.0
+        self.counts = np.zeros(n_bins + 2, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.missing = 0
+        self._scale = n_bins / (self.high - self.low)
+
+    @property
+    def n_bins(self) -> int:
+        """
+        The number of bins between `low` and `high`.
+        """
+        return len(self.counts) - 2
+
+    def update(self, values) -> None:
+        """
+        Adds a batch of values to the summary in one vectorised pass.
+
+        Args:
+            values (array-like): The batch's values of the column.
+        """
+        values = np.asarray(values, dtype=float)
+        present = ~np.isnan(values)
+        if not present.all():
+            self.missing += int((~present).sum())
+            values = values[present]
+        if not len(values):
+            return
+
+        # Merge the batch's mean and variance into the running ones (Chan et al.)
+        n, batch_mean = len(values), values.mean()
+        deviations = values - batch_mean
+        batch_m2 = float(deviations @ deviations)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+        # Bin 0 and the last bin catch the values outside [low, high)
+        bins = np.floor((values - self.low) * self._scale)
+        np.clip(bins, -1, self.n_bins, out=bins)
+        self.counts += np.bincount((bins + 1).astype(np.intp), minlength=len(self.counts))
+
+    def merge(self, other: "NumericSketch") -> None:
+        """
+        Adds another sketch over the same bins, such as one built by another worker, to this one.
+
+        Args:
+            other (NumericSketch): The sketch to add.
+        """
+        total = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+            self.mean += delta * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.counts += other.counts
+        self.missing += other.missing
+
+    @property
+    def std(self) -> float:
+        """
+        The population standard deviation of the values seen.
+        """
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float("nan")
+
+    def to_dict(self) -> dict:
+        return {"type": "numeric", "low": self.low, "high": self.high, "counts": self.counts.tolist(),
+                "count": self.count, "mean": self.mean, "m2": self.m2, "min": self.minimum, "max": self.maximum,
+                "missing": self.missing}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "NumericSketch":
+        sketch = cls(state["low"], state["high"], len(state["counts"]) - 2)
+        sketch.counts = np.asarray(state["counts"], dtype=np.int64)
+        sketch.count, sketch.mean, sketch.m2 = state["count"], state["mean"], state["m2"]
+        sketch.minimum, sketch.maximum, sketch.missing = state["min"], state["max"], state["missing"]
+        return sketch
+
+
+class CategoricalSketch:
+    """
+    Streaming frequency count of a categorical column.
+
+    Attributes:
+        counts (dict[str, int]): Number of times each category has been seen.
+    """
+
+    def __init__(self, categories=()):
+        self.counts = {category: 0 for category in categories}
+
+    def update(self, values) -> None:
+        """
+        Adds a batch of values to the counts.
+
+        Args:
+            values (array-like): The batch's values of the column. A pandas Series is counted with `value_counts`, which for the 'category' dtype is a count of its integer codes.
+        """
+        if hasattr(values, "value_counts"):
+            batch_counts = values.value_counts(sort=False).items()
+        else:
+            batch_counts = zip(*np.unique(np.asarray(values).astype(str), return_counts=True))
+        for category, count in batch_counts:
+            category = str(category)
+            self.counts[category] = self.counts.get(category, 0) + int(count)
+
+    def merge(self, other: "CategoricalSketch") -> None:
+        """
+        Adds another sketch's counts to this one.
+
+        Args:
+            other (CategoricalSketch): The sketch to add.
+        """
+        for category, count in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + count
+
+    @property
+    def count(self) -> int:
+        """
+        The number of values seen.
+        """
+        return sum(self.counts.values())
+
+    def to_dict(self) -> dict:
+        return {"type": "categorical", "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "CategoricalSketch":
+        sketch = cls()
+        sketch.counts = dict(state["counts"])
+        return sketch
+
+
+def _sketch_from_dict(state: dict) -> NumericSketch | CategoricalSketch:
+    return (NumericSketch if state["type"] == "numeric" else CategoricalSketch).from_dict(state)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Computes the population stability index between two distributions over the same bins.
+
+    Args:
+        expected (np.ndarray): Counts of the baseline in each bin.
+        actual (np.ndarray): Counts of the monitored data in each bin.
+
+    Returns:
+        float: The PSI, the sum over bins of (actual share - expected share) * ln(actual share / expected share).
+    """
+    expected_share = np.maximum(expected / max(expected.sum(), 1), MIN_SHARE)
+    actual_share = np.maximum(actual / max(actual.sum(), 1), MIN_SHARE)
+    return float(((actual_share - expected_share) * np.log(actual_share / expected_share)).sum())
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Computes the Kolmogorov-Smirnov statistic between two histograms over the same ordered bins.
+
+    The distance between the cumulative distributions is only evaluated at the bin edges, so it is a lower bound of the exact statistic, tight when the bins are fine.
+
+    Args:
+        expected (np.ndarray): Counts of the baseline in each bin.
+        actual (np.ndarray): Counts of the monitored data in each bin.
+
+    Returns:
+        float: The largest absolute difference between the two cumulative distributions.
+    """
+    expected_cdf = np.cumsum(expected) / max(expected.sum(), 1)
+    actual_cdf = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.abs(expected_cdf - actual_cdf).max())
+
+
+class DriftMonitor:
+    """
+    Keeps streaming sketches of every monitored raw input and of the predicted premium, over the bins of a baseline snapshot, and scores their drift from it.
+
+    Monitors are cheap to update batch by batch and can be merged, so each scoring worker can sketch the batches it scores and the results can be combined.
+
+    Attributes:
+        sketches (dict[str, NumericSketch | CategoricalSketch]): The sketch of each column, including `PREMIUM_SKETCH`.
+    """
+
+    def __init__(self, sketches: dict):
+        self.sketches = sketches
+
+    @classmethod
+    def like(cls, baseline: "DriftMonitor") -> "DriftMonitor":
+        """
+        Creates an empty monitor over the same columns and bins as another, such as the baseline.
+
+        Args:
+            baseline (DriftMonitor): The monitor to copy the columns and bins of.
+
+        Returns:
+            DriftMonitor: The empty monitor.
+        """
+        sketches = {}
+        for col, sketch in baseline.sketches.items():
+            sketches[col] = NumericSketch(sketch.low, sketch.high, sketch.n_bins) if isinstance(sketch, NumericSketch) \
+                else CategoricalSketch(sketch.counts)
+        return cls(sketches)
+
+    def update(self, data, premiums: np.ndarray | None = None) -> None:
+        """
+        Adds a batch of raw records, and optionally their predicted premiums, to the sketches.
+
+        Args:
+            data (pd.DataFrame | Mapping[str, array-like]): Raw records. Monitored columns missing from the batch are skipped.
+            premiums (np.ndarray, optional): The batch's predicted premiums. Defaults to None.
+        """
+        for col, sketch in self.sketches.items():
+            if col == PREMIUM_SKETCH:
+                if premiums is not None:
+                    sketch.update(premiums)
+            elif col in data:
+                sketch.update(data[col])
+
+    def merge(self, other: "DriftMonitor") -> None:
+        """
+        Adds another monitor's sketches to this one's.
+
+        Args:
+            other (DriftMonitor): A monitor over the same columns and bins.
+        """
+        for col, sketch in other.sketches.items():
+            self.sketches[col].merge(sketch)
+
+    def to_dict(self) -> dict:
+        return {"sketches": {col: sketch.to_dict() for col, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DriftMonitor":
+        return cls({col: _sketch_from_dict(sketch) for col, sketch in state["sketches"].items()})
+
+    def report(self, baseline: "DriftMonitor") -> dict:
+        """
+        Scores the drift of every sketched column from the baseline.
+
+        Args:
+            baseline (DriftMonitor): The monitor built from the training data.
+
+        Returns:
+            dict: Per column with data, the 'psi', the binned 'ks' statistic of numeric columns, the 'count', the current and baseline 'mean' and 'std' of numeric columns, and the 'status': 'ok', 'warning' or 'alert'.
+        """
+        report = {}
+        for col, sketch in self.sketches.items():
+            reference = baseline.sketches[col]
+            if not sketch.count:
+                continue
+
+            if isinstance(sketch, NumericSketch):
+                entry = {"psi": psi(reference.counts, sketch.counts),
+                         "ks": binned_ks(reference.counts, sketch.counts),
+                         "mean": sketch.mean, "baseline_mean": reference.mean,
+                         "std": sketch.std, "baseline_std": reference.std}
+            else:
+                categories = list(dict.fromkeys([*reference.counts, *sketch.counts]))
+                entry = {"psi": psi(np.array([reference.counts.get(category, 0) for category in categories]),
+                                    np.array([sketch.counts.get(category, 0) for category in categories])),
+                         "unseen_categories": [category for category in sketch.counts
+                                               if sketch.counts[category] and not reference.counts.get(category)]}
+
+            entry["count"] = sketch.count
+            entry["status"] = "alert" if entry["psi"] >= PSI_ALERT else \
+                "warning" if entry["psi"] >= PSI_WARNING else "ok"
+            report[col] = entry
+        return report
+
+
+def build_baseline(numeric: dict[str, np.ndarray], categorical: dict[str, np.ndarray],
+                   premiums: dict[str, np.ndarray], n_bins: int = N_BINS) -> dict:
+    """
+    Builds the baseline snapshot of the training data: sketches of each raw input and of each model's predicted premium, with histogram bins spanning the bulk of the training values so that outliers do not stretch them.
+
+    Args:
+        numeric (dict[str, np.ndarray]): Training values of each numeric input.
+        categorical (dict[str, np.ndarray]): Training values of each categorical input.
+        premiums (dict[str, np.ndarray]): Each model's predicted premiums on the training data, by model name.
+        n_bins (int, optional): Number of bins of each numeric histogram. Defaults to 20.
+
+    Returns:
+        dict: The 'inputs' monitor state and the 'premiums' sketch state of each model.
+    """
+    def numeric_sketch(values):
+        values = np.asarray(values, dtype=float)
+        sketch = NumericSketch(*np.nanquantile(values, BIN_RANGE_QUANTILES), n_bins)
+        sketch.update(values)
+        return sketch
+
+    sketches = {col: numeric_sketch(values) for col, values in numeric.items()}
+    for col, values in categorical.items():
+        sketches[col] = CategoricalSketch()
+        sketches[col].update(values)
+
+    return {
+        "inputs": DriftMonitor(sketches).to_dict(),
+        "premiums": {model_name: numeric_sketch(values).to_dict() for model_name, values in premiums.items()},
+    }
+
+
+def training_baseline(encoded, encoder, premiums: dict[str, np.ndarray]) -> dict:
+    """
+    Builds the baseline snapshot from the encoded training features `train.py` fits on, decoding each categorical input back from its dummy columns.
+
+    Args:
+        encoded (pd.DataFrame): The unscaled, encoded training features.
+        encoder (FeatureEncoder): The fitted feature encoder, whose first category of each column is the one without a dummy column.
+        premiums (dict[str, np.ndarray]): Each model's predicted premiums on the training features, by model name.
+
+    Returns:
+        dict: The snapshot, as returned by `build_baseline`.
+    """
+    numeric = {col: encoded[col].to_numpy() for col in encoder.input_columns if col not in encoder.categories_}
+
+    categorical = {}
+    for col, categories in encoder.categories_.items():
+        # At most one dummy is set per row, so weighting them by position gives each row's category index
+        dummies = encoded[[f"{col}_{category}" for category in categories[1:]]].to_numpy(dtype=float)
+        codes = (dummies @ np.arange(1, len(categories))).astype(np.int64)
+        categorical[col] = np.asarray(categories, dtype=object)[codes]
+
+    return build_baseline(numeric, categorical, premiums)
+
+
+def save_baseline(baseline: dict, models_dir: str) -> str:
+    """
+    Saves a baseline snapshot as JSON next to the models' metrics.
+
+    Args:
+        baseline (dict): The snapshot, as returned by `build_baseline`.
+        models_dir (str): Directory of the saved models.
+
+    Returns:
+        str: Path of the written file.
+    """
+    path = os.path.join(models_dir, DRIFT_BASELINE_FILE)
+    with open(path, "w") as file:
+        json.dump(baseline, file)
+    return path
+
+
+def load_baseline(models_dir: str, model_name: str = "ridge") -> DriftMonitor:
+    """
+    Loads the baseline snapshot saved at training time as a monitor of the raw inputs and of one model's premiums.
+
+    Args:
+        models_dir (str): Directory of the saved models.
+        model_name (str, optional): Name of the model whose premiums are monitored. Defaults to 'ridge'.
+
+    Returns:
+        DriftMonitor: The baseline monitor.
+
+    Raises:
+        FileNotFoundError: If the models were saved without a baseline snapshot.
+    """
+    baseline_path = os.path.join(models_dir, DRIFT_BASELINE_FILE)
+    if not os.path.exists(baseline_path):
+        raise FileNotFoundError(
+            f"{baseline_path} not found; retrain with train.py to save the drift baseline")
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    state = {"sketches": {**baseline["inputs"]["sketches"], PREMIUM_SKETCH: baseline["premiums"][model_name]}}
+    return DriftMonitor.from_dict(state)
+
+
+def measure_overhead(input_path: str, models_dir: str, bundle_dir: str, model_name: str = "ridge",
+                     batch_size: int = 100_000, repeats: int = 3) -> dict:
+    """
+    Times scoring a policy book in a single process with and without drift monitoring.
+
+    Args:
+        input_path (str): Path to a file of raw policy records.
+        models_dir (str): Directory of the saved models and the drift baseline.
+        bundle_dir (str): Directory of the model bundle to score with.
+        model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+        batch_size (int, optional): Number of records per batch. Defaults to 100000.
+        repeats (int, optional): Number of timed runs of each; the fastest is kept. Defaults to 3.
+
+    Returns:
+        dict: The fastest 'plain_seconds' and 'monitored_seconds', and the 'overhead' as a fraction.
+    """
+    import tempfile
+
+    from src.modeling.predict import score_file
+
+    times = {"plain_seconds": [], "monitored_seconds": []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "scored.csv")
+        for _ in range(repeats):
+            for key, report_path in [("plain_seconds", None), ("monitored_seconds", os.path.join(tmp_dir, "drift.json"))]:
+                start = time.perf_counter()
+                score_file(input_path, output_path, models_dir, model_name, batch_size,
+                           workers=1, bundle_dir=bundle_dir, drift_report=report_path)
+                times[key].append(time.perf_counter() - start)
+
+    result = {key: min(values) for key, values in times.items()}
+    result["overhead"] = result["monitored_seconds"] / result["plain_seconds"] - 1
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the overhead of drift monitoring while scoring a policy book.")
+    parser.add_argument("input_path",
+                        help="CSV, Parquet or Arrow IPC file of raw policy records.")
+    parser.add_argument("--models-dir", default=os.path.join(project_root, "models"),
+                        help="Directory containing the saved models and the drift baseline.")
+    parser.add_argument("--bundle-dir", default=None,
+                        help="Directory of the model bundle. Defaults to 'bundle' inside the models directory.")
+    parser.add_argument("--model", default="ridge",
+                        help="Model to score with: ridge, xgboost or random_forest.")
+    args = parser.parse_args()
+
+    result = measure_overhead(args.input_path, args.models_dir,
+                              args.bundle_dir or os.path.join(args.models_dir, "bundle"), args.model)
+    print(f"Scoring took {result['plain_seconds']:.2f}s, {result['monitored_seconds']:.2f}s with drift "
+          f"monitoring: {result['overhead']:+.1%} overhead")
@@ -0,0 +1,304 @@
+import argparse
+import copy
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import CREDIT_CATEGORIES, CREDIT_SCORE_BINS, add_credit_category  # noqa: E402
+from src.modeling.linear_scorer import (COEFFICIENTS_FILE,  # noqa: E402
+                                        export_coefficients)
+from src.modeling.bundle import write_bundle  # noqa: E402
+from src.modeling.drift import DRIFT_BASELINE_FILE  # noqa: E402
+from src.modeling.predict import MODELS_DIR, load_artifacts  # noqa: E402
+from src.modeling.tree_ensemble import export_trees  # noqa: E402
+from src.schema import read_policies  # noqa: E402
+
+# Directory that updated model versions are written to
+VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")
+
+
+def merge_statistics(old: dict, new: dict) -> dict:
+    """
+    Combines the sufficient statistics of two disjoint sets of rows, as if they had been computed on all the rows at once.
+
+    Uses the pairwise update of Chan et al., which stays accurate for features with large means such as 'Car_Value' and 'Manufacture_Year'.
+
+    Args:
+        old (dict): Statistics of the rows seen so far, as returned by `sufficient_statistics`.
+        new (dict): Statistics of the new rows.
+
+    Returns:
+        dict: The statistics of all the rows.
+    """
+    n_old, n_new = old["n_samples"], new["n_samples"]
+    n = n_old + n_new
+    x_delta = new["x_mean"] - old["x_mean"]
+    y_delta = new["y_mean"] - old["y_mean"]
+    weight = n_old * n_new / n
+
+    return {
+        "n_samples": n,
+        "x_mean": old["x_mean"] + x_delta * n_new / n,
+        "y_mean": old["y_mean"] + y_delta * n_new / n,
+        "xx_scatter": old["xx_scatter"] + new["xx_scatter"] + weight * np.outer(x_delta, x_delta),
+        "xy_scatter": old["xy_scatter"] + new["xy_scatter"] + weight * x_delta * y_delta,
+    }
+
+
+def scaler_from_statistics(scaler, statistics: dict, numeric_indices: list[int]):
+    """
+    Refits a StandardScaler from sufficient statistics, giving the running mean and variance it would learn from all the rows.
+
+    Args:
+        scaler (StandardScaler): The current scaler, used as a template.
+        statistics (dict): Statistics of all the rows, as returned by `merge_statistics`.
+        numeric_indices (list[int]): Positions of the scaled columns in the feature matrix.
+
+    Returns:
+        StandardScaler: A new scaler with the updated 'mean_', 'var_' and 'scale_'.
+    """
+    n = statistics["n_samples"]
+    variance = np.diag(statistics["xx_scatter"])[numeric_indices] / n
+
+    scaler = copy.deepcopy(scaler)
+    scaler.mean_ = statistics["x_mean"][numeric_indices].copy()
+    scaler.var_ = variance
+    # Constant columns are left unscaled, as StandardScaler does
+    scaler.scale_ = np.where(variance > 0, np.sqrt(variance), 1.0)
+    scaler.n_samples_seen_ = n
+    return scaler
+
+
+def _feature_shift_and_scale(scaler, n_features: int, numeric_indices: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    # Per-column offset and divisor of the scaling step, with one-hot columns passed through
+    shift = np.zeros(n_features)
+    scale = np.ones(n_features)
+    shift[numeric_indices] = scaler.mean_
+    scale[numeric_indices] = scaler.scale_
+    return shift, scale
+
+
+def ridge_from_statistics(statistics: dict, scaler, numeric_indices: list[int], alpha: float):
+    """
+    Solves, from sufficient statistics alone, for the Ridge model that a full refit on all the rows would produce.
+
+    A full refit first fits a new scaler on all the rows and then fits Ridge on the rescaled features. Both steps are reproduced here from the statistics: the running scaler gives the scaling, and the centred Gram matrix of the rescaled features is derived from the unscaled scatter matrix. The solution is then folded into coefficients on features scaled by `scaler`, so the model can keep sharing its scaler with the other models while predicting exactly what the refitted Ridge model would.
+
+    Args:
+        statistics (dict): Statistics of all the rows, as returned by `merge_statistics`.
+        scaler (StandardScaler): The scaler the model's inputs will be scaled with.
+        numeric_indices (list[int]): Positions of the scaled columns in the feature matrix.
+        alpha (float): Regularisation strength of the Ridge model.
+
+    Returns:
+        Ridge: A fitted Ridge model for features scaled by `scaler`.
+    """
+    from sklearn.linear_model import Ridge
+
+    n_features = len(statistics["x_mean"])
+    running_shift, running_scale = _feature_shift_and_scale(
+        scaler_from_statistics(scaler, statistics, numeric_indices), n_features, numeric_indices)
+    input_shift, input_scale = _feature_shift_and_scale(
+        scaler, n_features, numeric_indices)
+
+    # Centred XᵀX and Xᵀy of the features scaled by the running scaler
+    gram = statistics["xx_scatter"] / np.outer(running_scale, running_scale)
+    moment = statistics["xy_scatter"] / running_scale
+    coef = np.linalg.solve(gram + alpha * np.eye(n_features), moment)
+    intercept = statistics["y_mean"] - \
+        ((statistics["x_mean"] - running_shift) / running_scale) @ coef
+
+    # Express the same linear function on features scaled by the input scaler
+    model = Ridge(alpha=alpha)
+    model.coef_ = coef * input_scale / running_scale
+    model.intercept_ = intercept + \
+        coef @ ((input_shift - running_shift) / running_scale)
+    model.n_features_in_ = n_features
+    return model
+
+
+def _encode(data: pd.DataFrame, artifacts: dict) -> tuple[np.ndarray, np.ndarray]:
+    # The new rows are raw policy records, like those scored by predict.py, plus the target
+    encoder = artifacts["encoder"]
+    if "Credit_Category" in encoder.categories_:
+        data = add_credit_category(data)
+    return encoder.transform(data), data["Premium_Amount"].to_numpy(dtype=float)
+
+
+def _scale(features: np.ndarray, scaler, numeric_indices: list[int]) -> np.ndarray:
+    features = features.copy()
+    features[:, numeric_indices] = (
+        features[:, numeric_indices] - scaler.mean_) / scaler.scale_
+    return features
+
+
+def update_models(new_data: pd.DataFrame, models_dir: str = MODELS_DIR, output_dir: str | None = None,
+                  boosting_rounds: int = 20) -> dict:
+    """
+    Updates the Ridge and XGBoost models with newly arrived rows only, and saves the result as a new model version next to the old one.
+
+    The Ridge model is refitted from the saved sufficient statistics merged with those of the new rows, including the scaler's running mean and variance, which gives the same premiums as refitting it on all the rows. The XGBoost model keeps its trees and continues boosting on the new rows. The saved scaler is carried over unchanged, since the existing trees split on features in its scaling. The Random Forest cannot be updated this way and is not carried over.
+
+    Args:
+        new_data (pd.DataFrame): The new rows as cleaned policy records, such as the output of `clean_data.py`, including 'Premium_Amount'.
+        models_dir (str, optional): Directory of the model version to update, as written by `train.py` or by an earlier update. Defaults to the project's 'models' directory.
+        output_dir (str, optional): Directory to write the new version to. Defaults to a new timestamped directory under 'models/versions'.
+        boosting_rounds (int, optional): Number of trees to add to the XGBoost model. Defaults to 20.
+
+    Returns:
+        dict: The new version's 'models_dir', the number of 'new_rows', the total 'n_samples' the Ridge statistics now summarise, and the update time in 'seconds'.
+    """
+    statistics_path = os.path.join(models_dir, "ridge_statistics.joblib")
+    if not os.path.exists(statistics_path):
+        raise FileNotFoundError(
+            f"{statistics_path} not found; retrain with train.py once to save the Ridge sufficient statistics")
+
+    # Training libraries load only when models are updated, so importing this module for its NumPy helpers is cheap
+    import joblib
+    from xgboost import XGBRegressor
+
+    from src.modeling.train import sufficient_statistics
+
+    start = time.perf_counter()
+    ridge_artifacts = load_artifacts(models_dir, "ridge")
+    xgboost_model = joblib.load(os.path.join(
+        models_dir, "xgboost_model.joblib"))
+    numeric_indices = ridge_artifacts["numeric_indices"]
+
+    # Refit the Ridge model from the merged statistics
+    X_new, y_new = _encode(new_data, ridge_artifacts)
+    statistics = merge_statistics(joblib.load(
+        statistics_path), sufficient_statistics(X_new, y_new))
+    scaler = ridge_artifacts["scaler"]
+    ridge_model = ridge_from_statistics(
+        statistics, scaler, numeric_indices, ridge_artifacts["model"].alpha)
+
+    # Boost on the new rows only, starting from the saved trees
+    updated_xgboost = XGBRegressor(
+        **{**xgboost_model.get_params(), "n_estimators": boosting_rounds})
+    updated_xgboost.fit(_scale(X_new, scaler, numeric_indices),
+                        y_new, xgb_model=xgboost_model.get_booster())
+    seconds = time.perf_counter() - start
+
+    if output_dir is None:
+        output_dir = os.path.join(VERSIONS_DIR, datetime.now(
+            timezone.utc).strftime("%Y%m%dT%H%M%SZ"))
+    os.makedirs(output_dir, exist_ok=True)
+
+    joblib.dump(ridge_model, os.path.join(output_dir, "ridge_model.joblib"))
+    export_coefficients(ridge_model, scaler, ridge_artifacts["numeric_columns"], ridge_artifacts["encoder"],
+                        os.path.join(output_dir, COEFFICIENTS_FILE), (CREDIT_SCORE_BINS, CREDIT_CATEGORIES))
+    joblib.dump(updated_xgboost, os.path.join(
+        output_dir, "xgboost_model.joblib"))
+    export_trees(updated_xgboost, output_dir, "xgboost")
+    joblib.dump(statistics, os.path.join(
+        output_dir, "ridge_statistics.joblib"))
+    # The drift baseline stays that of the original training data, which the updated models still describe
+    for file_name in ["scaler.joblib", "model_features.joblib", "feature_encoder.joblib", DRIFT_BASELINE_FILE]:
+        shutil.copy2(os.path.join(models_dir, file_name),
+                     os.path.join(output_dir, file_name))
+
+    summary = {
+        "models_dir": output_dir,
+        "parent_models_dir": os.path.abspath(models_dir),
+        "new_rows": len(new_data),
+        "n_samples": statistics["n_samples"],
+        "boosting_rounds": boosting_rounds,
+        "seconds": seconds,
+    }
+    with open(os.path.join(output_dir, "update.json"), "w") as file:
+        json.dump(summary, file, indent=2)
+    write_bundle(output_dir)
+    return summary
+
+
+def compare_with_full_retrain(data_path: str, new_data: pd.DataFrame, summary: dict) -> dict:
+    """
+    Times a full refit of the Ridge and XGBoost models on the original training split plus the new rows, and checks the incrementally updated Ridge model against it.
+
+    Assumes the updated version descends from models trained by `train.py` on `data_path`.
+
+    Args:
+        data_path (str): Path to the processed dataset the original models were trained on.
+        new_data (pd.DataFrame): The new rows passed to `update_models`.
+        summary (dict): The summary returned by `update_models`.
+
+    Returns:
+        dict: The full retrain time in 'full_retrain_seconds', the 'speedup' of the update over it, and the largest absolute difference between the two Ridge models' premiums on the new rows in 'ridge_max_abs_difference'.
+    """
+    import joblib
+    from sklearn.linear_model import Ridge
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBRegressor
+
+    from src.modeling.train import load_training_data, split_and_scale
+
+    artifacts = load_artifacts(summary["models_dir"], "ridge")
+    xgboost_model = joblib.load(os.path.join(
+        summary["models_dir"], "xgboost_model.joblib"))
+    numeric_indices = artifacts["numeric_indices"]
+    X_new, y_new = _encode(new_data, artifacts)
+
+    # Refit everything on all the rows, as train.py would
+    start = time.perf_counter()
+    data = split_and_scale(load_training_data(data_path))
+    X_all = np.vstack(
+        [np.asarray(data["X_train_encoded"], dtype=float), X_new])
+    y_all = np.concatenate([data["y_train"], y_new])
+    full_scaler = StandardScaler().fit(X_all[:, numeric_indices])
+    X_all_scaled = _scale(X_all, full_scaler, numeric_indices)
+    full_ridge = Ridge(alpha=artifacts["model"].alpha).fit(X_all_scaled, y_all)
+    XGBRegressor(**{**xgboost_model.get_params(),
+                    "n_estimators": xgboost_model.get_booster().num_boosted_rounds()}).fit(X_all_scaled, y_all)
+    full_seconds = time.perf_counter() - start
+
+    incremental_premiums = artifacts["model"].predict(
+        _scale(X_new, artifacts["scaler"], numeric_indices))
+    full_premiums = full_ridge.predict(
+        _scale(X_new, full_scaler, numeric_indices))
+    return {
+        "full_retrain_seconds": full_seconds,
+        "speedup": full_seconds / summary["seconds"],
+        "ridge_max_abs_difference": float(np.max(np.abs(incremental_premiums - full_premiums))),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Update the Ridge and XGBoost models with newly arrived rows and save them as a new model version.")
+    parser.add_argument("new_data_path",
+                        help="CSV, Parquet or Arrow IPC file of new cleaned policy records, including Premium_Amount.")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="Directory of the model version to update.")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory to write the new version to. Defaults to models/versions/<timestamp>.")
+    parser.add_argument("--boosting-rounds", type=int, default=20,
+                        help="Number of trees to add to the XGBoost model.")
+    parser.add_argument("--compare-with", default=None,
+                        help="Processed dataset the models were trained on, to time a full retrain for comparison.")
+    args = parser.parse_args()
+
+    new_data = read_policies(args.new_data_path)
+    summary = update_models(new_data, args.models_dir,
+                            args.output_dir, args.boosting_rounds)
+    print(f"Updated with {summary['new_rows']:,} new rows in {summary['seconds']:.2f}s "
+          f"-> {summary['models_dir']}")
+
+    if args.compare_with:
+        comparison = compare_with_full_retrain(
+            args.compare_with, new_data, summary)
+        print(f"Full retrain took {comparison['full_retrain_seconds']:.2f}s "
+              f"({comparison['speedup']:.1f}x slower); largest Ridge premium difference "
+              f"{comparison['ridge_max_abs_difference']:.2e}")
@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import add_credit_category, credit_categories  # noqa: E402
+from src.import_budget import time_in_fresh_interpreter  # noqa: E402
+
+# Coefficient table of the Ridge model written by `train.py`
+COEFFICIENTS_FILE = "ridge_coefficients.json"
+COEFFICIENTS_PATH = os.path.join(project_root, "models", COEFFICIENTS_FILE)
+
+# Features engineered from the raw inputs, as (numerator, denominator), zero when the denominator is zero
+ENGINEERED_FEATURES = {
+    "Accident_Claim_Rate": ("Number_of_Claims", "Number_of_Accidents"),
+    "Claims_per_Year": ("Number_of_Claims", "Years_Driving"),
+}
+
+
+def coefficient_table(model, scaler, numeric_columns: list[str], encoder,
+                      credit_bands: tuple[list, list] | None = None) -> dict:
+    """
+    Folds the scaler into a linear model's coefficients, giving a table keyed by raw feature from which premiums can be computed without the scaler, the encoder or scikit-learn.
+
+    Each scaled column's coefficient w becomes w / scale on the raw value, and the intercept absorbs -w * mean / scale. Each one-hot column becomes the contribution of its category, with zero for the dropped first category. The scaler's means are kept, so that contributions can be measured from the average applicant, as the model itself sees them.
+
+    Args:
+        model (Ridge): The fitted linear model, trained on scaled, encoded features.
+        scaler (StandardScaler): The scaler fitted on `numeric_columns`.
+        numeric_columns (list[str]): The columns the scaler was fitted on.
+        encoder (FeatureEncoder): The fitted feature encoder whose 'feature_names_' match the model's columns.
+        credit_bands (tuple[list, list], optional): The credit score bin edges and categories that 'Credit_Category' is derived from, stored so that the scorer can derive it for inputs without it. Only used when the model has that feature.
+
+    Returns:
+        dict: The 'intercept', the 'numeric' coefficients, the 'means' of the scaled columns, the 'categorical' contributions and, if used, the 'credit_bands'.
+    """
+    coefficients = dict(zip(encoder.feature_names_,
+                            np.asarray(model.coef_, dtype=float).ravel()))
+    intercept = float(np.ravel(model.intercept_)[0])
+
+    # Fold the standardisation into the coefficients of the scaled columns
+    for col, mean, scale in zip(numeric_columns, scaler.mean_, scaler.scale_):
+        coefficients[col] /= scale
+        intercept -= coefficients[col] * mean
+
+    categorical = {
+        col: {category: float(coefficients.pop(f"{col}_{category}", 0.0)) for category in categories}
+        for col, categories in encoder.categories_.items()
+    }
+    table = {
+        "intercept": intercept,
+        "numeric": {col: float(coefficient) for col, coefficient in coefficients.items()},
+        "means": {col: float(mean) for col, mean in zip(numeric_columns, scaler.mean_)},
+        "categorical": categorical,
+    }
+    if "Credit_Category" in categorical and credit_bands is not None:
+        table["credit_bands"] = {"source": "Credit_Score",
+                                 "bins": list(credit_bands[0]), "categories": list(credit_bands[1])}
+    return table
+
+
+def export_coefficients(model, scaler, numeric_columns: list[str], encoder, path: str,
+                        credit_bands: tuple[list, list] | None = None) -> dict:
+    """
+    Saves the coefficient table of a linear model, as built by `coefficient_table`, as JSON.
+
+    Args:
+        model (Ridge): The fitted linear model, trained on scaled, encoded features.
+        scaler (StandardScaler): The scaler fitted on `numeric_columns`.
+        numeric_columns (list[str]): The columns the scaler was fitted on.
+        encoder (FeatureEncoder): The fitted feature encoder whose 'feature_names_' match the model's columns.
+        path (str): Path to write the JSON table to.
+        credit_bands (tuple[list, list], optional): The credit score bin edges and categories that 'Credit_Category' is derived from.
+
+    Returns:
+        dict: The saved table.
+    """
+    table = coefficient_table(
+        model, scaler, numeric_columns, encoder, credit_bands)
+    with open(path, "w") as file:
+        json.dump(table, file, indent=2)
+    return table
+
+
+class LinearScorer:
+    """
+    Scores quotes with an exported coefficient table, using only dictionary and NumPy lookups.
+
+    Attributes:
+        intercept (float): Premium of a quote with every raw input at zero and every category at its baseline.
+        numeric (dict[str, float]): Coefficient of each raw or engineered numeric feature, in its own units.
+        categorical (dict[str, dict[str, float]]): Premium contribution of each category of each categorical column, with zero for the baseline category. Missing categories contribute nothing, and unknown ones are rejected.
+        means (dict[str, float]): Training mean of each scaled numeric feature, from which contributions are measured.
+    """
+
+    def __init__(self, table: dict):
+        self.intercept = table["intercept"]
+        self.numeric = table["numeric"]
+        self.categorical = table["categorical"]
+        self.means = table.get("means", {})
+        self.credit_bands = table.get("credit_bands")
+
+        # Sorted categories and their contributions, for batch lookups with np.searchsorted
+        self._category_arrays = {
+            col: (np.array(sorted(contributions)),
+                  np.array([contributions[category] for category in sorted(contributions)]))
+            for col, contributions in self.categorical.items()
+        }
+
+    @classmethod
+    def load(cls, path: str = COEFFICIENTS_PATH) -> "LinearScorer":
+        """
+        Loads a coefficient table written by `export_coefficients`.
+
+        Args:
+            path (str, optional): Path to the JSON table. Defaults to 'models/ridge_coefficients.json'.
+
+        Returns:
+            LinearScorer: The scorer.
+        """
+        with open(path) as file:
+            return cls(json.load(file))
+
+    def score_quote(self, input_dictionary: dict) -> float:
+        """
+        Predicts the premium of a single quote, such as the prediction page's input dictionary.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote. 'Credit_Category' is derived from 'Credit_Score' if the model uses it and it is missing.
+
+        Returns:
+            float: The predicted monthly premium.
+
+        Raises:
+            ValueError: If a categorical input has a value outside the model's categories.
+        """
+        if self.credit_bands and "Credit_Category" in self.categorical:
+            input_dictionary = add_credit_category(input_dictionary, self.credit_bands)
+
+        premium = self.intercept
+        for col, coefficient in self.numeric.items():
+            if col in ENGINEERED_FEATURES:
+                numerator, denominator = ENGINEERED_FEATURES[col]
+                value = input_dictionary[numerator] / input_dictionary[denominator] \
+                    if input_dictionary[denominator] else 0.0
+            else:
+                value = input_dictionary[col]
+            premium += coefficient * value
+
+        for col, contributions in self.categorical.items():
+            category = input_dictionary.get(col)
+            if category is not None and category == category and category not in contributions:
+                raise ValueError(f"Unexpected values in {col}: {category}")
+            premium += contributions.get(category, 0.0)
+        return float(premium)
+
+    def _category_contributions(self, col: str, values) -> np.ndarray:
+        categories, contributions = self._category_arrays[col]
+
+        # Pandas categoricals are looked up once per category rather than once per row, skipping unused categories
+        if hasattr(values, "cat"):
+            codes = values.cat.codes.to_numpy()
+            used = np.flatnonzero(np.bincount(codes + 1, minlength=len(values.cat.categories) + 1)[1:])
+            per_category = np.zeros(len(values.cat.categories))
+            per_category[used] = self._category_contributions(
+                col, np.asarray(values.cat.categories)[used])
+            return np.where(codes >= 0, per_category[codes], 0.0)
+
+        values = np.asarray(values)
+        strings = values.astype(str)
+        positions = np.minimum(np.searchsorted(
+            categories, strings), len(categories) - 1)
+        found = categories[positions] == strings
+
+        # Missing values are priced as the baseline; anything else outside the table is an error
+        unknown = {value for value in values[~found].tolist() if value is not None and value == value}
+        if unknown:
+            raise ValueError(f"Unexpected values in {col}: {', '.join(sorted(map(str, unknown)))}")
+        return np.where(found, contributions[positions], 0.0)
+
+    def score_batch(self, data) -> np.ndarray:
+        """
+        Predicts the premiums of a batch of quotes in one vectorised pass.
+
+        Args:
+            data (Mapping[str, array-like]): Raw input columns, such as a DataFrame or a dictionary of NumPy arrays. 'Credit_Category' is derived from 'Credit_Score' if the model uses it and it is missing.
+
+        Returns:
+            np.ndarray: The predicted monthly premium of each quote.
+
+        Raises:
+            ValueError: If a categorical column has a value outside the model's categories.
+        """
+        premiums = None
+        for col, coefficient in self.numeric.items():
+            values = self._numeric_values(data, col)
+            premiums = coefficient * values if premiums is None else premiums + coefficient * values
+        premiums = premiums + self.intercept
+
+        for col in self.categorical:
+            premiums += self._category_contributions(col, self._category_values(data, col))
+        return premiums
+
+    def _numeric_values(self, data, col: str) -> np.ndarray:
+        if col in ENGINEERED_FEATURES:
+            numerator, denominator = (np.asarray(data[name], dtype=float)
+                                      for name in ENGINEERED_FEATURES[col])
+            return np.divide(numerator, denominator, out=np.zeros_like(numerator),
+                             where=denominator != 0)
+        return np.asarray(data[col], dtype=float)
+
+    def _category_values(self, data, col: str):
+        if col == "Credit_Category" and col not in data and self.credit_bands:
+            return credit_categories(data[self.credit_bands["source"]], self.credit_bands)
+        return data[col]
+
+    @property
+    def expected_value(self) -> float:
+        """
+        The premium of an applicant at the training mean of every numeric feature and the baseline of every category.
+        """
+        return self.intercept + sum(self.numeric[col] * mean for col, mean in self.means.items())
+
+    def contributions(self, data) -> dict[str, np.ndarray]:
+        """
+        Splits the premiums of a batch of quotes into the exact contribution of each input.
+
+        A numeric feature contributes its coefficient times its scaled value, as the Ridge model computes it, and a category its coefficient, with nothing for the baseline category. For each quote, `expected_value` plus the contributions gives the premium.
+
+        Args:
+            data (Mapping[str, array-like]): Raw input columns, as passed to `score_batch`.
+
+        Returns:
+            dict[str, np.ndarray]: The contribution of each numeric feature and categorical input to each quote's premium.
+        """
+        contributions = {col: coefficient * (self._numeric_values(data, col) - self.means.get(col, 0.0))
+                         for col, coefficient in self.numeric.items()}
+        for col in self.categorical:
+            contributions[col] = self._category_contributions(
+                col, self._category_values(data, col))
+        return contributions
+
+
+def benchmark(models_dir: str, n_quotes: int = 2000, repeats: int = 5) -> dict:
+    """
+    Compares the coefficient table scorer with scoring through the saved Ridge model, for cold start and per-quote latency.
+
+    Args:
+        models_dir (str): Directory containing the saved artifacts and the coefficient table.
+        n_quotes (int, optional): Number of synthetic quotes to time. Defaults to 2000.
+        repeats (int, optional): Number of fresh interpreters each cold start is timed in. Defaults to 5.
+
+    Returns:
+        dict: For the 'model' and 'table' paths, the median 'startup_seconds' to import and load in a fresh interpreter and the median and 99th percentile per-quote latency in microseconds, plus the 'max_abs_difference' between their premiums.
+    """
+    from src.dataset import generate_policies
+    from src.modeling.predict import load_artifacts, score_quote
+
+    table_path = os.path.join(models_dir, COEFFICIENTS_FILE)
+    startup = {
+        "model": time_in_fresh_interpreter(
+            f"from src.modeling.predict import load_artifacts; load_artifacts({models_dir!r}, 'ridge')", repeats),
+        "table": time_in_fresh_interpreter(
+            f"from src.modeling.linear_scorer import LinearScorer; LinearScorer.load({table_path!r})", repeats),
+    }
+
+    artifacts = load_artifacts(models_dir, "ridge")
+    scorer = LinearScorer.load(table_path)
+    quotes = add_credit_category(generate_policies(n_quotes)).astype(
+        {"Has_AntiTheft_Device": int}).to_dict("records")
+    scorers = {"model": lambda quote: score_quote(quote, artifacts),
+               "table": scorer.score_quote}
+
+    results = {}
+    premiums = {}
+    for name, score in scorers.items():
+        latencies = []
+        premiums[name] = []
+        for quote in quotes:
+            start = time.perf_counter()
+            premiums[name].append(score(quote))
+            latencies.append(time.perf_counter() - start)
+        results[name] = {
+            "startup_seconds": startup[name],
+            "median_latency_us": float(np.median(latencies) * 1e6),
+            "p99_latency_us": float(np.percentile(latencies, 99) * 1e6),
+        }
+
+    results["max_abs_difference"] = float(np.max(np.abs(
+        np.subtract(premiums["model"], premiums["table"]))))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the Ridge model as a coefficient table, or benchmark the table scorer against the saved model.")
+    parser.add_argument("--models-dir", default=os.path.dirname(COEFFICIENTS_PATH),
+                        help="Directory containing the saved artifacts.")
+    parser.add_argument("--export", action="store_true",
+                        help="Export the coefficient table of the saved Ridge model.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare start-up time and per-quote latency with the saved model.")
+    parser.add_argument("--quotes", type=int, default=2000,
+                        help="Number of quotes to time in the benchmark.")
+    args = parser.parse_args()
+
+    if args.export:
+        from src.credit import CREDIT_CATEGORIES, CREDIT_SCORE_BINS
+        from src.modeling.predict import load_artifacts
+
+        artifacts = load_artifacts(args.models_dir, "ridge")
+        export_coefficients(artifacts["model"], artifacts["scaler"], artifacts["numeric_columns"],
+                            artifacts["encoder"], os.path.join(
+                                args.models_dir, COEFFICIENTS_FILE),
+                            (CREDIT_SCORE_BINS, CREDIT_CATEGORIES))
+        print(f"Exported {os.path.join(args.models_dir, COEFFICIENTS_FILE)}")
+
+    if args.benchmark:
+        results = benchmark(args.models_dir, args.quotes)
+        for name, label in [("model", "Saved Ridge model"), ("table", "Coefficient table")]:
+            result = results[name]
+            print(f"{label:<18} start-up {result['startup_seconds'] * 1000:7.1f} ms, "
+                  f"median {result['median_latency_us']:7.1f} µs, p99 {result['p99_latency_us']:7.1f} µs per quote")
+        print(f"Largest premium difference: {results['max_abs_difference']:.2e}")
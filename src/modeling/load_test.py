@@ -0,0 +1,118 @@
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Raw dataset the sample quotes are drawn from
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(
+    __file__), "..", "..", "data", "raw", "car_insurance_premiums_dataset.csv"))
+
+
+# One keep-alive connection per load-test thread
+_connections = threading.local()
+
+
+def _request(url: str, method: str = "GET", body=None) -> tuple[float, dict]:
+    parts = urllib.parse.urlsplit(url)
+    if getattr(_connections, "connection", None) is None:
+        _connections.connection = http.client.HTTPConnection(
+            parts.hostname, parts.port)
+
+    payload = None if body is None else json.dumps(body).encode()
+    start = time.perf_counter()
+    _connections.connection.request(method, parts.path, body=payload,
+                                    headers={"Content-Type": "application/json"})
+    response = _connections.connection.getresponse()
+    result = json.loads(response.read())
+    latency = time.perf_counter() - start
+
+    if response.status != 200:
+        raise RuntimeError(f"{url} returned {response.status}: {result}")
+    return latency, result
+
+
+def _post(url: str, body) -> float:
+    return _request(url, "POST", body)[0]
+
+
+def _get(url: str) -> dict:
+    return _request(url)[1]
+
+
+def run_load_test(url: str, n_requests: int = 2000, concurrency: int = 32, bulk_size: int = 0,
+                  data_path: str = DATA_PATH) -> dict:
+    """
+    Sends sample quotes to a running prediction server and measures latency and throughput.
+
+    Args:
+        url (str): Base URL of the prediction server, e.g. 'http://127.0.0.1:8000'.
+        n_requests (int, optional): Number of requests to send. Defaults to 2000.
+        concurrency (int, optional): Number of requests in flight at once. Defaults to 32.
+        bulk_size (int, optional): Quotes per request. 0 sends single quotes to /quote, anything else sends lists of this size to /quotes. Defaults to 0.
+        data_path (str, optional): CSV of raw policy records to sample quotes from. Defaults to the raw dataset.
+
+    Returns:
+        dict: Requests and quotes sent, elapsed seconds, requests and quotes per second, p50/p99 latency in milliseconds, the server's mean micro-batch size and its quote cache hit rate.
+    """
+    records = pd.read_csv(data_path).drop(
+        columns=["Customer_ID", "Premium_Amount"], errors="ignore").to_dict("records")
+
+    if bulk_size:
+        endpoint = f"{url}/quotes"
+        bodies = [[records[(i * bulk_size + j) % len(records)] for j in range(bulk_size)]
+                  for i in range(n_requests)]
+    else:
+        endpoint = f"{url}/quote"
+        bodies = [records[i % len(records)] for i in range(n_requests)]
+
+    stats_before = _get(f"{url}/stats")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(
+            list(executor.map(lambda body: _post(endpoint, body), bodies)))
+    seconds = time.perf_counter() - start
+    stats_after = _get(f"{url}/stats")
+
+    batches = stats_after["batches"] - stats_before["batches"]
+    quotes = stats_after["quotes"] - stats_before["quotes"]
+    cache_hits = stats_after["cache"]["hits"] - stats_before["cache"]["hits"]
+    cache_lookups = cache_hits + \
+        stats_after["cache"]["misses"] - stats_before["cache"]["misses"]
+    return {
+        "requests": n_requests,
+        "quotes": n_requests * max(bulk_size, 1),
+        "seconds": seconds,
+        "requests_per_second": n_requests / seconds,
+        "quotes_per_second": n_requests * max(bulk_size, 1) / seconds,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "mean_micro_batch": quotes / batches if batches else 0.0,
+        "cache_hit_rate": cache_hits / cache_lookups if cache_lookups else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test a running prediction server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000",
+                        help="Base URL of the prediction server.")
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Number of requests to send.")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Number of requests in flight at once.")
+    parser.add_argument("--bulk-size", type=int, default=0,
+                        help="Send lists of this many quotes to /quotes instead of single quotes.")
+    args = parser.parse_args()
+
+    results = run_load_test(args.url, args.requests,
+                            args.concurrency, args.bulk_size)
+    for name, value in results.items():
+        print(f"{name:>20}: {value:,.2f}" if isinstance(
+            value, float) else f"{name:>20}: {value:,}")
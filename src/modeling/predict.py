@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import add_credit_category  # noqa: E402
+from src.instrumentation import RECORDER, profiled, span  # noqa: E402
+from src.modeling.bundle import ModelBundle  # noqa: E402
+from src.modeling.drift import DriftMonitor, load_baseline  # noqa: E402
+from src.schema import CSV_DTYPES  # noqa: E402
+from src.storage import DatasetWriter, iter_dataset  # noqa: E402
+
+# Directory the trained models and preprocessing artifacts are saved to
+MODELS_DIR = os.path.join(project_root, "models")
+
+# Column the predicted premiums are written to
+PREDICTION_COLUMN = "Predicted_Premium"
+
+# Columns of an explained premium: the model's expected premium, and each input's contribution under this prefix
+EXPECTED_COLUMN = "Expected_Premium"
+CONTRIBUTION_PREFIX = "Contribution_"
+
+# Input columns copied through to the output to identify each policy
+ID_COLUMNS = ["Customer_ID"]
+
+
+def artifact_paths(models_dir: str = MODELS_DIR, model_name: str = "ridge") -> list[str]:
+    """
+    Lists the files that make up a trained model and its preprocessing artifacts.
+
+    Args:
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model. Defaults to 'ridge'.
+
+    Returns:
+        list[str]: Paths to the model, scaler, model features and feature encoder files.
+    """
+    return [os.path.join(models_dir, file_name) for file_name in (
+        f"{model_name}_model.joblib", "scaler.joblib", "model_features.joblib", "feature_encoder.joblib")]
+
+
+def artifacts_version(models_dir: str = MODELS_DIR, model_name: str = "ridge") -> tuple:
+    """
+    Identifies the current version of a trained model's artifacts by their paths and modification times, so that caches can tell when a model has been retrained.
+
+    Args:
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model. Defaults to 'ridge'.
+
+    Returns:
+        tuple: (path, modification time in nanoseconds) for each artifact file.
+    """
+    return tuple((path, os.stat(path).st_mtime_ns) for path in artifact_paths(models_dir, model_name))
+
+
+def load_artifacts(models_dir: str = MODELS_DIR, model_name: str = "ridge") -> dict:
+    """
+    Loads a trained model together with the scaler, model features and feature encoder saved by `train.py`.
+
+    Args:
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model file without the '_model.joblib' suffix, e.g. 'ridge', 'xgboost' or 'random_forest'. Defaults to 'ridge'.
+
+    Returns:
+        dict: The 'model', 'scaler', 'numeric_columns', 'model_features' and 'encoder', plus the 'numeric_indices' of the scaled columns in the feature matrix.
+    """
+    import joblib
+
+    model_path, scaler_path, model_features_path, encoder_path = artifact_paths(
+        models_dir, model_name)
+    scaler, numeric_columns = joblib.load(scaler_path)
+    model_features = joblib.load(model_features_path)
+    encoder = joblib.load(encoder_path)
+
+    if encoder.feature_names_ != model_features:
+        raise ValueError(
+            "The feature encoder does not match the trained model features")
+
+    return {
+        "model": joblib.load(model_path),
+        "scaler": scaler,
+        "numeric_columns": numeric_columns,
+        "model_features": model_features,
+        "encoder": encoder,
+        "numeric_indices": [model_features.index(col) for col in numeric_columns],
+    }
+
+
+def _scale_features(features: np.ndarray, artifacts: dict) -> np.ndarray:
+    # Standardise the numeric columns in place, as the fitted scaler does
+    numeric_indices = artifacts["numeric_indices"]
+    scaler = artifacts["scaler"]
+    features[:, numeric_indices] = (
+        features[:, numeric_indices] - scaler.mean_) / scaler.scale_
+    return features
+
+
+def score_batch(data: pd.DataFrame, artifacts: dict) -> np.ndarray:
+    """
+    Predicts the premiums of a batch of raw policy records in one vectorised pass.
+
+    The records are encoded, their numeric features scaled and the whole batch passed to a single `predict` call, each step timed as the 'encode', 'scale' and 'predict' span. The 'Credit_Category' feature is derived from 'Credit_Score' when the model uses it and the batch does not have it.
+
+    Args:
+        data (pd.DataFrame): Raw policy records with the same columns as the training data.
+        artifacts (dict): The loaded artifacts, as returned by `load_artifacts`.
+
+    Returns:
+        np.ndarray: The predicted monthly premium of each record.
+    """
+    encoder = artifacts["encoder"]
+    with span("encode"):
+        if "Credit_Category" in encoder.categories_:
+            data = add_credit_category(data)
+        features = encoder.transform(data)
+
+    with span("scale"):
+        features = _scale_features(features, artifacts)
+    with span("predict"):
+        return artifacts["model"].predict(features)
+
+
+def score_quote(input_dictionary: dict, artifacts: dict) -> float:
+    """
+    Predicts the premium of a single quote, such as the prediction page's input dictionary, without building a DataFrame.
+
+    Args:
+        input_dictionary (dict): The raw inputs of one quote. 'Credit_Category' is derived from 'Credit_Score' if the model uses it and it is missing.
+        artifacts (dict): The loaded artifacts, as returned by `load_artifacts`.
+
+    Returns:
+        float: The predicted monthly premium.
+    """
+    encoder = artifacts["encoder"]
+    with span("encode"):
+        if "Credit_Category" in encoder.categories_:
+            input_dictionary = add_credit_category(input_dictionary)
+        features = encoder.transform(input_dictionary)
+    with span("scale"):
+        features = _scale_features(features, artifacts)
+    with span("predict"):
+        return float(artifacts["model"].predict(features)[0])
+
+
+def _scored_output(data: pd.DataFrame, scored: np.ndarray | dict) -> pd.DataFrame:
+    # The scorer returns the premiums, or an explanation of them as returned by `ModelBundle.explain_batch`
+    output = data[[col for col in ID_COLUMNS if col in data.columns]].copy()
+    if not isinstance(scored, dict):
+        output[PREDICTION_COLUMN] = scored
+        return output
+
+    output[PREDICTION_COLUMN] = scored["premiums"]
+    output[EXPECTED_COLUMN] = scored["expected_value"]
+    contributions = pd.DataFrame({f"{CONTRIBUTION_PREFIX}{name}": values
+                                  for name, values in scored["contributions"].items()}, index=output.index)
+    return pd.concat([output, contributions], axis=1)
+
+
+def batch_scorer(models_dir: str = MODELS_DIR, model_name: str = "ridge", bundle_dir: str | None = None,
+                 single_threaded: bool = False, explain: bool = False):
+    """
+    Loads a model once and returns a function that scores batches of raw policy records with it.
+
+    Args:
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+        bundle_dir (str, optional): Load the model from this bundle, written by `bundle.py`, instead of the joblib artifacts. Defaults to the artifacts.
+        single_threaded (bool, optional): Keep the model from starting its own threads, for callers that get a single core. Defaults to False.
+        explain (bool, optional): Also break each premium down by input. Explanations come from the bundle, which defaults to the one in `models_dir`. Defaults to False.
+
+    Returns:
+        Callable[[pd.DataFrame], np.ndarray | dict]: Predicts the premium of each record of a batch, or with `explain`, returns the premiums and their breakdown as `ModelBundle.explain_batch` does.
+    """
+    if explain:
+        bundle_dir = bundle_dir or os.path.join(models_dir, "bundle")
+    if bundle_dir:
+        bundle = ModelBundle.load(bundle_dir)
+        bundle.check_schema()
+        if explain:
+            return lambda data: bundle.explain_batch(data, model_name)
+        return lambda data: bundle.score_batch(data, model_name)
+
+    artifacts = load_artifacts(models_dir, model_name)
+    model = artifacts["model"]
+    if single_threaded and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    return lambda data: score_batch(data, artifacts)
+
+
+def _timed_batches(batches):
+    # Time reading each batch, which happens inside the iterator
+    batches = iter(batches)
+    while True:
+        with span("batch.read"):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        yield batch
+
+
+def _monitor_batch(monitor: DriftMonitor, data: pd.DataFrame, scored: np.ndarray | dict) -> None:
+    monitor.update(data, scored["premiums"] if isinstance(scored, dict) else scored)
+
+
+# Scoring function loaded once by each worker process, and the empty drift monitor it copies for each batch
+_worker_scorer = None
+_worker_monitor = None
+
+
+def _init_worker(models_dir: str, model_name: str, bundle_dir: str | None, explain: bool,
+                 monitor: DriftMonitor | None) -> None:
+    global _worker_scorer, _worker_monitor
+    # Each worker gets a single core, so keep the model and BLAS from starting their own threads
+    _worker_scorer = batch_scorer(
+        models_dir, model_name, bundle_dir, single_threaded=True, explain=explain)
+    _worker_monitor = monitor
+    threadpool_limits(limits=1)
+
+
+def _score_in_worker(data: pd.DataFrame) -> tuple[pd.DataFrame, DriftMonitor | None]:
+    scored = _worker_scorer(data)
+    # Sketch the batch here, so that only the small sketches travel back to the parent instead of the records
+    monitor = None
+    if _worker_monitor is not None:
+        monitor = DriftMonitor.like(_worker_monitor)
+        _monitor_batch(monitor, data, scored)
+    return _scored_output(data, scored), monitor
+
+
+def score_file(input_path: str, output_path: str, models_dir: str = MODELS_DIR, model_name: str = "ridge",
+               batch_size: int = 100_000, workers: int | None = None, bundle_dir: str | None = None,
+               explain: bool = False, drift_report: str | None = None, metrics_file: str | None = None) -> dict:
+    """
+    Scores a whole policy book, streaming it through the model in batches and writing the premiums out in input order.
+
+    With more than one worker, batches are scored in parallel by a pool of processes that each load the model once. At most two batches per worker are in flight, so memory use stays bounded by the batch size. Loading from a bundle starts workers faster, and they share its memory-mapped arrays.
+
+    With `drift_report`, every batch is also sketched as it is scored, in the same pass and in constant memory, and the raw inputs and premiums are compared with the baseline `train.py` saved from the training data.
+
+    Reading, scoring, drift sketching and writing are timed per batch as 'batch.*' spans, and the whole run as the 'score_file' section, which `PREMIUM_PROFILE` can profile. Worker processes keep the spans of their own batches, so with a pool the parent records reading, waiting for results and writing.
+
+    Args:
+        input_path (str): Path to a CSV, Parquet or Arrow IPC file of raw policy records.
+        output_path (str): Path to write the premiums to, as CSV, Parquet or Arrow IPC.
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+        batch_size (int, optional): Number of records per batch. Defaults to 100000.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPU cores.
+        bundle_dir (str, optional): Score with the model from this bundle instead of the joblib artifacts. Defaults to the artifacts.
+        explain (bool, optional): Also write the model's expected premium and each input's contribution to every premium, from the bundle. Defaults to False.
+        drift_report (str, optional): Write the drift of each input and of the premiums from the training baseline to this JSON file. Defaults to no drift monitoring.
+        metrics_file (str, optional): Export the recorded spans and profiles to this JSON file. Defaults to not exporting them.
+
+    Returns:
+        dict: The number of 'rows' scored, the elapsed 'seconds' and the throughput in 'rows_per_second', plus with `drift_report`, the 'drift' of each column as returned by `DriftMonitor.report`.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Parse the categorical columns as categories, which the scorers and the drift sketches read by their codes
+    batches = _timed_batches(iter_dataset(input_path, batch_size, dtype=CSV_DTYPES))
+    rows = 0
+
+    baseline = monitor = None
+    if drift_report:
+        baseline = load_baseline(models_dir, model_name)
+        monitor = DriftMonitor.like(baseline)
+
+    start = time.perf_counter()
+    with profiled("score_file"), DatasetWriter(output_path) as writer:
+        if workers == 1:
+            scorer = batch_scorer(
+                models_dir, model_name, bundle_dir, explain=explain)
+            for batch in batches:
+                with span("batch.score"):
+                    scored = scorer(batch)
+                if monitor is not None:
+                    with span("batch.drift"):
+                        _monitor_batch(monitor, batch, scored)
+                with span("batch.write"):
+                    writer.write(_scored_output(batch, scored))
+                rows += len(batch)
+        else:
+            def collect(future):
+                nonlocal rows
+                with span("batch.wait"):
+                    scored, batch_monitor = future.result()
+                if batch_monitor is not None:
+                    monitor.merge(batch_monitor)
+                with span("batch.write"):
+                    writer.write(scored)
+                rows += len(scored)
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(models_dir, model_name, bundle_dir, explain, monitor)) as executor:
+                pending = deque()
+                for batch in batches:
+                    pending.append(executor.submit(_score_in_worker, batch))
+                    if len(pending) >= 2 * workers:
+                        collect(pending.popleft())
+                while pending:
+                    collect(pending.popleft())
+
+    seconds = time.perf_counter() - start
+    stats = {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else float("inf")}
+    if monitor is not None:
+        stats["drift"] = monitor.report(baseline)
+        with open(drift_report, "w") as file:
+            json.dump({"model": model_name, "rows": rows, "columns": stats["drift"]}, file, indent=2)
+    if metrics_file:
+        RECORDER.export(metrics_file)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Predict premiums for a whole policy book with a trained model.")
+    parser.add_argument("input_path",
+                        help="CSV, Parquet or Arrow IPC file of raw policy records.")
+    parser.add_argument("output_path",
+                        help="File to write the premiums to (.csv, .parquet or .arrow).")
+    parser.add_argument("--model", default="ridge",
+                        help="Model to score with: ridge, xgboost or random_forest.")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="Directory containing the saved artifacts.")
+    parser.add_argument("--batch-size", type=int, default=100_000,
+                        help="Number of records per batch.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes. Defaults to the number of CPU cores.")
+    parser.add_argument("--bundle-dir", default=None,
+                        help="Score with the model from this bundle instead of the joblib artifacts.")
+    parser.add_argument("--explain", action="store_true",
+                        help="Also write each input's contribution to every premium.")
+    parser.add_argument("--drift-report", default=None,
+                        help="Write the drift of the inputs and premiums from the training data to this JSON file.")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Export the timing spans, and any profiles PREMIUM_PROFILE turns on, to this JSON file.")
+    args = parser.parse_args()
+
+    stats = score_file(args.input_path, args.output_path, args.models_dir, args.model, args.batch_size,
+                       args.workers, args.bundle_dir, args.explain, args.drift_report, args.metrics_file)
+    print(f"Scored {stats['rows']:,} policies in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} policies/s)")
+    for col, entry in stats.get("drift", {}).items():
+        if entry["status"] != "ok":
+            print(f"Drift {entry['status']}: {col} (PSI {entry['psi']:.3f})")
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from numbers import Number
+
+
+def quote_key(input_dictionary: dict, version) -> str:
+    """
+    Builds a canonical hash of a quote and the model version it was priced with.
+
+    Field order does not matter, and numbers hash the same whether they arrive as integers or floats, so the same applicant profile always maps to the same key.
+
+    Args:
+        input_dictionary (dict): The raw inputs of one quote.
+        version: Any representation of the model version, such as `artifacts_version`.
+
+    Returns:
+        str: A hex digest identifying the quote under this model version.
+    """
+    canonical = {
+        field: float(value) if isinstance(value, Number) else str(value)
+        for field, value in input_dictionary.items()
+    }
+    payload = json.dumps([canonical, repr(version)],
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class QuoteCache:
+    """
+    Bounded, thread-safe LRU cache of predicted premiums with a time-to-live on each entry.
+
+    Entries are keyed on `quote_key`. The whole cache is cleared as soon as it is used with a different model version, so a retrained model never serves premiums from the old one. Expiry is measured on `clock`, which defaults to `time.monotonic` and can be replaced to control time in tests.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, input_dictionary: dict, version):
+        """
+        Looks up the cached premium of a quote.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            version: The current model version.
+
+        Returns:
+            float | None: The cached premium, or None on a miss.
+        """
+        key = quote_key(input_dictionary, version)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] < self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, input_dictionary: dict, version, premium: float) -> None:
+        """
+        Stores the premium of a quote, evicting the least recently used entry when the cache is full.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            version: The model version the premium was predicted with.
+            premium (float): The predicted premium.
+        """
+        key = quote_key(input_dictionary, version)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (premium, self.clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, input_dictionary: dict, version, compute) -> float:
+        """
+        Returns the cached premium of a quote, computing and caching it on a miss.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            version: The current model version.
+            compute (callable): Called with no arguments to predict the premium on a miss.
+
+        Returns:
+            float: The premium.
+        """
+        premium = self.get(input_dictionary, version)
+        if premium is None:
+            premium = compute()
+            self.put(input_dictionary, version, premium)
+        return premium
+
+    def stats(self) -> dict:
+        """
+        Reports the cache size, hits, misses, hit rate, LRU evictions, TTL expirations and version invalidations.
+
+        Returns:
+            dict: The cache statistics.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,417 @@
+import argparse
+import bisect
+import functools
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import CREDIT_SCORE_BINS  # noqa: E402
+from src.modeling.bundle import BUNDLE_DIR, ModelBundle  # noqa: E402
+from src.modeling.sensitivity import (SWEEP_RANGES, score_columns,  # noqa: E402
+                                      sweep_inputs)
+
+# Default location of the rating table, next to the bundle it was priced with
+RATING_TABLE_DIR = os.path.join(project_root, "models", "rating_table")
+METADATA_FILE = "rating_table.json"
+
+# Version of the table layout; readers refuse tables of any other version
+FORMAT_VERSION = 1
+
+# Edges of the banded inputs, each band covering [edge, next edge) and priced at its midpoint. Credit scores are
+# banded as `categorise_credit_score` bands them.
+BAND_EDGES = {
+    "Age": [18, 21, 25, 30, 35, 40, 50, 60, 70, 101],
+    "Credit_Score": [300, *CREDIT_SCORE_BINS, 851],
+    "Car_Value": list(range(50_000, 1_550_001, 50_000)),
+}
+
+# The applicant every cell is priced for, apart from the inputs the table is indexed by. Years_Driving is capped at
+# Age - 18 in the young age bands.
+STANDARD_PROFILE = {
+    "Gender": "Female",
+    "Marital_Status": "Married",
+    "Employment_Status": "Employed",
+    "Education_Level": "Degree",
+    "Years_Driving": 10,
+    "Manufacture_Year": 2015,
+    "Annual_Mileage": 15_000,
+    "Number_of_Accidents": 0,
+    "Number_of_Claims": 0,
+    "Has_AntiTheft_Device": 1,
+}
+
+
+def band_values(edges: list[int]) -> list[int]:
+    """
+    Lists the whole-number midpoint of each band, at which the band is priced.
+
+    Args:
+        edges (list[int]): The band edges, each band covering [edge, next edge).
+
+    Returns:
+        list[int]: The midpoint of each band.
+    """
+    return [(low + high - 1) // 2 for low, high in zip(edges[:-1], edges[1:])]
+
+
+def table_axes(profile: dict = STANDARD_PROFILE) -> dict:
+    """
+    Lays out the rating table's axes: each car and region gets a block, and each block spans every vehicle usage, policy term and band of age, credit score and car value.
+
+    Args:
+        profile (dict, optional): The standard applicant. Defaults to `STANDARD_PROFILE`.
+
+    Returns:
+        dict: The 'cars' as [make, model] pairs, the 'regions', the 'inner' axes of each block with the values they are priced at, the 'bands' edges and the 'years_driving' of each age band.
+    """
+    from src.dataset import car_makes_models
+    from src.schema import CATEGORIES
+
+    inner = {
+        "Vehicle_Usage": CATEGORIES["Vehicle_Usage"],
+        "Policy_Term": SWEEP_RANGES["Policy_Term"],
+        **{feature: band_values(edges) for feature, edges in BAND_EDGES.items()},
+    }
+    return {
+        "cars": [[make, model] for make in sorted(car_makes_models) for model in sorted(car_makes_models[make])],
+        "regions": CATEGORIES["Region"],
+        "inner": inner,
+        "bands": BAND_EDGES,
+        "years_driving": [min(profile["Years_Driving"], age - 18) for age in inner["Age"]],
+    }
+
+
+def _block_key(block_index: int) -> str:
+    return f"block_{block_index:05d}"
+
+
+def price_block(bundle: ModelBundle, axes: dict, profile: dict, block_index: int,
+                model_name: str = "ridge") -> np.ndarray:
+    """
+    Prices every cell of one car and region in a single batched prediction.
+
+    Args:
+        bundle (ModelBundle): The model bundle to price with.
+        axes (dict): The table's axes, as returned by `table_axes`.
+        profile (dict): The standard applicant.
+        block_index (int): Index of the block, car-major.
+        model_name (str, optional): Name of the model to price with. Defaults to 'ridge'.
+
+    Returns:
+        np.ndarray: Monthly premiums in cents, of shape of the inner axes, stored as differences along the last axis.
+    """
+    car_index, region_index = divmod(block_index, len(axes["regions"]))
+    make, model = axes["cars"][car_index]
+    quote = {**profile, "Car_Make": make, "Car_Model": model,
+             "Region": axes["regions"][region_index]}
+
+    columns = sweep_inputs(quote, {col: np.asarray(values) for col, values in axes["inner"].items()})
+    columns["Years_Driving"] = np.minimum(profile["Years_Driving"], columns["Age"] - 18)
+    premiums = score_columns(bundle, columns, model_name)
+
+    # Premiums change smoothly with car value, so differences along it are small and compress well
+    cents = np.round(premiums * 100).astype(np.int64).reshape(
+        [len(values) for values in axes["inner"].values()])
+    return np.diff(cents, axis=-1, prepend=0).astype(np.int32)
+
+
+# Bundle, axes, profile and model loaded once by each worker process
+_worker_state = None
+
+
+def _init_worker(bundle_dir: str, axes: dict, profile: dict, model_name: str) -> None:
+    global _worker_state
+    _worker_state = (ModelBundle.load(bundle_dir), axes, profile, model_name)
+
+
+def _price_block_in_worker(block_index: int) -> np.ndarray:
+    bundle, axes, profile, model_name = _worker_state
+    return price_block(bundle, axes, profile, block_index, model_name)
+
+
+def _write_block(archive: zipfile.ZipFile, digest, block_index: int, block: np.ndarray) -> None:
+    with archive.open(f"{_block_key(block_index)}.npy", "w") as file:
+        np.lib.format.write_array(file, block)
+    digest.update(block.tobytes())
+
+
+def generate_rating_table(bundle_dir: str = BUNDLE_DIR, output_dir: str = RATING_TABLE_DIR,
+                          model_name: str = "ridge", workers: int | None = None,
+                          profile: dict = STANDARD_PROFILE) -> dict:
+    """
+    Prices the full grid of cars, regions, vehicle usages, policy terms and age, credit score and car value bands for a standard applicant, and writes it as a compressed rating table.
+
+    The grid is never built whole: each car and region is a block, priced in one batched prediction by a pool of worker processes that each load the bundle once, and written out as soon as it is priced. At most two blocks per worker are in flight. The blocks are stored as separately compressed members of a '.npz' archive, so a reader only decompresses the block a quote falls in. The metadata is written last and names the archive, so a reader never sees a half-written table.
+
+    Args:
+        bundle_dir (str, optional): Directory of the model bundle to price with. Defaults to 'models/bundle'.
+        output_dir (str, optional): Directory to write the table to. Defaults to 'models/rating_table'.
+        model_name (str, optional): Name of the model to price with. Defaults to 'ridge'.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPU cores.
+        profile (dict, optional): The standard applicant. Defaults to `STANDARD_PROFILE`.
+
+    Returns:
+        dict: The written metadata.
+    """
+    workers = workers or os.cpu_count() or 1
+    bundle = ModelBundle.load(bundle_dir)
+    axes = table_axes(profile)
+    n_blocks = len(axes["cars"]) * len(axes["regions"])
+
+    os.makedirs(output_dir, exist_ok=True)
+    archive_path = os.path.join(output_dir, "premiums.npz.tmp")
+    digest = hashlib.blake2b(json.dumps([axes, profile, bundle.version, model_name]).encode(), digest_size=8)
+
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if workers == 1:
+            for block_index in range(n_blocks):
+                _write_block(archive, digest, block_index,
+                             price_block(bundle, axes, profile, block_index, model_name))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(bundle_dir, axes, profile, model_name)) as executor:
+                pending = deque()
+                for block_index in range(n_blocks):
+                    pending.append((block_index, executor.submit(_price_block_in_worker, block_index)))
+                    if len(pending) >= 2 * workers:
+                        index, future = pending.popleft()
+                        _write_block(archive, digest, index, future.result())
+                while pending:
+                    index, future = pending.popleft()
+                    _write_block(archive, digest, index, future.result())
+
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "model": model_name,
+        "bundle_version": bundle.version,
+        "profile": profile,
+        **axes,
+        "n_cells": n_blocks * int(np.prod([len(values) for values in axes["inner"].values()])),
+        "version": digest.hexdigest(),
+        "created": datetime.now(timezone.utc).isoformat(),
+    }
+    metadata["premiums_file"] = f"premiums-{metadata['version']}.npz"
+    os.replace(archive_path, os.path.join(output_dir, metadata["premiums_file"]))
+
+    metadata_path = os.path.join(output_dir, METADATA_FILE)
+    with open(f"{metadata_path}.tmp", "w") as file:
+        json.dump(metadata, file, indent=2)
+    os.replace(f"{metadata_path}.tmp", metadata_path)
+
+    for file_name in os.listdir(output_dir):
+        if file_name.startswith("premiums-") and file_name != metadata["premiums_file"]:
+            os.remove(os.path.join(output_dir, file_name))
+    return metadata
+
+
+class RatingTable:
+    """
+    Looks up precomputed premiums of standard applicants in a table written by `generate_rating_table`, without loading any model.
+
+    A quote's cell is found with a dictionary lookup per categorical input and a bisection of a handful of band edges per banded input, and its block is decompressed on first use and then kept.
+
+    Attributes:
+        metadata (dict): The table's metadata: the model and bundle version it was priced with, the standard profile, the axes and the bands.
+    """
+
+    def __init__(self, metadata: dict, premiums):
+        if metadata["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported rating table format {metadata['format_version']}; expected {FORMAT_VERSION}")
+        self.metadata = metadata
+        self._premiums = premiums
+        self._cars = {tuple(car): i for i, car in enumerate(metadata["cars"])}
+        self._regions = {region: i for i, region in enumerate(metadata["regions"])}
+        self._categories = {col: {value: i for i, value in enumerate(values)}
+                            for col, values in metadata["inner"].items() if col not in metadata["bands"]}
+        self._profile = {col: value for col, value in metadata["profile"].items() if col != "Years_Driving"}
+        self._block = functools.lru_cache(maxsize=None)(self._read_block)
+
+    @classmethod
+    def load(cls, table_dir: str = RATING_TABLE_DIR) -> "RatingTable":
+        """
+        Loads a rating table. Its blocks are read from the archive only when a quote first needs them.
+
+        Args:
+            table_dir (str, optional): Directory of the table. Defaults to 'models/rating_table'.
+
+        Returns:
+            RatingTable: The loaded table.
+        """
+        with open(os.path.join(table_dir, METADATA_FILE)) as file:
+            metadata = json.load(file)
+        return cls(metadata, np.load(os.path.join(table_dir, metadata["premiums_file"])))
+
+    @property
+    def version(self) -> str:
+        """
+        The content version of the table.
+        """
+        return self.metadata["version"]
+
+    def _read_block(self, block_index: int) -> np.ndarray:
+        # Premiums in cents, undoing the differences along the last axis
+        return np.cumsum(self._premiums[_block_key(block_index)], axis=-1, dtype=np.int64)
+
+    def cell(self, input_dictionary: dict) -> tuple[int, tuple] | None:
+        """
+        Finds the cell a quote falls in.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+
+        Returns:
+            tuple[int, tuple] | None: The block index and the position within the block, or None if the quote is not a standard applicant or falls outside the table.
+        """
+        if any(input_dictionary.get(col) != value for col, value in self._profile.items()):
+            return None
+
+        car = self._cars.get((input_dictionary.get("Car_Make"), input_dictionary.get("Car_Model")))
+        region = self._regions.get(input_dictionary.get("Region"))
+        if car is None or region is None:
+            return None
+
+        position = []
+        for col in self.metadata["inner"]:
+            if col in self.metadata["bands"]:
+                edges = self.metadata["bands"][col]
+                index = bisect.bisect_right(edges, input_dictionary[col]) - 1
+                if not 0 <= index < len(edges) - 1:
+                    return None
+            else:
+                index = self._categories[col].get(input_dictionary.get(col))
+                if index is None:
+                    return None
+            position.append(index)
+
+        # Young applicants are priced with as many years of driving as their age band allows
+        age_band = position[list(self.metadata["inner"]).index("Age")]
+        if input_dictionary.get("Years_Driving") != self.metadata["years_driving"][age_band]:
+            return None
+        return car * len(self._regions) + region, tuple(position)
+
+    def lookup(self, input_dictionary: dict) -> float | None:
+        """
+        Looks up the premium of a quote.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+
+        Returns:
+            float | None: The monthly premium of the quote's cell, or None if the table does not cover the quote.
+        """
+        cell = self.cell(input_dictionary)
+        if cell is None:
+            return None
+        block_index, position = cell
+        return int(self._block(block_index)[position]) / 100
+
+    def priced_inputs(self, input_dictionary: dict) -> dict | None:
+        """
+        Gives the inputs a quote's cell was priced with: the quote's own, with each banded input moved to its band's midpoint.
+
+        Explaining or shadow-scoring these inputs rather than the quote's reproduces the premium `lookup` returns.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+
+        Returns:
+            dict | None: The priced inputs, or None if the table does not cover the quote.
+        """
+        cell = self.cell(input_dictionary)
+        if cell is None:
+            return None
+        priced = dict(input_dictionary)
+        for col, index in zip(self.metadata["inner"], cell[1]):
+            if col in self.metadata["bands"]:
+                priced[col] = self.metadata["inner"][col][index]
+        return priced
+
+
+def check_table(table_dir: str = RATING_TABLE_DIR, bundle_dir: str = BUNDLE_DIR, n_samples: int = 2000,
+                seed: int = 0) -> dict:
+    """
+    Compares random cells of a rating table with the model's premium for the quote each cell is priced at, and times lookups.
+
+    Args:
+        table_dir (str, optional): Directory of the table. Defaults to 'models/rating_table'.
+        bundle_dir (str, optional): Directory of the bundle it was priced with. Defaults to 'models/bundle'.
+        n_samples (int, optional): Number of cells to compare. Defaults to 2000.
+        seed (int, optional): Seed of the sampled cells. Defaults to 0.
+
+    Returns:
+        dict: The largest absolute difference in rand, 'max_abs_difference', and the median 'lookup_us' and 'model_us' per quote.
+    """
+    table = RatingTable.load(table_dir)
+    bundle = ModelBundle.load(bundle_dir)
+    metadata = table.metadata
+    rng = np.random.default_rng(seed)
+
+    quotes = []
+    for _ in range(n_samples):
+        make, model = metadata["cars"][rng.integers(len(metadata["cars"]))]
+        quote = {**metadata["profile"], "Car_Make": make, "Car_Model": model,
+                 "Region": metadata["regions"][rng.integers(len(metadata["regions"]))]}
+        for col, values in metadata["inner"].items():
+            quote[col] = values[rng.integers(len(values))]
+        quote["Years_Driving"] = min(metadata["profile"]["Years_Driving"], quote["Age"] - 18)
+        quotes.append(quote)
+
+    differences, lookup_times, model_times = [], [], []
+    for quote in quotes:
+        start = time.perf_counter()
+        premium = table.lookup(quote)
+        lookup_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        expected = bundle.score_quote(quote, metadata["model"])
+        model_times.append(time.perf_counter() - start)
+        differences.append(abs(premium - expected))
+
+    return {
+        "max_abs_difference": float(max(differences)),
+        "lookup_us": float(np.median(lookup_times) * 1e6),
+        "model_us": float(np.median(model_times) * 1e6),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Price every car, region, usage, term and age, credit score and car value band into a rating table.")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR,
+                        help="Directory of the model bundle to price with.")
+    parser.add_argument("--output-dir", default=RATING_TABLE_DIR,
+                        help="Directory to write the rating table to.")
+    parser.add_argument("--model", default="ridge",
+                        help="Model to price with: ridge, xgboost or random_forest.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes. Defaults to the number of CPU cores.")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare sampled cells with the model and time lookups.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    metadata = generate_rating_table(args.bundle_dir, args.output_dir, args.model, args.workers)
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(os.path.join(args.output_dir, metadata["premiums_file"]))
+    print(f"Priced {metadata['n_cells']:,} cells with {args.model} in {seconds:.2f}s "
+          f"({metadata['n_cells'] / seconds:,.0f} cells/s); {size / 1e6:.1f} MB, "
+          f"{size / metadata['n_cells']:.2f} bytes per cell")
+
+    if args.check:
+        result = check_table(args.output_dir, args.bundle_dir)
+        print(f"Largest difference from the model R{result['max_abs_difference']:.4f}; lookup "
+              f"{result['lookup_us']:.1f} µs vs model {result['model_us']:.1f} µs per quote")
@@ -0,0 +1,362 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.instrumentation import span  # noqa: E402
+from src.modeling.bundle import BUNDLE_DIR, ModelBundle  # noqa: E402
+from src.modeling.linear_scorer import LinearScorer  # noqa: E402
+from src.modeling.quote_cache import quote_key  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Default file the paired primary and challenger predictions are appended to, one JSON record per quote, identified by
+# its `quote_key` hash rather than the applicant's inputs
+SHADOW_LOG_FILE = os.path.join(project_root, "metrics", "shadow_predictions.jsonl")
+
+# Environment variables that configure the registry of the Streamlit app, which may be set in its '.env' file: the
+# primary model, the challengers to shadow-score, separated by commas, and the share of quotes routed to each
+# challenger instead of the primary, e.g. 'xgboost=0.1'
+PRIMARY_ENV_VAR = "PREMIUM_PRIMARY_MODEL"
+CHALLENGERS_ENV_VAR = "PREMIUM_CHALLENGERS"
+SPLIT_ENV_VAR = "PREMIUM_AB_SPLIT"
+
+# Test metric the default primary model is chosen by; lower is better
+SELECTION_METRIC = "RMSE_Test"
+
+# Most quotes waiting to be shadow-scored; quotes beyond it are not shadowed, so a slow challenger never builds up a
+# backlog
+MAX_PENDING_SHADOWS = 1000
+
+
+def best_model(bundle: ModelBundle, metric: str = SELECTION_METRIC) -> str:
+    """
+    Picks the model of a bundle with the lowest test error recorded by `train.py`.
+
+    Args:
+        bundle (ModelBundle): The loaded bundle.
+        metric (str, optional): Column of 'model_metrics.csv' to compare, lower being better. Defaults to 'RMSE_Test'.
+
+    Returns:
+        str: Name of the best model, or 'ridge' when no model has the metric.
+    """
+    scored = {name: entry["metrics"][metric] for name, entry in bundle.manifest["models"].items()
+              if metric in entry.get("metrics", {})}
+    return min(scored, key=scored.get) if scored else "ridge"
+
+
+class ModelRegistry:
+    """
+    Serves quotes from every model of one bundle version, routing each quote to a model and shadow-scoring it with challenger models in the background.
+
+    All models are loaded once from the bundle and share its encoder and scaler, so a quote is encoded at most once however many models score it. Routing is deterministic: a quote's hash under the bundle version decides whether it goes to the primary model or, for the share of traffic in `split`, to a challenger, so the same profile always gets the same premium. After the routed model has priced a quote, the remaining challengers score the same encoded input in a thread pool and the paired predictions are appended to a JSON Lines log, leaving the response time unchanged. Quotes answered without the routed model, from a cache or a rating table, are handed to `shadow` so that every routed quote is compared, not only the ones that missed the cache.
+
+    Attributes:
+        bundle (ModelBundle): The loaded bundle.
+        version (str): The bundle's content version, logged with every prediction.
+        primary (str): The model quotes are routed to by default.
+        challengers (list[str]): The models every quote is shadow-scored with, besides the one it was routed to.
+        split (dict[str, float]): Share of quotes routed to each challenger instead of the primary.
+        log_path (str | None): File the paired predictions are appended to, or None to keep only the counts.
+    """
+
+    def __init__(self, bundle: ModelBundle, primary: str | None = None, challengers: list[str] | None = None,
+                 split: dict[str, float] | None = None, log_path: str | None = SHADOW_LOG_FILE,
+                 shadow_workers: int = 1, max_pending: int = MAX_PENDING_SHADOWS):
+        self.bundle = bundle
+        self.version = bundle.version
+        self.primary = primary or best_model(bundle)
+        self.split = dict(split or {})
+        self.challengers = list(dict.fromkeys(list(challengers or []) + list(self.split)))
+        if self.primary in self.challengers:
+            self.challengers.remove(self.primary)
+
+        unknown = [name for name in [self.primary, *self.challengers] if name not in bundle.models]
+        if unknown:
+            raise ValueError(f"Unknown models {unknown}; the bundle has {list(bundle.models)}")
+        if sum(self.split.values()) > 1 or any(share < 0 for share in self.split.values()):
+            raise ValueError(f"Traffic shares must be non-negative and add up to at most 1, got {self.split}")
+
+        # Upper bound of each model's slice of the unit interval quote hashes fall in, the primary taking the rest
+        self._routes = []
+        bound = 0.0
+        for name, share in self.split.items():
+            bound += share
+            self._routes.append((bound, name))
+
+        self.log_path = log_path
+        if log_path and self.challengers:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        self.max_pending = max_pending
+        self.counts = {"routed": dict.fromkeys([self.primary, *self.challengers], 0),
+                       "shadowed": 0, "dropped": 0, "failed": 0}
+        self.last_error = None
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=shadow_workers, thread_name_prefix="shadow") \
+            if self.challengers else None
+
+    @classmethod
+    def load(cls, bundle_dir: str = BUNDLE_DIR, **kwargs) -> "ModelRegistry":
+        """
+        Loads a bundle and builds a registry over its models.
+
+        Args:
+            bundle_dir (str, optional): Directory of the bundle. Defaults to 'models/bundle'.
+            **kwargs: Passed on to `ModelRegistry`.
+
+        Returns:
+            ModelRegistry: The registry.
+        """
+        return cls(ModelBundle.load(bundle_dir), **kwargs)
+
+    @classmethod
+    def from_env(cls, bundle: ModelBundle, **kwargs) -> "ModelRegistry":
+        """
+        Builds a registry configured by `PREMIUM_PRIMARY_MODEL`, `PREMIUM_CHALLENGERS` and `PREMIUM_AB_SPLIT`, shadowing nothing when they are unset.
+
+        Args:
+            bundle (ModelBundle): The loaded bundle.
+            **kwargs: Passed on to `ModelRegistry`.
+
+        Returns:
+            ModelRegistry: The registry.
+        """
+        challengers = [name.strip() for name in os.environ.get(CHALLENGERS_ENV_VAR, "").split(",") if name.strip()]
+        split = {}
+        for item in os.environ.get(SPLIT_ENV_VAR, "").split(","):
+            if item.strip():
+                name, share = item.split("=")
+                split[name.strip()] = float(share)
+        return cls(bundle, os.environ.get(PRIMARY_ENV_VAR) or None, challengers, split, **kwargs)
+
+    def route(self, input_dictionary: dict) -> str:
+        """
+        Picks the model a quote is priced with.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+
+        Returns:
+            str: The model's name.
+        """
+        if not self._routes:
+            return self.primary
+        position = int(quote_key(input_dictionary, self.version)[:8], 16) / 16 ** 8
+        for bound, name in self._routes:
+            if position < bound:
+                return name
+        return self.primary
+
+    def score_quote(self, input_dictionary: dict, model_name: str | None = None) -> float:
+        """
+        Prices a quote with the model it is routed to, then hands it to the challengers to shadow-score in the background.
+
+        Args:
+            input_dictionary (dict): The raw inputs of one quote.
+            model_name (str, optional): The model to price with, as returned by `route`. Defaults to routing the quote.
+
+        Returns:
+            float: The predicted monthly premium.
+        """
+        model_name = model_name or self.route(input_dictionary)
+        model = self.bundle.models[model_name]
+        features = None
+        if isinstance(model, LinearScorer):
+            with span("predict"):
+                premium = model.score_quote(input_dictionary)
+        else:
+            features = self.bundle.features(input_dictionary)
+            with span("predict"):
+                premium = float(model.predict(features)[0])
+
+        self._submit_shadow(input_dictionary, model_name, premium, features)
+        return premium
+
+    def shadow(self, input_dictionary: dict, model_name: str, premium: float) -> None:
+        """
+        Hands a quote that was priced without `score_quote`, such as a quote cache or rating table hit, to the challengers to shadow-score in the background.
+
+        Args:
+            input_dictionary (dict): The inputs the premium was priced from.
+            model_name (str): The model the quote was routed to, as returned by `route`.
+            premium (float): The premium served.
+        """
+        self._submit_shadow(input_dictionary, model_name, premium, None)
+
+    def _submit_shadow(self, input_dictionary: dict, model_name: str, premium: float,
+                       features: np.ndarray | None) -> None:
+        with self._lock:
+            self.counts["routed"][model_name] += 1
+            # Once closed, quotes are still priced but no longer shadowed; submitting under the lock keeps `close`
+            # from shutting the pool down between the check and the submit
+            if self._executor is None or self._closed:
+                return
+            if self._pending >= self.max_pending:
+                self.counts["dropped"] += 1
+                return
+            self._pending += 1
+            self._executor.submit(self._shadow, dict(input_dictionary), model_name, premium, features)
+
+    def _shadow(self, input_dictionary: dict, model_name: str, premium: float, features: np.ndarray | None) -> None:
+        # Runs in the thread pool; the encoded features are shared with the routed model, or computed here once for
+        # all the tree ensembles when the quote was priced from the Ridge coefficient table
+        start = time.perf_counter()
+        try:
+            predictions = {}
+            for name in [self.primary, *self.challengers]:
+                if name == model_name:
+                    continue
+                with span(f"shadow.{name}"):
+                    model = self.bundle.models[name]
+                    if isinstance(model, LinearScorer):
+                        predictions[name] = model.score_quote(input_dictionary)
+                    else:
+                        if features is None:
+                            features = self.bundle.features(input_dictionary)
+                        predictions[name] = float(model.predict(features)[0])
+
+            if self.log_path:
+                record = {"logged_at": datetime.now(timezone.utc).isoformat(), "version": self.version,
+                          "quote": quote_key(input_dictionary, self.version), "model": model_name, "premium": premium, "challengers": predictions,
+                          "shadow_ms": (time.perf_counter() - start) * 1000}
+                line = json.dumps(record, separators=(",", ":")) + "\n"
+                with self._lock:
+                    with open(self.log_path, "a") as file:
+                        file.write(line)
+            with self._lock:
+                self.counts["shadowed"] += 1
+        except Exception as error:
+            with self._lock:
+                self.counts["failed"] += 1
+                failures = self.counts["failed"]
+                self.last_error = f"{type(error).__name__}: {error}"
+            logger.exception("Shadow scoring failed (%d failures so far): %s", failures, self.last_error)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        """
+        Reports how many quotes went to each model and how many were shadow-scored, dropped because the backlog was full, or failed.
+
+        Returns:
+            dict: The counts, the number of quotes still 'pending' and the 'last_error' of a failed shadow, if any.
+        """
+        with self._lock:
+            return {**self.counts, "routed": dict(self.counts["routed"]), "pending": self._pending,
+                    "last_error": self.last_error}
+
+    def close(self) -> None:
+        """
+        Waits for the quotes still being shadow-scored and stops the thread pool. Quotes scored afterwards are still priced, without shadowing.
+        """
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def compare_predictions(log_path: str = SHADOW_LOG_FILE, version: str | None = None) -> list[dict]:
+    """
+    Summarises how far each challenger's premiums were from the served ones in a shadow log.
+
+    Args:
+        log_path (str, optional): The log written by `ModelRegistry`. Defaults to 'metrics/shadow_predictions.jsonl'.
+        version (str, optional): Only compare quotes priced with this bundle version. Defaults to all of them.
+
+    Returns:
+        list[dict]: For each pair of served 'model' and 'challenger', the number of 'quotes', the 'mean_difference' (challenger minus served), the 'mean_absolute_difference', the 'max_absolute_difference' and the 'mean_relative_difference' as a share of the served premium.
+    """
+    pairs = {}
+    with open(log_path) as file:
+        for line in file:
+            record = json.loads(line)
+            if version is not None and record["version"] != version:
+                continue
+            for challenger, premium in record["challengers"].items():
+                pairs.setdefault((record["model"], challenger), []).append((record["premium"], premium))
+
+    comparison = []
+    for (model_name, challenger), premiums in sorted(pairs.items()):
+        served, shadowed = np.asarray(premiums).T
+        difference = shadowed - served
+        comparison.append({
+            "model": model_name,
+            "challenger": challenger,
+            "quotes": len(difference),
+            "mean_difference": float(difference.mean()),
+            "mean_absolute_difference": float(np.abs(difference).mean()),
+            "max_absolute_difference": float(np.abs(difference).max()),
+            "mean_relative_difference": float((np.abs(difference) / np.abs(served)).mean()),
+        })
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Price synthetic quotes through the model registry with shadow scoring, and compare the logged "
+                    "challenger premiums with the served ones.")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR,
+                        help="Directory of the model bundle.")
+    parser.add_argument("--primary", default=None,
+                        help="Model quotes are routed to. Defaults to the one with the lowest test RMSE.")
+    parser.add_argument("--challengers", nargs="*", default=None,
+                        help="Models to shadow-score every quote with. Defaults to all other models.")
+    parser.add_argument("--split", nargs="*", default=[],
+                        help="Share of quotes routed to a challenger, as 'model=share', e.g. 'xgboost=0.1'.")
+    parser.add_argument("--quotes", type=int, default=1000,
+                        help="Number of synthetic quotes to price; 0 only compares what is already logged.")
+    parser.add_argument("--log", default=SHADOW_LOG_FILE,
+                        help="Shadow log to append the paired predictions to and compare.")
+    args = parser.parse_args()
+
+    if args.quotes:
+        from src.credit import add_credit_category
+        from src.dataset import generate_policies
+
+        bundle = ModelBundle.load(args.bundle_dir)
+        split = {name: float(share) for name, share in (item.split("=") for item in args.split)}
+        challengers = args.challengers if args.challengers is not None else list(bundle.models)
+        registry = ModelRegistry(bundle, args.primary, challengers, split, args.log)
+
+        records = generate_policies(args.quotes).drop(columns=["Premium_Amount"])
+        quotes = [add_credit_category({col: value.item() if hasattr(value, "item") else value
+                                       for col, value in row.items()})
+                  for row in records.to_dict("records")]
+
+        # Time the response of each quote, which should be no slower than scoring with the routed model alone
+        plain, served = np.empty(len(quotes)), np.empty(len(quotes))
+        for i, quote in enumerate(quotes):
+            model_name = registry.route(quote)
+            start = time.perf_counter()
+            bundle.score_quote(quote, model_name)
+            plain[i] = time.perf_counter() - start
+            start = time.perf_counter()
+            registry.score_quote(quote, model_name)
+            served[i] = time.perf_counter() - start
+        registry.close()
+
+        print(f"Primary {registry.primary}, challengers {registry.challengers}, split {registry.split or 'none'}")
+        print(f"Quote p50 {np.median(plain) * 1e6:.1f} us without shadowing, "
+              f"{np.median(served) * 1e6:.1f} us with it")
+        print(json.dumps(registry.stats()))
+
+    for row in compare_predictions(args.log):
+        print(f"{row['model']:<14} vs {row['challenger']:<14} {row['quotes']:>7,} quotes  "
+              f"mean diff {row['mean_difference']:+9.2f}  mean abs diff {row['mean_absolute_difference']:8.2f}  "
+              f"max abs diff {row['max_absolute_difference']:8.2f}  ({row['mean_relative_difference']:.2%})")
@@ -0,0 +1,141 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.modeling.bundle import BUNDLE_DIR, ModelBundle  # noqa: E402
+from src.modeling.linear_scorer import LinearScorer  # noqa: E402
+
+# Inputs a quote can be swept over, with the range of values they take in the policy book or their allowed values
+SWEEP_RANGES = {
+    "Car_Value": (50_000, 1_500_000),
+    "Credit_Score": (300, 850),
+    "Years_Driving": (0, None),
+    "Policy_Term": [6, 12, 24],
+}
+
+
+def sweep_values(feature: str, input_dictionary: dict, n_points: int = 50) -> np.ndarray:
+    """
+    Lists the values an input is swept over, evenly spaced across its range and rounded to whole numbers.
+
+    Args:
+        feature (str): The input to sweep, one of the keys of `SWEEP_RANGES`.
+        input_dictionary (dict): The raw inputs of the quote, which bound 'Years_Driving' by the applicant's 'Age'.
+        n_points (int, optional): Maximum number of values; integer ranges narrower than this give fewer. Defaults to 50.
+
+    Returns:
+        np.ndarray: The distinct values to score, in increasing order.
+    """
+    value_range = SWEEP_RANGES[feature]
+    if isinstance(value_range, list):
+        return np.asarray(value_range)
+
+    low, high = value_range
+    if feature == "Years_Driving":
+        # Nobody can have been driving for longer than since they turned 18
+        high = max(input_dictionary["Age"] - 18, low)
+    return np.unique(np.linspace(low, high, n_points).round().astype(np.int64))
+
+
+def sweep_inputs(input_dictionary: dict, axes: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Builds every combination of the swept values as columns of raw inputs, holding the quote's other inputs fixed.
+
+    Args:
+        input_dictionary (dict): The raw inputs of the quote.
+        axes (dict[str, np.ndarray]): The values of each swept input.
+
+    Returns:
+        dict[str, np.ndarray]: One array per raw input, with a row per combination and the first axis varying slowest.
+    """
+    grids = np.meshgrid(*axes.values(), indexing="ij")
+    n_rows = grids[0].size
+
+    columns = {col: np.full(n_rows, value) for col, value in input_dictionary.items() if col not in axes}
+
+    # The credit category follows the swept credit score, so let the scorer derive it again for each row
+    if "Credit_Score" in axes:
+        columns.pop("Credit_Category", None)
+
+    for feature, grid in zip(axes, grids):
+        columns[feature] = grid.ravel()
+    return columns
+
+
+def score_columns(bundle: ModelBundle, columns: dict[str, np.ndarray], model_name: str = "ridge") -> np.ndarray:
+    """
+    Scores columns of raw inputs, such as those built by `sweep_inputs`, in one batched prediction.
+
+    Args:
+        bundle (ModelBundle): The model bundle to score with.
+        columns (dict[str, np.ndarray]): One array per raw input.
+        model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+    Returns:
+        np.ndarray: The monthly premium of each row.
+    """
+    if not isinstance(bundle.models[model_name], LinearScorer):
+        # The tree ensembles encode through the feature encoder, which takes a DataFrame for batches
+        import pandas as pd
+
+        columns = pd.DataFrame(columns)
+    return bundle.score_batch(columns, model_name)
+
+
+def sensitivity(bundle: ModelBundle, input_dictionary: dict, axes: dict[str, np.ndarray],
+                model_name: str = "ridge") -> np.ndarray:
+    """
+    Prices a quote at every combination of the swept values in one batched prediction.
+
+    Args:
+        bundle (ModelBundle): The model bundle to score with.
+        input_dictionary (dict): The raw inputs of the quote, such as the prediction page's input dictionary.
+        axes (dict[str, np.ndarray]): The values of each swept input, as returned by `sweep_values`.
+        model_name (str, optional): Name of the model to score with. Defaults to 'ridge'.
+
+    Returns:
+        np.ndarray: The monthly premiums, with one dimension per swept input in the order of `axes`.
+    """
+    premiums = score_columns(bundle, sweep_inputs(input_dictionary, axes), model_name)
+    return premiums.reshape([len(values) for values in axes.values()])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time a premium sensitivity sweep of a synthetic quote over one or two inputs.")
+    parser.add_argument("--feature", action="append", choices=list(SWEEP_RANGES),
+                        help="Input to sweep; repeat for a 2D sweep. Defaults to Car_Value and Credit_Score.")
+    parser.add_argument("--points", type=int, default=1000,
+                        help="Total number of points in the sweep, split evenly across the swept inputs.")
+    parser.add_argument("--model", default="ridge",
+                        help="Name of the model to score with, e.g. 'ridge', 'xgboost' or 'random_forest'.")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR,
+                        help="Directory of the model bundle.")
+    args = parser.parse_args()
+
+    from src.credit import add_credit_category
+    from src.dataset import generate_policies
+
+    quote = add_credit_category({col: value.item() if hasattr(value, "item") else value
+                                 for col, value in generate_policies(1).iloc[0].items()})
+
+    bundle = ModelBundle.load(args.bundle_dir)
+    features = args.feature or ["Car_Value", "Credit_Score"]
+    points_per_feature = int(round(args.points ** (1 / len(features))))
+
+    start = time.perf_counter()
+    axes = {feature: sweep_values(feature, quote, points_per_feature) for feature in features}
+    premiums = sensitivity(bundle, quote, axes, args.model)
+    seconds = time.perf_counter() - start
+
+    print(f"Swept {' x '.join(str(len(values)) for values in axes.values())} = {premiums.size:,} points "
+          f"with {args.model} in {seconds * 1000:.1f} ms; premiums R{premiums.min():,.2f} to R{premiums.max():,.2f}")
@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import add_credit_category  # noqa: E402
+from src.modeling.predict import (MODELS_DIR, artifacts_version,  # noqa: E402
+                                  load_artifacts, score_batch)
+from src.modeling.quote_cache import QuoteCache  # noqa: E402
+
+
+class MicroBatcher:
+    """
+    Groups single quotes that arrive close together into one vectorised `predict` call.
+
+    A background thread waits for the first queued quote, then keeps collecting quotes until `max_batch_size` is reached or `max_wait_ms` has passed, and scores them all at once.
+    """
+
+    def __init__(self, artifacts: dict, max_batch_size: int = 256, max_wait_ms: float = 5.0):
+        self.artifacts = artifacts
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.quotes = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict) -> Future:
+        """
+        Queues one quote for scoring.
+
+        Args:
+            record (dict): A validated input dictionary.
+
+        Returns:
+            Future: Resolves to the predicted premium.
+        """
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            records, futures = zip(*batch)
+            try:
+                premiums = score_batch(pd.DataFrame(records), self.artifacts).tolist()
+            except Exception:
+                # Score the quotes one at a time, so that a quote that cannot be scored only fails itself
+                premiums = [self._score_one(record) for record in records]
+
+            self.quotes += len(batch)
+            self.batches += 1
+            for future, premium in zip(futures, premiums):
+                if isinstance(premium, Exception):
+                    future.set_exception(premium)
+                else:
+                    future.set_result(premium)
+
+    def _score_one(self, record: dict):
+        # The premium of one quote, or the exception raised while scoring it
+        try:
+            return float(score_batch(pd.DataFrame([record]), self.artifacts)[0])
+        except Exception as error:
+            return error
+
+
+class PredictionServer(ThreadingHTTPServer):
+    # Queue bursts of concurrent connections instead of resetting them
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def validate_quote(record, artifacts: dict) -> dict:
+    """
+    Checks that a quote has every input the model needs, deriving 'Credit_Category' from 'Credit_Score' when it is missing.
+
+    Args:
+        record: The decoded JSON body of a quote.
+        artifacts (dict): The loaded artifacts, as returned by `load_artifacts`.
+
+    Returns:
+        dict: The quote, ready to be scored.
+
+    Raises:
+        ValueError: If the quote is not a JSON object, is missing required fields, has a non-numeric value in a numeric field or a value other than one of its categories or null in a categorical field.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Each quote must be a JSON object")
+
+    record = dict(record)
+    if "Credit_Score" in record:
+        record = add_credit_category(record)
+
+    encoder = artifacts["encoder"]
+    missing = [col for col in encoder.input_columns if col not in record]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    # Reject bad values here so that one quote cannot fail the whole micro-batch
+    for col in encoder.input_columns:
+        if col in encoder.categories_:
+            if record[col] is not None and not isinstance(record[col], str):
+                raise ValueError(f"Field {col} must be a string")
+            if record[col] is not None and record[col] not in encoder.categories_[col]:
+                raise ValueError(f"Field {col} must be one of: {', '.join(encoder.categories_[col])}")
+        else:
+            try:
+                record[col] = float(record[col])
+            except (TypeError, ValueError):
+                raise ValueError(f"Field {col} must be a number") from None
+    return record
+
+
+def make_handler(artifacts: dict, batcher: MicroBatcher, quote_cache: QuoteCache, model_version):
+    """
+    Builds the request handler class for the prediction server.
+
+    Endpoints:
+        - POST /quote: one input dictionary, returns {"premium": ...}. Scored through the micro-batcher.
+        - POST /quotes: a list of input dictionaries, returns {"premiums": [...]}. Scored as one batch.
+        - GET /health: returns {"status": "ok"}.
+        - GET /stats: returns the number of single quotes and micro-batches scored, and the quote cache statistics.
+
+    Quotes found in the quote cache are answered without scoring.
+
+    Args:
+        artifacts (dict): The loaded artifacts, as returned by `load_artifacts`.
+        batcher (MicroBatcher): The micro-batcher that scores single quotes.
+        quote_cache (QuoteCache): Cache of previously predicted premiums.
+        model_version: Version of the loaded artifacts, as returned by `artifacts_version`.
+
+    Returns:
+        type: A `BaseHTTPRequestHandler` subclass.
+    """
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, so send them without waiting for ACKs
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send_json(200, {"quotes": batcher.quotes, "batches": batcher.batches,
+                                      "cache": quote_cache.stats()})
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+
+                if self.path == "/quote":
+                    record = validate_quote(body, artifacts)
+                    premium = quote_cache.get(record, model_version)
+                    if premium is None:
+                        premium = batcher.submit(record).result()
+                        quote_cache.put(record, model_version, premium)
+                    self._send_json(200, {"premium": premium})
+                elif self.path == "/quotes":
+                    if not isinstance(body, list):
+                        raise ValueError("Expected a JSON list of quotes")
+                    records = [validate_quote(record, artifacts)
+                               for record in body]
+                    premiums = [quote_cache.get(record, model_version)
+                                for record in records]
+
+                    # Score every cache miss together in one batch
+                    missing = [i for i, premium in enumerate(
+                        premiums) if premium is None]
+                    if missing:
+                        scored = score_batch(pd.DataFrame(
+                            [records[i] for i in missing]), artifacts).tolist()
+                        for i, premium in zip(missing, scored):
+                            premiums[i] = premium
+                            quote_cache.put(
+                                records[i], model_version, premium)
+                    self._send_json(200, {"premiums": premiums})
+                else:
+                    self._send_json(404, {"error": "Not found"})
+            except ValueError as error:
+                self._send_json(400, {"error": str(error)})
+            except Exception as error:
+                self._send_json(500, {"error": f"Could not score the quote: {type(error).__name__}: {error}"})
+
+        def log_message(self, format, *args):
+            # Keep the console quiet under load
+            pass
+
+    return PredictionHandler
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, models_dir: str = MODELS_DIR, model_name: str = "ridge",
+               max_batch_size: int = 256, max_wait_ms: float = 5.0, cache_size: int = 10_000) -> None:
+    """
+    Starts the prediction server and serves until interrupted.
+
+    Args:
+        host (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): Port to listen on. Defaults to 8000.
+        models_dir (str, optional): Directory containing the saved artifacts. Defaults to the project's 'models' directory.
+        model_name (str, optional): Name of the model to serve. Defaults to 'ridge'.
+        max_batch_size (int, optional): Largest number of single quotes scored together. Defaults to 256.
+        max_wait_ms (float, optional): Longest time a quote waits for others to join its batch. Defaults to 5.
+        cache_size (int, optional): Number of quotes kept in the quote cache. Defaults to 10000.
+    """
+    model_version = artifacts_version(models_dir, model_name)
+    artifacts = load_artifacts(models_dir, model_name)
+    batcher = MicroBatcher(artifacts, max_batch_size, max_wait_ms)
+    quote_cache = QuoteCache(max_entries=cache_size)
+    server = PredictionServer((host, port), make_handler(
+        artifacts, batcher, quote_cache, model_version))
+
+    print(f"Serving {model_name} premiums on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve premium predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8000,
+                        help="Port to listen on.")
+    parser.add_argument("--model", default="ridge",
+                        help="Model to serve: ridge, xgboost or random_forest.")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="Directory containing the saved artifacts.")
+    parser.add_argument("--max-batch-size", type=int, default=256,
+                        help="Largest number of single quotes scored together.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Longest time a quote waits for others to join its batch.")
+    parser.add_argument("--cache-size", type=int, default=10_000,
+                        help="Number of quotes kept in the quote cache.")
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.models_dir, args.model,
+               args.max_batch_size, args.max_wait_ms, args.cache_size)
@@ -1,132 +1,624 @@
+import argparse
+import importlib
+import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import Ridge
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from xgboost import XGBRegressor
-
-from features import preprocess_features
-
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-# Load the data
-df = pd.read_csv("../data/processed/cleaned_data.csv")
-
-# Preprocess the features
-df_processed = preprocess_features(df)
-df_processed.columns
-
-# Define target variable and the features
-X = df_processed.drop(columns=['Premium_Amount'])
-y = df_processed['Premium_Amount']
-
-# Split into training and test sets
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42)
-X_train.columns
-
-# Isolate the numeric features to scale them only
-all_numeric_columns = X_train.select_dtypes(include='number')
-columns_to_scale = all_numeric_columns.loc[:,
-                                           all_numeric_columns.dtypes != 'uint8'].columns
-
-# Isolate the hot-one encoded features to prevent them from being scaled
-columns_to_leave_as = [
-    col for col in X_train.columns if col not in columns_to_scale]
-
-# Scale only the numeric columns based on the training data
-scaler = StandardScaler()
-X_train_scaled_part = scaler.fit_transform(X_train[columns_to_scale])
-X_test_scaled_part = scaler.transform(X_test[columns_to_scale])
-
-# Combine the numeric columns with the non-numeric columns
-X_train_scaled = np.hstack(
-    [X_train_scaled_part, X_train[columns_to_leave_as].values])
-X_test_scaled = np.hstack(
-    [X_test_scaled_part, X_test[columns_to_leave_as].values])
-
-# Define the models and their respective parameters
-models = {
-    "Random Forest": RandomForestRegressor(n_estimators=80, max_depth=10, random_state=42),
-    "Ridge": Ridge(alpha=1.0),
-    "XGBoost": XGBRegressor(n_estimators=80, max_depth=6, learning_rate=0.1, random_state=42)
+from threadpoolctl import threadpool_limits
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.credit import CREDIT_CATEGORIES, CREDIT_SCORE_BINS  # noqa: E402
+from src.features import (FEATURES_DATA_PATH, FeatureEncoder,  # noqa: E402
+                          preprocess_features)
+from src.instrumentation import timed  # noqa: E402
+from src.modeling.bundle import MANIFEST_FILE, write_bundle  # noqa: E402
+from src.modeling.drift import (DRIFT_BASELINE_FILE,  # noqa: E402
+                                save_baseline, training_baseline)
+from src.modeling.linear_scorer import (COEFFICIENTS_FILE,  # noqa: E402
+                                        export_coefficients)
+from src.modeling.predict import MODELS_DIR  # noqa: E402
+from src.modeling.tree_ensemble import export_trees  # noqa: E402
+from src.schema import BOOLEAN_COLUMNS, read_policies  # noqa: E402
+from src.storage import (FORMAT_EXTENSIONS, dataset_columns,  # noqa: E402
+                         with_format)
+
+# The candidate models, as import paths so that scikit-learn and XGBoost only load once a model is trained,
+# and the hyperparameters they are trained with by default
+MODEL_CLASSES = {
+    "Random Forest": "sklearn.ensemble.RandomForestRegressor",
+    "Ridge": "sklearn.linear_model.Ridge",
+    "XGBoost": "xgboost.XGBRegressor",
+}
+DEFAULT_PARAMS = {
+    "Random Forest": {"n_estimators": 80, "max_depth": 10, "random_state": 42},
+    "Ridge": {"alpha": 1.0},
+    "XGBoost": {"n_estimators": 80, "max_depth": 6, "learning_rate": 0.1, "random_state": 42},
 }
 
-# Store the results of the evaluation metrics of the different models
-model_results = {}
-metrics_list = []
+# Files written by `save_artifacts`
+ARTIFACT_FILES = [f"{model_name.replace(' ', '_').lower()}_model.joblib" for model_name in MODEL_CLASSES] + [
+    "model_metrics.csv", "training_trials.csv", "scaler.joblib", "model_features.joblib", "feature_encoder.joblib",
+    "ridge_statistics.joblib", COEFFICIENTS_FILE, DRIFT_BASELINE_FILE] + [
+    f"{model_name}_trees.{extension}" for model_name in ["random_forest", "xgboost"] for extension in ["npy", "json"]] + [
+    os.path.join("bundle", MANIFEST_FILE)]
+
+# Values tried by the hyperparameter search; anything not listed keeps its default
+SEARCH_SPACE = {
+    "Random Forest": {"n_estimators": [80, 160], "max_depth": [10, 20, None], "min_samples_leaf": [1, 5]},
+    "Ridge": {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]},
+    "XGBoost": {"n_estimators": [80, 200, 400], "max_depth": [4, 6, 8], "learning_rate": [0.05, 0.1, 0.2]},
+}
+
+
+def model_class(model_name: str) -> type:
+    """
+    Imports the estimator class of one of the candidate models.
+
+    Args:
+        model_name (str): The name of the model, one of the keys of `MODEL_CLASSES`.
+
+    Returns:
+        type: The estimator class.
+    """
+    module_name, class_name = MODEL_CLASSES[model_name].rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_training_data(data_path: str = FEATURES_DATA_PATH) -> pd.DataFrame:
+    """
+    Loads the processed dataset with the compact types of `src.schema`, projecting out the 'Customer_ID' column.
+
+    Args:
+        data_path (str, optional): Path to the processed CSV, Parquet or Arrow IPC dataset. Defaults to 'data/processed/cleaned_data.csv'.
+
+    Returns:
+        pd.DataFrame: The processed dataset.
+    """
+    return read_policies(data_path, columns=[
+        col for col in dataset_columns(data_path) if col != "Customer_ID"])
+
+
+@timed("scale")
+def scale_features(X_fit: pd.DataFrame, X_eval: pd.DataFrame, numeric_columns: list[str]) -> tuple:
+    """
+    Scales the numeric features of a training and an evaluation set on the training set, leaving the one-hot encoded features as they are.
+
+    Args:
+        X_fit (pd.DataFrame): The encoded features to fit the scaler on.
+        X_eval (pd.DataFrame): The encoded features to evaluate on.
+        numeric_columns (list[str]): The columns to scale, which come before the one-hot encoded columns.
+
+    Returns:
+        tuple: The fitted scaler and the scaled training and evaluation matrices.
+    """
+    # Isolate the hot-one encoded features to prevent them from being scaled
+    columns_to_leave_as = [
+        col for col in X_fit.columns if col not in numeric_columns]
+
+    from sklearn.preprocessing import StandardScaler
+
+    # Scale only the numeric columns based on the training data
+    scaler = StandardScaler()
+    X_fit_scaled_part = scaler.fit_transform(X_fit[numeric_columns])
+    X_eval_scaled_part = scaler.transform(X_eval[numeric_columns])
+
+    # Combine the numeric columns with the non-numeric columns
+    X_fit_scaled = np.hstack(
+        [X_fit_scaled_part, X_fit[columns_to_leave_as].values])
+    X_eval_scaled = np.hstack(
+        [X_eval_scaled_part, X_eval[columns_to_leave_as].values])
+    return scaler, X_fit_scaled, X_eval_scaled
+
+
+def split_and_scale(df: pd.DataFrame) -> dict:
+    """
+    Encodes the features, splits off a test set and scales the numeric features on the training set.
+
+    Args:
+        df (pd.DataFrame): The processed dataset, including the 'Premium_Amount' target.
+
+    Returns:
+        dict: The scaled 'X_train' and 'X_test' matrices, the 'y_train' and 'y_test' targets, the fitted 'scaler', the scaled 'numeric_columns', the 'model_features' in column order and the unscaled 'X_train_encoded' features.
+    """
+    from sklearn.model_selection import train_test_split
+
+    # Preprocess the features
+    df_processed = preprocess_features(df)
+
+    # Define target variable and the features
+    X = df_processed.drop(columns=['Premium_Amount'])
+    y = df_processed['Premium_Amount']
+
+    # Split into training and test sets
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42)
+
+    # Isolate the numeric features and boolean flags to scale them only
+    all_numeric_columns = X_train.select_dtypes(include='number')
+    numeric_columns = all_numeric_columns.loc[:,
+                                              all_numeric_columns.dtypes != 'uint8'].columns
+    columns_to_scale = [col for col in X_train.columns
+                        if col in numeric_columns or col in BOOLEAN_COLUMNS]
 
-# Evaluate each model
-for model_name, model in models.items():
-    model.fit(X_train_scaled, y_train)
+    scaler, X_train_scaled, X_test_scaled = scale_features(
+        X_train, X_test, columns_to_scale)
+
+    return {
+        "X_train": X_train_scaled,
+        "X_test": X_test_scaled,
+        "y_train": y_train.to_numpy(),
+        "y_test": y_test.to_numpy(),
+        "scaler": scaler,
+        "numeric_columns": columns_to_scale,
+        "model_features": list(X_train.columns),
+        "X_train_encoded": X_train,
+    }
+
+
+def make_cv_splits(data: dict, n_folds: int = 5, random_state: int = 42) -> list[tuple]:
+    """
+    Splits the training set into cross-validation folds and scales each fold on its own training part.
+
+    The scaled matrices are computed once here and shared by every model and hyperparameter trial.
+
+    Args:
+        data (dict): The split and scaled dataset, as returned by `split_and_scale`.
+        n_folds (int, optional): Number of folds. Defaults to 5.
+        random_state (int, optional): Seed of the fold assignment. Defaults to 42.
+
+    Returns:
+        list[tuple]: (X_fit, y_fit, X_val, y_val) of each fold.
+    """
+    from sklearn.model_selection import KFold
+
+    X_train = data["X_train_encoded"]
+    y_train = data["y_train"]
+    splits = []
+
+    for fit_index, val_index in KFold(n_folds, shuffle=True, random_state=random_state).split(X_train):
+        _, X_fit, X_val = scale_features(
+            X_train.iloc[fit_index], X_train.iloc[val_index], data["numeric_columns"])
+        splits.append(
+            (X_fit, y_train[fit_index], X_val, y_train[val_index]))
+    return splits
+
+
+def make_validation_split(data: dict, validation_size: float = 0.2, random_state: int = 42) -> tuple:
+    """
+    Holds out part of the training set to score search trials on, and scales both parts on the rest of the training set alone, as `make_cv_splits` does for each fold.
+
+    Args:
+        data (dict): The split and scaled dataset, as returned by `split_and_scale`.
+        validation_size (float, optional): Share of the training set held out. Defaults to 0.2.
+        random_state (int, optional): Seed of the split. Defaults to 42.
+
+    Returns:
+        tuple: (X_fit, y_fit, X_val, y_val) of the split.
+    """
+    from sklearn.model_selection import train_test_split
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        data["X_train_encoded"], data["y_train"], test_size=validation_size, random_state=random_state)
+    _, X_fit, X_val = scale_features(X_fit, X_val, data["numeric_columns"])
+    return X_fit, y_fit, X_val, y_val
+
+
+def sufficient_statistics(X: np.ndarray, y: np.ndarray) -> dict:
+    """
+    Summarises unscaled training data by the statistics that a scaler and a Ridge model can be refitted from, so that they can later be updated with new rows alone.
+
+    Args:
+        X (np.ndarray): The unscaled features, in model column order.
+        y (np.ndarray): The target.
+
+    Returns:
+        dict: The 'n_samples', the feature and target means ('x_mean', 'y_mean'), and the centred scatter matrices Σ(x - x̄)(x - x̄)ᵀ ('xx_scatter') and Σ(x - x̄)(y - ȳ) ('xy_scatter').
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_mean = X.mean(axis=0)
+    y_mean = y.mean()
+    X_centred = X - x_mean
+
+    return {
+        "n_samples": len(X),
+        "x_mean": x_mean,
+        "y_mean": y_mean,
+        "xx_scatter": X_centred.T @ X_centred,
+        "xy_scatter": X_centred.T @ (y - y_mean),
+    }
+
+
+def evaluate_model(model, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray, y_test: np.ndarray) -> dict:
+    """
+    Computes the training and test metrics of a fitted model.
+
+    Args:
+        model: A fitted regressor.
+        X_train (np.ndarray): The scaled training features.
+        y_train (np.ndarray): The training target.
+        X_test (np.ndarray): The scaled features of the held-out set.
+        y_test (np.ndarray): The target of the held-out set.
+
+    Returns:
+        dict: MAE, RMSE and R² on both sets, and the MAPE (%) on the held-out set.
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
     # Predict on train and test sets
-    y_train_pred = model.predict(X_train_scaled)
-    y_test_pred = model.predict(X_test_scaled)
-
-    # Training performance
-    mae_train = mean_absolute_error(y_train, y_train_pred)
-    rmse_train = np.sqrt(mean_squared_error(y_train, y_train_pred))
-    r2_train = r2_score(y_train, y_train_pred)
-
-    # Test performance
-    mae_test = mean_absolute_error(y_test, y_test_pred)
-    rmse_test = np.sqrt(mean_squared_error(y_test, y_test_pred))
-    r2_test = r2_score(y_test, y_test_pred)
-    mae_percentage = np.mean(np.abs((y_test - y_test_pred) / y_test)) * 100
-
-    # Save the model results to a dictionary
-    model_results[model_name] = {
-        "model": model,
-        "MAE_Train": mae_train,
-        "RMSE_Train": rmse_train,
-        "R2_Train": r2_train,
-        "MAE_Test": mae_test,
-        "RMSE_Test": rmse_test,
-        "R2_Test": r2_test,
-        "MAPE_Test": mae_percentage
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+
+    return {
+        "MAE_Train": mean_absolute_error(y_train, y_train_pred),
+        "RMSE_Train": np.sqrt(mean_squared_error(y_train, y_train_pred)),
+        "R2_Train": r2_score(y_train, y_train_pred),
+        "MAE_Test": mean_absolute_error(y_test, y_test_pred),
+        "RMSE_Test": np.sqrt(mean_squared_error(y_test, y_test_pred)),
+        "R2_Test": r2_score(y_test, y_test_pred),
+        "MAPE_Test (%)": np.mean(np.abs((y_test - y_test_pred) / y_test)) * 100,
     }
 
-    # Save the model results to a list
-    metrics_list.append({
-        "model": model,
-        "MAE_Train": mae_train,
-        "RMSE_Train": rmse_train,
-        "R2_Train": r2_train,
-        "MAE_Test": mae_test,
-        "RMSE_Test": rmse_test,
-        "R2_Test": r2_test,
-        "MAPE_Test (%)": mae_percentage
-    })
 
+def build_trials(search: str = "none", search_space: dict | None = None, n_iter: int = 10,
+                 random_state: int = 42) -> list[tuple[str, dict]]:
+    """
+    Lists the hyperparameter settings to train.
+
+    Args:
+        search (str, optional): 'none' to train each model once with its default hyperparameters, 'grid' to try every combination in the search space, or 'random' to sample `n_iter` combinations per model. Defaults to 'none'.
+        search_space (dict, optional): Values to try for each hyperparameter of each model. Models it leaves out are trained with their default hyperparameters. Defaults to `SEARCH_SPACE`.
+        n_iter (int, optional): Number of combinations sampled per model by the random search. Defaults to 10.
+        random_state (int, optional): Seed of the random search. Defaults to 42.
+
+    Returns:
+        list[tuple[str, dict]]: (model name, hyperparameters) of each trial.
+    """
+    if search == "none":
+        return [(model_name, dict(params)) for model_name, params in DEFAULT_PARAMS.items()]
+
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    search_space = search_space or SEARCH_SPACE
+    for model_name in search_space:
+        if model_name not in MODEL_CLASSES:
+            raise ValueError(f"Unknown model in the search space: {model_name}")
+
+    # Models left out of the search space are still trained once with their defaults, since every model is saved
+    trials = []
+    for model_name in MODEL_CLASSES:
+        grid = ParameterGrid(search_space.get(model_name, {}))
+        if search == "random" and n_iter < len(grid):
+            grid = ParameterSampler(space, n_iter, random_state=random_state)
+        trials.extend((model_name, {**DEFAULT_PARAMS[model_name], **params})
+                      for params in grid)
+    return trials
+
+
+def thread_budget(workers: int) -> int:
+    """
+    Splits the CPU cores evenly between the worker processes, so that BLAS, Random Forest and XGBoost threads never add up to more threads than cores.
+
+    Args:
+        workers (int): Number of fits run at once.
+
+    Returns:
+        int: Number of threads each trial may use.
+    """
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+# Train/evaluation splits and thread budget shared by every trial in a worker process
+_trial_splits = None
+_trial_threads = 1
+
+
+def _init_trial_worker(splits: list[tuple], threads: int) -> None:
+    global _trial_splits, _trial_threads
+    _trial_splits = splits
+    _trial_threads = threads
+    threadpool_limits(limits=threads)
+
+
+def _run_trial(trial_id: int, split_id: int, model_name: str, params: dict, keep_model: bool) -> dict:
+    X_fit, y_fit, X_eval, y_eval = _trial_splits[split_id]
+    model = model_class(model_name)(**params)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=_trial_threads)
+
+    start = time.perf_counter()
+    model.fit(X_fit, y_fit)
+    fit_seconds = time.perf_counter() - start
+    metrics = evaluate_model(model, X_fit, y_fit, X_eval, y_eval)
+    wall_seconds = time.perf_counter() - start
+
+    # Save the model with the library's own default thread count rather than this worker's budget
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=None)
+
+    return {
+        "trial": trial_id,
+        "split": split_id,
+        "model_name": model_name,
+        "params": params,
+        "threads": _trial_threads,
+        "fit_seconds": fit_seconds,
+        "wall_seconds": wall_seconds,
+        "metrics": metrics,
+        "model": model if keep_model else None,
+    }
+
+
+def run_trials(trials: list[tuple[str, dict]], splits: list[tuple], workers: int | None = None,
+               keep_models: bool = True) -> list[dict]:
+    """
+    Trains and evaluates every trial on every split, running several trials and splits at once in a pool of processes.
+
+    Each worker process receives the splits once and trains with its share of the CPU cores, as given by `thread_budget`.
+
+    Args:
+        trials (list[tuple[str, dict]]): (model name, hyperparameters) of each trial, as returned by `build_trials`.
+        splits (list[tuple]): (X_fit, y_fit, X_eval, y_eval) of each split to train and evaluate on, such as the test split or the folds from `make_cv_splits`.
+        workers (int, optional): Number of fits run at once. Defaults to the number of CPU cores, capped at the number of fits.
+        keep_models (bool, optional): Whether to return the fitted models, rather than only their metrics. Defaults to True.
+
+    Returns:
+        list[dict]: For each trial and split, trial-major, its 'trial' and 'split' numbers, 'model_name', 'params', thread budget, 'fit_seconds', 'wall_seconds', 'metrics' and fitted 'model' (None unless `keep_models`).
+    """
+    tasks = [(trial_id, split_id, model_name, params, keep_models)
+             for trial_id, (model_name, params) in enumerate(trials)
+             for split_id in range(len(splits))]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    initargs = (splits, thread_budget(workers))
+
+    if workers == 1:
+        _init_trial_worker(*initargs)
+        return [_run_trial(*task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_trial_worker,
+                             initargs=initargs) as executor:
+        futures = [executor.submit(_run_trial, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def trial_log(results: list[dict], stage: str) -> pd.DataFrame:
+    """
+    Tabulates the wall-clock time and metrics of each trial.
+
+    Args:
+        results (list[dict]): The trial results, as returned by `run_trials`.
+        stage (str): What the trials were evaluated on: 'cv', 'validation' or 'test'.
+
+    Returns:
+        pd.DataFrame: One row per trial and split, numbering the folds from 1 for cross-validation.
+    """
+    return pd.DataFrame([{
+        "stage": stage,
+        "trial": result["trial"],
+        "fold": result["split"] + 1 if stage == "cv" else None,
+        "model_name": result["model_name"],
+        "params": json.dumps(result["params"], sort_keys=True),
+        "threads": result["threads"],
+        "fit_seconds": result["fit_seconds"],
+        "wall_seconds": result["wall_seconds"],
+        **result["metrics"],
+    } for result in results])
+
+
+def cv_metrics(results: list[dict]) -> dict:
+    """
+    Summarises the cross-validation results of one trial.
+
+    Args:
+        results (list[dict]): The results of the trial on each fold, in fold order.
+
+    Returns:
+        dict: MAE, RMSE, R² and MAPE (%) on each fold's held-out part, followed by their mean and standard deviation across folds.
+    """
+    summary = {}
+    for name, test_key in [("MAE", "MAE_Test"), ("RMSE", "RMSE_Test"), ("R2", "R2_Test"), ("MAPE", "MAPE_Test (%)")]:
+        suffix = " (%)" if name == "MAPE" else ""
+        values = np.array([result["metrics"][test_key]
+                          for result in results])
+        for fold, value in enumerate(values, start=1):
+            summary[f"{name}_CV_Fold{fold}{suffix}"] = value
+        summary[f"{name}_CV_Mean{suffix}"] = values.mean()
+        summary[f"{name}_CV_Std{suffix}"] = values.std()
+    return summary
+
+
+def _best_trials(results: list[dict]) -> dict[str, int]:
+    # The trial with the lowest RMSE of each model, averaged over the splits it was evaluated on
+    rmse = pd.DataFrame([{"trial": result["trial"], "model_name": result["model_name"],
+                          "rmse": result["metrics"]["RMSE_Test"]} for result in results])
+    mean_rmse = rmse.groupby(["model_name", "trial"], sort=False)[
+        "rmse"].mean().reset_index()
+    best = mean_rmse.loc[mean_rmse.groupby("model_name", sort=False)[
+        "rmse"].idxmin()]
+    return dict(zip(best["model_name"], best["trial"]))
+
+
+def train_models(data: dict, search: str = "none", search_space: dict | None = None, n_iter: int = 10,
+                 workers: int | None = None, validation_size: float = 0.2,
+                 cv_folds: int = 0) -> tuple[list[dict], pd.DataFrame]:
+    """
+    Trains the candidate models, optionally cross-validating them and searching for their best hyperparameters first.
+
+    With `cv_folds`, every trial is trained and scored on each fold of the training set, and the folds of all trials are run in parallel. Without it, a search scores its trials on a single validation split of the training set, scaled like a fold. Either way, the setting with the lowest mean RMSE of each model is then retrained on the whole training set, and the final models are evaluated on the test set.
+
+    Args:
+        data (dict): The split and scaled dataset, as returned by `split_and_scale`.
+        search (str, optional): 'none', 'grid' or 'random'. Defaults to 'none'.
+        search_space (dict, optional): Values to try for each hyperparameter of each model. Defaults to `SEARCH_SPACE`.
+        n_iter (int, optional): Number of combinations sampled per model by the random search. Defaults to 10.
+        workers (int, optional): Number of fits run at once. Defaults to the number of CPU cores.
+        validation_size (float, optional): Share of the training set held out to score the search trials without cross-validation. Defaults to 0.2.
+        cv_folds (int, optional): Number of cross-validation folds, or 0 to skip cross-validation. Defaults to 0.
+
+    Returns:
+        tuple[list[dict], pd.DataFrame]: The result of each final model, as returned by `run_trials` plus its 'cv_metrics' when cross-validating, and the log of every trial.
+    """
+    trials = build_trials(search, search_space, n_iter)
+    logs = []
+    search_results = []
+
+    if cv_folds:
+        search_results = run_trials(trials, make_cv_splits(
+            data, cv_folds), workers, keep_models=False)
+        logs.append(trial_log(search_results, "cv"))
+    elif search != "none":
+        # Scale on the fit part only, so that the validation rows do not leak into the scaling the trials are scored with
+        search_results = run_trials(
+            trials, [make_validation_split(data, validation_size)], workers, keep_models=False)
+        logs.append(trial_log(search_results, "validation"))
+
+    # Keep the setting with the lowest mean RMSE of each model
+    best_trials = _best_trials(search_results) if search_results else {
+        model_name: trial_id for trial_id, (model_name, _) in enumerate(trials)}
+
+    final_results = run_trials([trials[trial_id] for trial_id in best_trials.values()],
+                               [(data["X_train"], data["y_train"], data["X_test"], data["y_test"])], workers)
+    logs.append(trial_log(final_results, "test"))
+
+    if cv_folds:
+        for result, trial_id in zip(final_results, best_trials.values()):
+            result["cv_metrics"] = cv_metrics(
+                [fold for fold in search_results if fold["trial"] == trial_id])
+
+    return final_results, pd.concat(logs, ignore_index=True)
+
+
+def save_artifacts(df: pd.DataFrame, data: dict, results: list[dict], trials: pd.DataFrame, save_dir: str) -> None:
+    """
+    Saves the trained models, the tree ensembles' node arrays, their metrics, the trial log, the scaler, the Ridge sufficient statistics and coefficient table, the model features, the feature encoder and the drift baseline, and packs them into a model bundle.
+
+    Args:
+        df (pd.DataFrame): The processed dataset the models were trained on.
+        data (dict): The split and scaled dataset, as returned by `split_and_scale`.
+        results (list[dict]): The result of each final model, as returned by `train_models`.
+        trials (pd.DataFrame): The log of every trial.
+        save_dir (str): Directory to save the artifacts to.
+    """
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Save the metrics into a pandas dataframe
+    metrics_df = pd.DataFrame([{"model": result["model"], **result["metrics"], **result.get("cv_metrics", {})}
+                               for result in results])
+    metrics_df.to_csv(os.path.join(
+        save_dir, "model_metrics.csv"), index=False)
+
+    # Save the wall-clock time and metrics of every trial
+    trials.to_csv(os.path.join(save_dir, "training_trials.csv"), index=False)
+
+    # Save trained models using joblib, and the tree ensembles also as flat node arrays
+    for result in results:
+        model_name = result['model_name'].replace(' ', '_').lower()
+        joblib.dump(result["model"], os.path.join(
+            save_dir, f"{model_name}_model.joblib"))
+        if model_name in ["random_forest", "xgboost"]:
+            export_trees(result["model"], save_dir, model_name)
+
+    # Save the fitted scaler
+    scaler_file = os.path.join(save_dir, "scaler.joblib")
+    joblib.dump((data["scaler"], data["numeric_columns"]), scaler_file)
+
+    # Save the statistics that incremental updates refit the scaler and Ridge model from
+    statistics_file = os.path.join(save_dir, "ridge_statistics.joblib")
+    joblib.dump(sufficient_statistics(
+        data["X_train_encoded"], data["y_train"]), statistics_file)
+
+    # Save the model features
+    features_file = os.path.join(save_dir, "model_features.joblib")
+    joblib.dump(data["model_features"], features_file)
+
+    # Save the encoder that maps raw inputs onto the model features at inference time
+    encoder = FeatureEncoder().fit_encoded(df.drop(columns=['Premium_Amount']))
+    if encoder.feature_names_ != data["model_features"]:
+        raise ValueError(
+            "The fitted feature encoder does not reproduce the model features")
+    encoder_file = os.path.join(save_dir, "feature_encoder.joblib")
+    joblib.dump(encoder, encoder_file)
+
+    # Export the Ridge model with the scaler folded in, for scoring without scikit-learn
+    ridge_model = next(result["model"]
+                       for result in results if result["model_name"] == "Ridge")
+    export_coefficients(ridge_model, data["scaler"], data["numeric_columns"], encoder,
+                        os.path.join(save_dir, COEFFICIENTS_FILE), (CREDIT_SCORE_BINS, CREDIT_CATEGORIES))
+
+    # Snapshot the training inputs and each model's premiums, for batch scoring to monitor drift against
+    save_baseline(training_baseline(data["X_train_encoded"], encoder, {
+        result["model_name"].replace(' ', '_').lower(): result["model"].predict(data["X_train"])
+        for result in results}), save_dir)
+
+    # Pack everything into the bundle that scoring workers and the app load
+    write_bundle(save_dir)
+
+
+def train_file(data_path: str = FEATURES_DATA_PATH, save_dir: str = MODELS_DIR, search: str = "none",
+               search_space: dict | None = None, n_iter: int = 10, workers: int | None = None,
+               cv_folds: int = 0) -> pd.DataFrame:
+    """
+    Trains the candidate models on a processed dataset file and saves them with their preprocessing artifacts.
 
-# Define the save directory to save the trained models and the metrics list
-save_dir = os.path.abspath(os.path.join(os.getcwd(), "..", "models"))
-os.makedirs(save_dir, exist_ok=True)
+    Args:
+        data_path (str, optional): Path to the processed dataset. Defaults to 'data/processed/cleaned_data.csv'.
+        save_dir (str, optional): Directory to save the artifacts to. Defaults to the project's 'models' directory.
+        search (str, optional): 'none', 'grid' or 'random'. Defaults to 'none'.
+        search_space (dict, optional): Values to try for each hyperparameter of each model. Defaults to `SEARCH_SPACE`.
+        n_iter (int, optional): Number of combinations sampled per model by the random search. Defaults to 10.
+        workers (int, optional): Number of fits run at once. Defaults to the number of CPU cores.
+        cv_folds (int, optional): Number of cross-validation folds, or 0 to skip cross-validation. Defaults to 0.
 
+    Returns:
+        pd.DataFrame: The log of every trial.
+    """
+    df = load_training_data(data_path)
+    data = split_and_scale(df)
+    results, trials = train_models(
+        data, search, search_space, n_iter, workers, cv_folds=cv_folds)
+    save_artifacts(df, data, results, trials, save_dir)
+    return trials
 
-# Save the metrics into a pandas dataframe
-metrics_df = pd.DataFrame(metrics_list)
-metrics_df.to_csv(os.path.join(save_dir, "model_metrics.csv"), index=False)
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train and evaluate the premium prediction models.")
+    parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv",
+                        help="Storage format of the processed dataset.")
+    parser.add_argument("--search", choices=["none", "grid", "random"], default="none",
+                        help="Search for the best hyperparameters of each model before training it.")
+    parser.add_argument("--search-space", default=None,
+                        help="JSON file of the values to try for each hyperparameter of each model; models it leaves out keep their defaults.")
+    parser.add_argument("--n-iter", type=int, default=10,
+                        help="Number of combinations sampled per model by the random search.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of fits run at once. Defaults to the number of CPU cores.")
+    parser.add_argument("--cv", type=int, default=0,
+                        help="Cross-validate every trial on this many folds of the training set.")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="Directory to save the trained models and artifacts to.")
+    args = parser.parse_args()
 
-# Save trained models using joblib
-for model_name, results in model_results.items():
-    model_file = os.path.join(
-        save_dir, f"{model_name.replace(' ', '_').lower()}_model.joblib")
-    joblib.dump(results["model"], model_file)
+    search_space = None
+    if args.search_space:
+        with open(args.search_space) as file:
+            search_space = json.load(file)
 
-# Save the fitted scaler
-scaler_file = os.path.join(save_dir, "scaler.joblib")
-joblib.dump((scaler, columns_to_scale.tolist()), scaler_file)
+    start = time.perf_counter()
+    trials = train_file(with_format(FEATURES_DATA_PATH, args.format), args.models_dir, args.search,
+                        search_space, args.n_iter, args.workers, args.cv)
 
-# Save the model features
-model_features = list(X_train.columns)
-features_file = os.path.join(save_dir, "model_features.joblib")
-joblib.dump(model_features, features_file)
+    print(trials[["stage", "fold", "model_name", "params", "threads", "fit_seconds", "wall_seconds",
+                  "RMSE_Test"]].to_string(index=False))
+    print(f"Trained {len(trials)} trials in {time.perf_counter() - start:.1f}s "
+          f"({trials['wall_seconds'].sum():.1f}s of trial time)")
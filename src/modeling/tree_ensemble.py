@@ -0,0 +1,551 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Deepest ensemble stored as complete binary trees, where a node's children are found arithmetically.
+# Deeper ones, such as unlimited-depth Random Forests, are stored as linked nodes.
+COMPLETE_MAX_DEPTH = 12
+
+
+def trees_paths(models_dir: str, model_name: str) -> tuple[str, str]:
+    """
+    Locates the exported node arrays and metadata of a tree ensemble.
+
+    Args:
+        models_dir (str): Directory containing the saved artifacts.
+        model_name (str): Name of the model, e.g. 'xgboost' or 'random_forest'.
+
+    Returns:
+        tuple[str, str]: Paths to the '.npy' node arrays and the '.json' metadata.
+    """
+    prefix = os.path.join(models_dir, f"{model_name}_trees")
+    return f"{prefix}.npy", f"{prefix}.json"
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    # Depth of every node, in splits from the root; the largest is the tree's longest root-to-leaf path
+    depth = np.zeros(len(left), dtype=int)
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return depth
+
+
+def _node_means(left: np.ndarray, right: np.ndarray, value: np.ndarray, weight: np.ndarray,
+                depth: np.ndarray) -> np.ndarray:
+    # Value of every node as the weighted mean of the leaves below it, filled in from the deepest nodes up
+    means = np.asarray(value, dtype=float).copy()
+    for node in np.argsort(-depth, kind="stable"):
+        if left[node] >= 0:
+            means[node] = (means[left[node]] * weight[left[node]] + means[right[node]] * weight[right[node]]) \
+                / (weight[left[node]] + weight[right[node]])
+    return means
+
+
+def _complete_layout(trees: list[dict], depth: int) -> np.ndarray:
+    # Pad every tree to a complete binary tree of the given depth, with node i's children at 2i + 1 and 2i + 2.
+    # A leaf above the bottom level is copied into every bottom-level slot below it, so the splits it is padded
+    # with can send rows either way. 'value' holds the leaves and 'node_value' the mean value of each split.
+    n_internal = 2 ** depth - 1
+    shape = (len(trees), n_internal)
+    layout = np.zeros((), dtype=[("threshold", "<f8", shape), ("value", "<f8", (len(trees), n_internal + 1)),
+                                 ("node_value", "<f8", shape), ("feature", "<i4", shape),
+                                 ("missing_left", "?", shape)])
+
+    for i, tree in enumerate(trees):
+        left, right = np.asarray(tree["left"]), np.asarray(tree["right"])
+        # Source node of each slot on the current level, starting from the root
+        source = np.zeros(1, dtype=int)
+        for level in range(depth):
+            slots = slice(2 ** level - 1, 2 ** (level + 1) - 1)
+            leaf = left[source] < 0
+            layout["feature"][i, slots] = np.where(
+                leaf, 0, np.asarray(tree["feature"])[source])
+            layout["threshold"][i, slots] = np.where(
+                leaf, 0.0, np.asarray(tree["threshold"])[source])
+            layout["missing_left"][i, slots] = np.asarray(
+                tree["missing_left"])[source]
+            layout["node_value"][i, slots] = np.asarray(tree["value"])[source]
+            source = np.stack([np.where(leaf, source, left[source]),
+                               np.where(leaf, source, right[source])], axis=1).ravel()
+        layout["value"][i] = np.asarray(tree["value"])[source]
+
+    return layout
+
+
+def _linked_layout(trees: list[dict]) -> np.ndarray:
+    # Concatenate the trees' nodes, offsetting child indices into the shared arrays. Leaves point back to
+    # themselves, so rows that reach a leaf early stay there while deeper trees are still being walked. Splits
+    # keep their mean value, which predictions never reach but explanations use.
+    n_nodes = sum(len(tree["feature"]) for tree in trees)
+    layout = np.zeros((), dtype=[("threshold", "<f8", n_nodes), ("value", "<f8", n_nodes),
+                                 ("feature", "<i4", n_nodes), ("left", "<i4", n_nodes),
+                                 ("right", "<i4", n_nodes), ("missing_left", "?", n_nodes),
+                                 ("roots", "<i4", len(trees))])
+    offset = 0
+
+    for i, tree in enumerate(trees):
+        nodes = slice(offset, offset + len(tree["feature"]))
+        leaf = np.asarray(tree["left"]) < 0
+        own_index = np.arange(nodes.start, nodes.stop)
+
+        layout["feature"][nodes] = np.where(leaf, 0, tree["feature"])
+        layout["threshold"][nodes] = np.where(leaf, 0.0, tree["threshold"])
+        layout["left"][nodes] = np.where(
+            leaf, own_index, np.asarray(tree["left"]) + offset)
+        layout["right"][nodes] = np.where(
+            leaf, own_index, np.asarray(tree["right"]) + offset)
+        layout["missing_left"][nodes] = tree["missing_left"]
+        layout["value"][nodes] = tree["value"]
+        layout["roots"][i] = offset
+        offset = nodes.stop
+
+    return layout
+
+
+def _layout(trees: list[dict], depth: int) -> tuple[np.ndarray, str]:
+    if depth <= COMPLETE_MAX_DEPTH:
+        return _complete_layout(trees, depth), "complete"
+    return _linked_layout(trees), "linked"
+
+
+def export_xgboost(model) -> tuple[np.ndarray, dict]:
+    """
+    Converts a fitted XGBRegressor into flat node arrays.
+
+    Thresholds and leaf values are read from the booster's JSON dump, so they keep the exact float32 values the library compares and adds. Each split is given the mean of the leaves below it weighted by their hessian cover, as XGBoost's approximate contributions use.
+
+    Args:
+        model (XGBRegressor): A fitted regressor with a squared-error objective.
+
+    Returns:
+        tuple[np.ndarray, dict]: The node arrays, as the fields of a single record, and the metadata `TreeEnsemble` needs to evaluate them.
+    """
+    learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+    trees = []
+    depth = 0
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        # XGBoost keeps each leaf's value in the split condition slot, as a float32 printed in decimal
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        left, right = np.asarray(tree["left_children"]), np.asarray(tree["right_children"])
+        node_depth = _tree_depth(left, right)
+        depth = max(depth, int(node_depth.max()))
+        trees.append({
+            "feature": tree["split_indices"],
+            "threshold": conditions,
+            "left": left,
+            "right": right,
+            "missing_left": np.asarray(tree["default_left"], dtype=bool),
+            "value": _node_means(left, right, conditions, np.asarray(tree["sum_hessian"]), node_depth),
+        })
+
+    layout, layout_name = _layout(trees, depth)
+    metadata = {
+        "model_type": "xgboost",
+        "layout": layout_name,
+        "n_features": int(learner["learner_model_param"]["num_feature"]),
+        "n_trees": len(trees),
+        "max_depth": depth,
+        # x < threshold goes left, as in XGBoost
+        "split": "less",
+        "base_score": float(learner["learner_model_param"]["base_score"].strip("[]")),
+        "aggregation": "sum",
+    }
+    return layout, metadata
+
+
+def export_random_forest(model) -> tuple[np.ndarray, dict]:
+    """
+    Converts a fitted RandomForestRegressor into flat node arrays.
+
+    Each split keeps the mean target of the bootstrap rows that reached it, as scikit-learn stores it.
+
+    Args:
+        model (RandomForestRegressor): A fitted single-output regressor.
+
+    Returns:
+        tuple[np.ndarray, dict]: The node arrays, as the fields of a single record, and the metadata `TreeEnsemble` needs to evaluate them.
+    """
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        trees.append({
+            "feature": tree.feature,
+            "threshold": tree.threshold,
+            "left": tree.children_left,
+            "right": tree.children_right,
+            "missing_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool)),
+            "value": tree.value[:, 0, 0],
+        })
+
+    depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+    layout, layout_name = _layout(trees, depth)
+    metadata = {
+        "model_type": "random_forest",
+        "layout": layout_name,
+        "n_features": int(model.n_features_in_),
+        "n_trees": len(trees),
+        "max_depth": depth,
+        # x <= threshold goes left, as in scikit-learn
+        "split": "less_equal",
+        "base_score": 0.0,
+        "aggregation": "mean",
+    }
+    return layout, metadata
+
+
+def export_trees(model, models_dir: str, model_name: str) -> tuple[str, str]:
+    """
+    Exports a fitted XGBoost or Random Forest regressor as flat node arrays next to its other artifacts.
+
+    The arrays are saved as the fields of a single '.npy' record, so that each one is contiguous and the whole file can be memory-mapped.
+
+    Args:
+        model (XGBRegressor | RandomForestRegressor): The fitted model.
+        models_dir (str): Directory to write to.
+        model_name (str): Name of the model, e.g. 'xgboost' or 'random_forest'.
+
+    Returns:
+        tuple[str, str]: Paths to the written '.npy' node arrays and '.json' metadata.
+    """
+    if hasattr(model, "get_booster"):
+        layout, metadata = export_xgboost(model)
+    elif hasattr(model, "estimators_"):
+        layout, metadata = export_random_forest(model)
+    else:
+        raise TypeError(
+            f"Cannot export {type(model).__name__}; expected an XGBoost or Random Forest regressor")
+
+    nodes_path, metadata_path = trees_paths(models_dir, model_name)
+    np.save(nodes_path, layout)
+    with open(metadata_path, "w") as file:
+        json.dump(metadata, file, indent=2)
+    return nodes_path, metadata_path
+
+
+class TreeEnsemble:
+    """
+    Predicts with an exported tree ensemble, walking every tree for a whole batch at once with NumPy.
+
+    Each step down the trees is a handful of gathers over all (row, tree) pairs of a chunk of rows: the split feature and threshold of each pair's current node, the row's value of that feature, and the next node.
+
+    Attributes:
+        fields (dict[str, np.ndarray]): The node arrays by field name. Memory-mapped read-only when loaded with `mmap=True`, so worker processes share one copy.
+        metadata (dict): The model type, layout, number of features and trees, maximum depth, split rule, base score and aggregation.
+    """
+
+    def __init__(self, fields: dict[str, np.ndarray], metadata: dict):
+        self.fields = fields
+        self.metadata = metadata
+        self._fields = {name: array.reshape(-1)
+                        for name, array in fields.items()}
+        # Go right when the feature is above the threshold (scikit-learn), or not below it (XGBoost)
+        self._goes_right = np.greater if metadata["split"] == "less_equal" else np.greater_equal
+
+    @classmethod
+    def load(cls, models_dir: str, model_name: str, mmap: bool = True) -> "TreeEnsemble":
+        """
+        Loads an ensemble written by `export_trees`.
+
+        Args:
+            models_dir (str): Directory containing the exported ensemble.
+            model_name (str): Name of the model, e.g. 'xgboost' or 'random_forest'.
+            mmap (bool, optional): Memory-map the node arrays instead of reading them into memory. Defaults to True.
+
+        Returns:
+            TreeEnsemble: The loaded ensemble.
+        """
+        nodes_path, metadata_path = trees_paths(models_dir, model_name)
+        with open(metadata_path) as file:
+            metadata = json.load(file)
+        layout = np.load(nodes_path, mmap_mode="r" if mmap else None)
+        return cls({name: layout[name] for name in layout.dtype.names}, metadata)
+
+    def _go_right(self, X: np.ndarray, feature_offsets: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        # Whether each (row, tree) pair leaves `nodes` through the right child, given the offset into the flat
+        # feature matrix of the feature each pair's node splits on
+        fields = self._fields
+        values = np.take(X, feature_offsets)
+        go_right = self._goes_right(values, np.take(fields["threshold"], nodes))
+        missing = np.isnan(values)
+        if missing.any():
+            go_right[missing] = ~np.take(fields["missing_left"], nodes[missing])
+        return go_right
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # Index into the 'value' field of the leaf each (row, tree) pair ends in
+        n_trees, depth = self.metadata["n_trees"], self.metadata["max_depth"]
+        X = X.ravel()
+        row_offsets = (np.arange(len(X) // self.metadata["n_features"], dtype=np.int32)
+                       * self.metadata["n_features"])[:, None]
+
+        if self.metadata["layout"] == "complete":
+            n_internal = 2 ** depth - 1
+            tree_offsets = np.arange(n_trees, dtype=np.int32) * n_internal
+            slots = np.zeros((len(row_offsets), n_trees), dtype=np.int32)
+            for _ in range(depth):
+                nodes = slots + tree_offsets
+                go_right = self._go_right(
+                    X, row_offsets + np.take(self._fields["feature"], nodes), nodes)
+                slots *= 2
+                slots += 1
+                slots += go_right
+            return slots - n_internal + tree_offsets + np.arange(n_trees, dtype=np.int32)
+
+        fields = self._fields
+        nodes = np.broadcast_to(fields["roots"], (len(row_offsets), n_trees))
+        for _ in range(depth):
+            go_right = self._go_right(
+                X, row_offsets + np.take(fields["feature"], nodes), nodes)
+            nodes = np.where(go_right, np.take(
+                fields["right"], nodes), np.take(fields["left"], nodes))
+        return nodes
+
+    def _path_contributions(self, X: np.ndarray) -> np.ndarray:
+        # Walk every (row, tree) pair down its path as `_leaves` does, crediting each split's feature with the change
+        # in node value from the split to the child taken. Summed over the path, the changes telescope from the
+        # root's value to the leaf's.
+        n_features, n_trees, depth = (self.metadata["n_features"], self.metadata["n_trees"],
+                                      self.metadata["max_depth"])
+        fields = self._fields
+        n_rows = len(X)
+        X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        totals = np.zeros(n_rows * n_features)
+
+        if self.metadata["layout"] == "complete":
+            n_internal = 2 ** depth - 1
+            tree_offsets = np.arange(n_trees, dtype=np.int32) * n_internal
+            slots = np.zeros((n_rows, n_trees), dtype=np.int32)
+            node_values = np.broadcast_to(np.take(fields["node_value"], tree_offsets), slots.shape)
+            for level in range(depth):
+                nodes = slots + tree_offsets
+                feature_offsets = row_offsets + np.take(fields["feature"], nodes)
+                slots = 2 * slots + 1 + self._go_right(X, feature_offsets, nodes)
+                if level < depth - 1:
+                    child_values = np.take(fields["node_value"], slots + tree_offsets)
+                else:
+                    child_values = np.take(fields["value"], slots - n_internal + tree_offsets
+                                           + np.arange(n_trees, dtype=np.int32))
+                totals += np.bincount(feature_offsets.ravel(), weights=(child_values - node_values).ravel(),
+                                      minlength=len(totals))
+                node_values = child_values
+        else:
+            nodes = np.broadcast_to(fields["roots"], (n_rows, n_trees))
+            node_values = np.take(fields["value"], nodes)
+            for _ in range(depth):
+                feature_offsets = row_offsets + np.take(fields["feature"], nodes)
+                nodes = np.where(self._go_right(X, feature_offsets, nodes),
+                                 np.take(fields["right"], nodes), np.take(fields["left"], nodes))
+                child_values = np.take(fields["value"], nodes)
+                totals += np.bincount(feature_offsets.ravel(), weights=(child_values - node_values).ravel(),
+                                      minlength=len(totals))
+                node_values = child_values
+
+        return totals.reshape(n_rows, n_features)
+
+    def predict(self, X: np.ndarray, chunk_size: int = 1024) -> np.ndarray:
+        """
+        Predicts the premiums of a batch of scaled, encoded feature rows.
+
+        Args:
+            X (np.ndarray): Feature matrix of shape (rows, features), as passed to the library model's `predict`.
+            chunk_size (int, optional): Rows walked at a time, to keep the (rows, trees) working arrays in cache. Defaults to 1024.
+
+        Returns:
+            np.ndarray: The predicted premium of each row.
+        """
+        # Both libraries compare features as float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        predictions = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            leaf_values = np.take(
+                self._fields["value"], self._leaves(X[start:start + chunk_size]))
+            if self.metadata["aggregation"] == "mean":
+                predictions[start:start + chunk_size] = leaf_values.mean(axis=1)
+            else:
+                predictions[start:start + chunk_size] = leaf_values.sum(axis=1)
+        return predictions + self.metadata["base_score"]
+
+    @property
+    def expected_value(self) -> float:
+        """
+        The premium before any split is taken: the base score plus the combined value of the trees' roots.
+        """
+        if self.metadata["layout"] == "complete":
+            n_internal = 2 ** self.metadata["max_depth"] - 1
+            roots = np.asarray(self.fields["node_value"]).reshape(-1, n_internal)[:, 0]
+        else:
+            roots = np.take(self._fields["value"], self._fields["roots"])
+        combined = roots.mean() if self.metadata["aggregation"] == "mean" else roots.sum()
+        return float(combined + self.metadata["base_score"])
+
+    def contributions(self, X: np.ndarray, chunk_size: int = 1024) -> np.ndarray:
+        """
+        Splits each prediction into the contribution of every feature along the paths the row takes through the trees.
+
+        A split credits its feature with the change in expected premium between the split and the child the row goes to. This is the path attribution of XGBoost's approximate contributions, computed for the whole batch with the same gathers as `predict` rather than by perturbing the inputs. For each row, `expected_value` plus the contributions gives the prediction.
+
+        Args:
+            X (np.ndarray): Feature matrix of shape (rows, features), as passed to the library model's `predict`.
+            chunk_size (int, optional): Rows walked at a time. Defaults to 1024.
+
+        Returns:
+            np.ndarray: The contribution of each feature to each row's premium, of shape (rows, features).
+
+        Raises:
+            ValueError: If the ensemble was exported without the mean value of its splits.
+        """
+        if self.metadata["layout"] == "complete" and "node_value" not in self._fields:
+            raise ValueError(
+                "The tree ensemble was exported without split values; re-export it to explain its predictions")
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        contributions = np.empty((len(X), self.metadata["n_features"]))
+        for start in range(0, len(X), chunk_size):
+            contributions[start:start + chunk_size] = self._path_contributions(
+                X[start:start + chunk_size])
+        if self.metadata["aggregation"] == "mean":
+            contributions /= self.metadata["n_trees"]
+        return contributions
+
+
+def _sample_features(artifacts: dict, n_rows: int, seed: int = 0) -> np.ndarray:
+    # Scaled, encoded features of synthetic policies, as the model sees them
+    from src.credit import add_credit_category
+    from src.dataset import generate_policies
+    from src.modeling.predict import _scale_features
+
+    data = add_credit_category(generate_policies(n_rows, seed))
+    return _scale_features(artifacts["encoder"].transform(data), artifacts)
+
+
+def check_equivalence(models_dir: str, model_name: str, n_rows: int = 100_000) -> dict:
+    """
+    Compares the exported ensemble's predictions with the library model's `predict` on synthetic policies, and checks that its contributions add up to its predictions.
+
+    Args:
+        models_dir (str): Directory containing the saved model and its exported ensemble.
+        model_name (str): Name of the model, e.g. 'xgboost' or 'random_forest'.
+        n_rows (int, optional): Number of policies to compare on. Defaults to 100000.
+
+    Returns:
+        dict: The largest absolute and relative differences, 'max_abs_difference' and 'max_rel_difference', and the largest gap between the expected value plus the contributions and the prediction, 'max_contribution_gap'.
+    """
+    from src.modeling.predict import load_artifacts
+
+    artifacts = load_artifacts(models_dir, model_name)
+    X = _sample_features(artifacts, n_rows)
+    expected = artifacts["model"].predict(X)
+    ensemble = TreeEnsemble.load(models_dir, model_name)
+    actual = ensemble.predict(X)
+    explained = ensemble.expected_value + ensemble.contributions(X).sum(axis=1)
+
+    difference = np.abs(actual - expected)
+    return {
+        "max_abs_difference": float(difference.max()),
+        "max_rel_difference": float((difference / np.maximum(np.abs(expected), 1e-12)).max()),
+        "max_contribution_gap": float(np.abs(explained - actual).max()),
+    }
+
+
+def benchmark(models_dir: str, model_name: str, batch_size: int = 100_000, n_quotes: int = 500) -> dict:
+    """
+    Measures single-quote latency and batch throughput of the exported ensemble against the library model.
+
+    Both are timed on a single thread, as each scoring worker runs.
+
+    Args:
+        models_dir (str): Directory containing the saved model and its exported ensemble.
+        model_name (str): Name of the model, e.g. 'xgboost' or 'random_forest'.
+        batch_size (int, optional): Rows in the timed batch. Defaults to 100000.
+        n_quotes (int, optional): Number of single quotes to time. Defaults to 500.
+
+    Returns:
+        dict: For the 'library' and 'exported' predictors, the median single-quote latency in microseconds and the batch throughput in rows per second.
+    """
+    from threadpoolctl import threadpool_limits
+
+    from src.modeling.predict import load_artifacts
+
+    artifacts = load_artifacts(models_dir, model_name)
+    model = artifacts["model"]
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    X = _sample_features(artifacts, batch_size)
+    predictors = {"library": model.predict,
+                  "exported": TreeEnsemble.load(models_dir, model_name).predict}
+
+    results = {}
+    with threadpool_limits(limits=1):
+        for name, predict in predictors.items():
+            latencies = []
+            for row in X[:n_quotes]:
+                start = time.perf_counter()
+                predict(row[None, :])
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            predict(X)
+            batch_seconds = time.perf_counter() - start
+
+            results[name] = {
+                "median_latency_us": float(np.median(latencies) * 1e6),
+                "rows_per_second": batch_size / batch_seconds,
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export tree ensembles as flat node arrays, check them against the library models and benchmark them.")
+    parser.add_argument("--models-dir", default=os.path.join(project_root, "models"),
+                        help="Directory containing the saved artifacts.")
+    parser.add_argument("--model", action="append", choices=["xgboost", "random_forest"],
+                        help="Model to process; may be repeated. Defaults to every saved tree ensemble.")
+    parser.add_argument("--export", action="store_true",
+                        help="Export the saved models' node arrays.")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare the exported ensembles' predictions with the library models.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Measure single-quote latency and 100k-row batch throughput.")
+    args = parser.parse_args()
+
+    model_names = args.model or [name for name in ["xgboost", "random_forest"]
+                                 if os.path.exists(os.path.join(args.models_dir, f"{name}_model.joblib"))]
+
+    for model_name in model_names:
+        if args.export:
+            import joblib
+
+            nodes_path, _ = export_trees(joblib.load(os.path.join(args.models_dir, f"{model_name}_model.joblib")),
+                                         args.models_dir, model_name)
+            print(f"Exported {nodes_path}")
+
+        if args.check:
+            result = check_equivalence(args.models_dir, model_name)
+            print(f"{model_name}: largest difference from the library model "
+                  f"{result['max_abs_difference']:.2e} ({result['max_rel_difference']:.2e} relative), "
+                  f"contributions add up to within {result['max_contribution_gap']:.2e}")
+
+        if args.benchmark:
+            results = benchmark(args.models_dir, model_name)
+            for name, result in results.items():
+                print(f"{model_name} {name:<8} single quote {result['median_latency_us']:8.1f} µs, "
+                      f"100k batch {result['rows_per_second']:12,.0f} rows/s")
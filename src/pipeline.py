@@ -0,0 +1,345 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+import pandas as pd
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.clean_data import clean_file  # noqa: E402
+from src.dataset import generate_dataset  # noqa: E402
+from src.features import build_features_file  # noqa: E402
+from src.modeling.predict import MODELS_DIR  # noqa: E402
+from src.modeling.train import ARTIFACT_FILES, train_file  # noqa: E402
+from src.storage import FORMAT_EXTENSIONS, with_format  # noqa: E402
+
+# Directory holding the raw, interim and processed datasets
+DATA_DIR = os.path.join(project_root, "data")
+
+# Directory holding the stage manifest and the log of pipeline runs
+CACHE_DIR = os.path.join(project_root, ".pipeline")
+
+# Source files whose contents each stage's output depends on
+STAGE_CODE = {
+    "generate": ["src/dataset.py", "src/storage.py"],
+    "clean": ["src/clean_data.py", "src/schema.py", "src/storage.py"],
+    "features": ["src/features.py", "src/schema.py", "src/storage.py"],
+    "train": ["src/modeling/train.py", "src/modeling/bundle.py", "src/modeling/linear_scorer.py",
+              "src/modeling/tree_ensemble.py", "src/modeling/drift.py", "src/credit.py", "src/features.py",
+              "src/schema.py", "src/storage.py"],
+}
+
+# Libraries whose versions are part of every stage's fingerprint
+LIBRARIES = ["numpy", "pandas", "pyarrow", "scikit-learn", "xgboost"]
+
+# Parameters that change how fast a stage runs but not what it produces
+NON_SEMANTIC_PARAMS = {"workers"}
+
+
+def build_stages(data_format: str = "csv", data_dir: str = DATA_DIR, models_dir: str = MODELS_DIR,
+                 generate_rows: int | None = None, seed: int = 42, chunksize: int | None = None,
+                 search: str = "none", search_space: dict | None = None, n_iter: int = 10,
+                 cv_folds: int = 0, workers: int | None = None) -> list[dict]:
+    """
+    Builds the stage graph of the pipeline: generate (optional) → clean → features → train.
+
+    Each stage reads the outputs of the one before it, so the list is already in run order.
+
+    Args:
+        data_format (str, optional): Storage format of the datasets passed between stages. Defaults to 'csv'.
+        data_dir (str, optional): Directory holding the 'raw', 'interim' and 'processed' datasets. Defaults to the project's 'data' directory.
+        models_dir (str, optional): Directory to save the trained models to. Defaults to the project's 'models' directory.
+        generate_rows (int, optional): Generate a synthetic raw dataset of this many policies instead of using the committed one. Defaults to None.
+        seed (int, optional): Seed of the synthetic dataset. Defaults to 42.
+        chunksize (int, optional): Stream the cleaning and feature stages in chunks of this many rows. Only supported for CSV. Defaults to None.
+        search (str, optional): Hyperparameter search of the training stage: 'none', 'grid' or 'random'. Defaults to 'none'.
+        search_space (dict, optional): Values to try for each hyperparameter of each model. Defaults to the training stage's own.
+        n_iter (int, optional): Number of combinations sampled per model by the random search. Defaults to 10.
+        cv_folds (int, optional): Number of cross-validation folds, or 0 to skip cross-validation. Defaults to 0.
+        workers (int, optional): Number of worker processes of the training stage. Defaults to the number of CPU cores.
+
+    Returns:
+        list[dict]: Each stage's 'name', the 'function' that runs it and its keyword arguments ('kwargs'), and its 'inputs', 'outputs' and 'code' files.
+    """
+    raw_path = os.path.join(data_dir, "raw", "car_insurance_premiums_dataset.csv")
+    cleaned_path = with_format(os.path.join(
+        data_dir, "interim", "processed_data.csv"), data_format)
+    features_path = with_format(os.path.join(
+        data_dir, "processed", "cleaned_data.csv"), data_format)
+    stages = []
+
+    if generate_rows:
+        raw_path = with_format(os.path.join(
+            data_dir, "raw", "synthetic_policies.csv"), data_format)
+        stages.append({
+            "name": "generate",
+            "function": generate_dataset,
+            "kwargs": {"output_path": raw_path, "n_rows": generate_rows, "shard_size": generate_rows,
+                       "seed": seed},
+            "inputs": [],
+            "outputs": [raw_path],
+        })
+
+    stages.append({
+        "name": "clean",
+        "function": clean_file,
+        "kwargs": {"input_path": raw_path, "output_path": cleaned_path, "chunksize": chunksize},
+        "inputs": [raw_path],
+        "outputs": [cleaned_path],
+    })
+    stages.append({
+        "name": "features",
+        "function": build_features_file,
+        "kwargs": {"input_path": cleaned_path, "output_path": features_path, "chunksize": chunksize},
+        "inputs": [cleaned_path],
+        "outputs": [features_path],
+    })
+    stages.append({
+        "name": "train",
+        "function": train_file,
+        "kwargs": {"data_path": features_path, "save_dir": models_dir, "search": search,
+                   "search_space": search_space, "n_iter": n_iter, "workers": workers, "cv_folds": cv_folds},
+        "inputs": [features_path],
+        "outputs": [os.path.join(models_dir, file_name) for file_name in ARTIFACT_FILES],
+    })
+
+    for stage in stages:
+        stage["code"] = [os.path.join(project_root, path)
+                         for path in STAGE_CODE[stage["name"]]]
+    return stages
+
+
+def _relative(path: str) -> str:
+    return os.path.relpath(path, project_root)
+
+
+def file_digest(path: str, known_digests: dict) -> str:
+    """
+    Hashes the contents of a file, reusing the stored digest when its size and modification time have not changed.
+
+    Args:
+        path (str): Path to the file.
+        known_digests (dict): Digests from earlier runs, keyed by path relative to the project root, as [size, mtime_ns, digest]. Updated in place.
+
+    Returns:
+        str: The hex digest of the file's contents.
+    """
+    stat = os.stat(path)
+    key = [stat.st_size, stat.st_mtime_ns]
+    known = known_digests.get(_relative(path))
+    if known is not None and known[:2] == key:
+        return known[2]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while block := file.read(1 << 20):
+            digest.update(block)
+    known_digests[_relative(path)] = key + [digest.hexdigest()]
+    return digest.hexdigest()
+
+
+def _library_versions() -> dict:
+    versions = {"python": sys.version.split()[0]}
+    for library in LIBRARIES:
+        try:
+            versions[library] = version(library)
+        except PackageNotFoundError:
+            versions[library] = None
+    return versions
+
+
+def stage_fingerprint(stage: dict, known_digests: dict) -> str:
+    """
+    Fingerprints everything a stage's output depends on: the contents of its input files and source code, its parameters and the library versions.
+
+    Args:
+        stage (dict): A stage, as returned by `build_stages`.
+        known_digests (dict): Digests from earlier runs, as used by `file_digest`. Updated in place.
+
+    Returns:
+        str: The hex digest of the stage's inputs, code and parameters.
+    """
+    params = {name: value for name, value in stage["kwargs"].items()
+              if name not in NON_SEMANTIC_PARAMS}
+    payload = {
+        "name": stage["name"],
+        "params": params,
+        "inputs": {_relative(path): file_digest(path, known_digests) for path in stage["inputs"]},
+        "code": {_relative(path): file_digest(path, known_digests) for path in stage["code"]},
+        "libraries": _library_versions(),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _outputs_unchanged(stage: dict, recorded: dict, known_digests: dict) -> bool:
+    # The cached outputs must still exist with the contents the stage wrote
+    return all(os.path.exists(path) and recorded.get(_relative(path)) == file_digest(path, known_digests)
+               for path in stage["outputs"])
+
+
+def _run_stage(function, kwargs: dict) -> tuple:
+    # Runs in a fresh process, so its peak resident set size is the stage's own (in bytes; Linux reports KiB).
+    # Worker pools the stage starts, such as the training trials', are its children and count once they exit.
+    result = function(**kwargs)
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return result, peak_rss * 1024
+
+
+def run_isolated(function, kwargs: dict) -> tuple[object, dict]:
+    """
+    Runs a function in a fresh process and measures its wall time and peak memory on their own.
+
+    Args:
+        function (Callable): A module-level function, so that it can be sent to the process.
+        kwargs (dict): Its keyword arguments.
+
+    Returns:
+        tuple[object, dict]: The function's return value, and a dict of the wall time in 'seconds' and the 'peak_memory_mb', the largest peak resident set of the process and of any worker process it started and waited for.
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        result, peak_memory = executor.submit(_run_stage, function, kwargs).result()
+    return result, {"seconds": time.perf_counter() - start, "peak_memory_mb": peak_memory / 2**20}
+
+
+def _load_manifest(cache_dir: str) -> dict:
+    path = os.path.join(cache_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {"stages": {}, "file_digests": {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def _save_manifest(manifest: dict, cache_dir: str) -> None:
+    # Write to a temporary file first so that an interrupted run never leaves a truncated manifest
+    path = os.path.join(cache_dir, "manifest.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def run_pipeline(stages: list[dict], cache_dir: str = CACHE_DIR, force: list[str] | None = None,
+                 dry_run: bool = False) -> pd.DataFrame:
+    """
+    Runs the stages in order, skipping every stage whose fingerprint matches its last run and whose outputs are unchanged.
+
+    Each stage that runs does so in a fresh process so that its peak memory can be measured on its own. The manifest is saved after every stage, so an interrupted run keeps the stages that finished. Every run is appended to 'runs.csv' in the cache directory.
+
+    Args:
+        stages (list[dict]): The stages, as returned by `build_stages`.
+        cache_dir (str, optional): Directory holding the manifest and the run log. Defaults to '.pipeline' in the project root.
+        force (list[str], optional): Names of stages to run even if they are cached, or ['all']. Defaults to None.
+        dry_run (bool, optional): Only report which stages would run. Defaults to False.
+
+    Returns:
+        pd.DataFrame: One row per stage with its 'status' ('cached', 'ran' or, in a dry run, 'stale'), wall time in 'seconds', 'peak_memory_mb' and 'fingerprint'.
+    """
+    force = set(force or [])
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    known_digests = manifest["file_digests"]
+    report = []
+    upstream_stale = False
+
+    for stage in stages:
+        name = stage["name"]
+        recorded = manifest["stages"].get(name, {})
+
+        # In a dry run, stages after a stale one cannot be fingerprinted before their inputs are rebuilt
+        if dry_run and upstream_stale:
+            report.append({"stage": name, "status": "stale", "seconds": None,
+                           "peak_memory_mb": None, "fingerprint": None})
+            continue
+
+        fingerprint = stage_fingerprint(stage, known_digests)
+        cached = (name not in force and "all" not in force
+                  and recorded.get("fingerprint") == fingerprint
+                  and _outputs_unchanged(stage, recorded.get("outputs", {}), known_digests))
+
+        if cached or dry_run:
+            upstream_stale = not cached
+            report.append({"stage": name, "status": "cached" if cached else "stale", "seconds": None,
+                           "peak_memory_mb": None, "fingerprint": fingerprint})
+            continue
+
+        for path in stage["outputs"]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        _, measured = run_isolated(stage["function"], stage["kwargs"])
+
+        manifest["stages"][name] = {
+            "fingerprint": fingerprint,
+            "outputs": {_relative(path): file_digest(path, known_digests) for path in stage["outputs"]},
+            **measured,
+        }
+        _save_manifest(manifest, cache_dir)
+        report.append({"stage": name, "status": "ran", **measured, "fingerprint": fingerprint})
+
+    _save_manifest(manifest, cache_dir)
+    report = pd.DataFrame(report)
+
+    if not dry_run:
+        runs_path = os.path.join(cache_dir, "runs.csv")
+        report.assign(run_at=datetime.now(timezone.utc).isoformat(timespec="seconds")).to_csv(
+            runs_path, mode="a", header=not os.path.exists(runs_path), index=False)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the data and training pipeline, skipping stages whose inputs, code and parameters have not changed.")
+    parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv",
+                        help="Storage format of the datasets passed between stages.")
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help="Directory holding the raw, interim and processed datasets.")
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="Directory to save the trained models to.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="Directory holding the stage manifest and the run log.")
+    parser.add_argument("--generate-rows", type=int, default=None,
+                        help="Generate a synthetic raw dataset of this many policies.")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Seed of the synthetic dataset.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the cleaning and feature stages in chunks of this many rows.")
+    parser.add_argument("--search", choices=["none", "grid", "random"], default="none",
+                        help="Search for the best hyperparameters of each model before training it.")
+    parser.add_argument("--search-space", default=None,
+                        help="JSON file of the values to try for each hyperparameter of each model.")
+    parser.add_argument("--n-iter", type=int, default=10,
+                        help="Number of combinations sampled per model by the random search.")
+    parser.add_argument("--cv", type=int, default=0,
+                        help="Cross-validate every trial on this many folds of the training set.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes of the training stage.")
+    parser.add_argument("--force", nargs="*", default=[],
+                        help="Stages to run even if they are cached, or 'all'.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which stages would run.")
+    args = parser.parse_args()
+
+    if args.chunksize and args.format != "csv":
+        parser.error("--chunksize only supports the csv format")
+
+    search_space = None
+    if args.search_space:
+        with open(args.search_space) as file:
+            search_space = json.load(file)
+
+    stages = build_stages(args.format, args.data_dir, args.models_dir, args.generate_rows, args.seed,
+                          args.chunksize, args.search, search_space, args.n_iter, args.cv, args.workers)
+    report = run_pipeline(stages, args.cache_dir, args.force, args.dry_run)
+    print(report.drop(columns="fingerprint").to_string(index=False))
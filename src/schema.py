@@ -0,0 +1,159 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to sys.path so that `src` resolves when run as a script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.dataset import generate_policies  # noqa: E402
+from src.storage import iter_dataset, read_dataset  # noqa: E402
+
+# Fixed vocabulary of each categorical column, sorted so that one-hot encoding keeps the same column order
+CATEGORIES = {
+    "Gender": ["Female", "Male"],
+    "Region": ["Eastern Cape", "Free State", "Gauteng", "KwaZulu-Natal", "Limpopo", "Mpumalanga",
+               "North West", "Northern Cape", "Western Cape"],
+    # 'Self-employed' comes from the raw data and 'Self-Employed' from the employment status fixes
+    "Employment_Status": ["Employed", "Retired", "Self-Employed", "Self-employed", "Student", "Unemployed"],
+    "Education_Level": ["Degree", "Diploma", "High School", "Postgraduate"],
+    "Car_Make": ["BMW", "Ford", "Hyundai", "Mercedes", "Toyota", "Volkswagen"],
+    "Car_Model": ["118i", "320i", "A200", "C200", "Corolla", "Creta", "EcoSport", "Fiesta", "Fortuner", "GLA",
+                  "Golf", "Hilux", "Polo", "Ranger", "Tiguan", "Tucson", "X5", "i20"],
+    "Marital_Status": ["Divorced", "Married", "Single", "Widowed"],
+    "Vehicle_Usage": ["Business", "Commercial", "Private"],
+    "Credit_Category": ["Excellent", "Fair", "Good", "Poor", "Very Good"],
+}
+
+# Smallest signed integer type that holds each integer column
+# (signed, because train.py leaves uint8 columns unscaled as one-hot encodings)
+INTEGER_DTYPES = {
+    "Customer_ID": "int32",
+    "Age": "int8",
+    "Years_Driving": "int8",
+    "Manufacture_Year": "int16",
+    "Annual_Mileage": "int32",
+    "Number_of_Accidents": "int8",
+    "Number_of_Claims": "int8",
+    "Car_Value": "int32",
+    "Premium_Amount": "int32",
+    "Policy_Term": "int8",
+    "Credit_Score": "int16",
+}
+
+# Yes/no columns stored as booleans
+BOOLEAN_COLUMNS = ["Has_AntiTheft_Device"]
+
+# Types to parse CSV columns as, so that strings never load as Python objects
+CSV_DTYPES = {col: "category" for col in CATEGORIES}
+
+
+def apply_schema(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the policy columns of a DataFrame to their compact types: fixed-vocabulary categoricals, the smallest integer types that hold them and booleans.
+
+    Columns that are not part of the schema, such as one-hot encoded features, are left as they are, and so are integer columns with missing values.
+
+    Args:
+        data (pd.DataFrame): Policy records with any subset of the raw columns.
+
+    Returns:
+        pd.DataFrame: The records with the compact types.
+
+    Raises:
+        ValueError: If a categorical column has a value outside its vocabulary, or an integer column a value outside the range of its type.
+    """
+    dtypes = {}
+
+    for col, categories in CATEGORIES.items():
+        if col in data:
+            unknown = set(data[col].dropna().unique()) - set(categories)
+            if unknown:
+                raise ValueError(
+                    f"Unexpected values in {col}: {', '.join(map(str, sorted(unknown)))}")
+            dtypes[col] = pd.CategoricalDtype(categories)
+
+    for col, dtype in INTEGER_DTYPES.items():
+        if col in data and not data[col].isna().any():
+            limits = np.iinfo(dtype)
+            if data[col].min() < limits.min or data[col].max() > limits.max:
+                raise ValueError(f"Values of {col} do not fit in {dtype}")
+            dtypes[col] = dtype
+
+    for col in BOOLEAN_COLUMNS:
+        if col in data and not data[col].isna().any():
+            dtypes[col] = bool
+
+    return data.astype(dtypes)
+
+
+def read_policies(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Loads a policy dataset from CSV, Parquet or Arrow IPC with the compact types of `apply_schema`.
+
+    Args:
+        path (str): Path to the dataset.
+        columns (list[str], optional): Columns to load, in the order they should be returned. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The loaded dataset.
+    """
+    return apply_schema(read_dataset(path, columns, dtype=CSV_DTYPES))
+
+
+def iter_policies(path: str, chunksize: int = 100_000, columns: list[str] | None = None):
+    """
+    Reads a policy dataset in chunks with the compact types of `apply_schema`.
+
+    Args:
+        path (str): Path to a CSV, Parquet or Arrow IPC dataset.
+        chunksize (int, optional): Maximum number of rows per chunk. Defaults to 100000.
+        columns (list[str], optional): Columns to load. Defaults to all columns.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    for chunk in iter_dataset(path, chunksize, columns, dtype=CSV_DTYPES):
+        yield apply_schema(chunk)
+
+
+def memory_report(n_rows: int = 1_000_000, seed: int = 42) -> pd.DataFrame:
+    """
+    Compares the in-memory size of a synthetic policy book loaded from CSV with pandas' default types and with the compact schema.
+
+    Args:
+        n_rows (int, optional): Number of policies to generate. Defaults to 1000000.
+        seed (int, optional): Seed of the generated policies. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: One row per column, plus a 'Total' row, with the bytes per row under each representation and their ratio.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "policies.csv")
+        generate_policies(n_rows, seed).to_csv(path, index=False)
+        default = pd.read_csv(path).memory_usage(deep=True, index=False)
+        compact = read_policies(path).memory_usage(deep=True, index=False)
+
+    report = pd.DataFrame({
+        "default_bytes_per_row": default / n_rows,
+        "compact_bytes_per_row": compact / n_rows,
+    })
+    report.loc["Total"] = report.sum()
+    report["ratio"] = report["default_bytes_per_row"] / \
+        report["compact_bytes_per_row"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report the memory used per row by the policy dataset with default and compact types.")
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="Number of policies to generate.")
+    args = parser.parse_args()
+
+    print(memory_report(args.rows).round(2).to_string())
@@ -0,0 +1,231 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# File extension used for each supported storage format
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+
+def with_format(path: str, file_format: str) -> str:
+    """
+    Replaces the extension of a dataset path with the extension of the given storage format.
+
+    Args:
+        path (str): Path to the dataset, with or without an extension.
+        file_format (str): One of 'csv', 'parquet' or 'arrow'.
+
+    Returns:
+        str: The path with the extension of the requested format.
+    """
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[file_format]
+
+
+def _format_of(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    for file_format, format_extension in FORMAT_EXTENSIONS.items():
+        if extension == format_extension:
+            return file_format
+    if extension == ".feather":
+        return "arrow"
+    raise ValueError(f"Unsupported dataset format: {path}")
+
+
+def dataset_columns(path: str) -> list[str]:
+    """
+    Reads the column names of a dataset without loading its rows.
+
+    Args:
+        path (str): Path to a CSV, Parquet or Arrow IPC dataset.
+
+    Returns:
+        list[str]: The column names in file order.
+    """
+    file_format = _format_of(path)
+    if file_format == "parquet":
+        return pq.read_schema(path).names
+    if file_format == "arrow":
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).schema.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_dataset(path: str, columns: list[str] | None = None, dtype: dict | None = None) -> pd.DataFrame:
+    """
+    Loads a dataset from CSV, Parquet or Arrow IPC, chosen by the file extension.
+
+    Dictionary-encoded columns in Parquet and Arrow files are restored as pandas categoricals. Only the requested columns are read from Parquet and Arrow files, and Arrow files are memory-mapped.
+
+    Args:
+        path (str): Path to the dataset.
+        columns (list[str], optional): Columns to load, in the order they should be returned. Defaults to all columns.
+        dtype (dict, optional): Types to parse CSV columns as. Parquet and Arrow files keep their stored types. Defaults to pandas' inferred types.
+
+    Returns:
+        pd.DataFrame: The loaded dataset.
+    """
+    file_format = _format_of(path)
+    if file_format == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if file_format == "arrow":
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    data = pd.read_csv(path, usecols=columns, dtype=dtype)
+    return data if columns is None else data[columns]
+
+
+def write_dataset(data: pd.DataFrame, path: str) -> None:
+    """
+    Saves a dataset as CSV, Parquet or Arrow IPC, chosen by the file extension.
+
+    For Parquet and Arrow files, string columns are stored as dictionary-encoded categoricals. Arrow files are written uncompressed so that they can be memory-mapped when read back.
+
+    Args:
+        data (pd.DataFrame): The dataset to save.
+        path (str): Path to write the dataset to.
+    """
+    file_format = _format_of(path)
+    if file_format == "csv":
+        data.to_csv(path, index=False)
+        return
+
+    string_columns = data.select_dtypes(include=object).columns
+    data = data.astype({col: "category" for col in string_columns})
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    if file_format == "parquet":
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def iter_dataset(path: str, batch_size: int = 100_000, columns: list[str] | None = None, dtype: dict | None = None):
+    """
+    Reads a CSV, Parquet or Arrow IPC dataset in batches of at most `batch_size` rows.
+
+    Args:
+        path (str): Path to the dataset.
+        batch_size (int, optional): Maximum number of rows per batch. Defaults to 100000.
+        columns (list[str], optional): Columns to load. Defaults to all columns.
+        dtype (dict, optional): Types to parse CSV columns as. Parquet and Arrow files keep their stored types. Defaults to pandas' inferred types.
+
+    Yields:
+        pd.DataFrame: The next batch of rows.
+    """
+    file_format = _format_of(path)
+    if file_format == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size, dtype=dtype)
+        return
+
+    if file_format == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=batch_size, columns=columns)
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        batches = table.to_batches(max_chunksize=batch_size)
+
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+class DatasetWriter:
+    """
+    Appends batches of rows to a CSV, Parquet or Arrow IPC file, chosen by the file extension.
+
+    The schema is taken from the first batch. Use as a context manager so that Parquet and Arrow files are finalised.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file_format = _format_of(path)
+        self._writer = None
+        self._schema = None
+        self._header_written = False
+
+    def write(self, data: pd.DataFrame) -> None:
+        """
+        Appends a batch of rows to the file.
+
+        Args:
+            data (pd.DataFrame): The rows to append.
+        """
+        if self.file_format == "csv":
+            data.to_csv(self.path, mode="a" if self._header_written else "w",
+                        header=not self._header_written, index=False)
+            self._header_written = True
+            return
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.file_format == "parquet":
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def compare_formats(path: str, output_dir: str, repeat: int = 5) -> pd.DataFrame:
+    """
+    Benchmarks the file size and load time of a dataset in every supported storage format.
+
+    Args:
+        path (str): Path to the dataset to convert.
+        output_dir (str): Directory to write the converted copies to.
+        repeat (int, optional): Number of loads to take the best time from. Defaults to 5.
+
+    Returns:
+        pd.DataFrame: One row per format with the file size in bytes and the best load time in seconds.
+    """
+    data = read_dataset(path)
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+
+    for file_format in FORMAT_EXTENSIONS:
+        output_path = with_format(os.path.join(
+            output_dir, os.path.basename(path)), file_format)
+        write_dataset(data, output_path)
+
+        load_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            read_dataset(output_path)
+            load_times.append(time.perf_counter() - start)
+
+        results.append({
+            "format": file_format,
+            "size_bytes": os.path.getsize(output_path),
+            "load_seconds": min(load_times),
+        })
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the file size and load time of a dataset stored as CSV, Parquet and Arrow IPC.")
+    parser.add_argument("path", help="Path to the dataset to benchmark.")
+    parser.add_argument("--output-dir", default="benchmark_storage",
+                        help="Directory to write the converted copies to.")
+    args = parser.parse_args()
+
+    print(compare_formats(args.path, args.output_dir).to_string(index=False))
@@ -0,0 +1,67 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+
+import streamlit as st
+
+# Load environment variables, which may turn profiling on
+load_dotenv()
+
+# Get the absolute path to the project root (one level up from this file)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Add the project root directory to sys.path
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.instrumentation import (METRICS_FILE, PROFILE_ENV_VAR,  # noqa: E402
+                                 RECORDER, profilers)
+
+# This page is left out of the navigation; the home page shows it when opened with '?view=diagnostics'
+st.set_page_config(page_title="Diagnostics", page_icon="🩺", layout="wide")
+
+st.title("🩺 Diagnostics")
+
+enabled = profilers()
+st.caption(f"Timings of every session served by this process (pid {os.getpid()}) since {RECORDER.started_at}. "
+           + (f"Profiling with {' and '.join(sorted(enabled))}." if enabled
+              else f"Set {PROFILE_ENV_VAR}=cprofile,tracemalloc in .env to profile quotes and sweeps."))
+
+col1, col2, _ = st.columns([1, 1, 4])
+with col1:
+    if st.button("Export metrics"):
+        st.success(f"Written to {RECORDER.export(METRICS_FILE)}")
+with col2:
+    if st.button("Reset"):
+        RECORDER.reset()
+
+snapshot = RECORDER.snapshot()
+spans = snapshot["spans"]
+
+st.header("Timing spans")
+if not spans:
+    st.info("Nothing has been timed yet. Get a premium on the Prediction page, then come back.")
+else:
+    columns = ["count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "total_ms"]
+    st.dataframe({"Span": list(spans), **{col: [summary[col] for summary in spans.values()] for col in columns}},
+                 hide_index=True)
+    st.bar_chart({"Span": list(spans), "Total time (ms)": [summary["total_ms"] for summary in spans.values()]},
+                 x="Span", y="Total time (ms)", horizontal=True)
+
+    name = st.selectbox("Latency histogram of:", list(spans))
+    buckets = spans[name]["buckets"]
+    st.bar_chart({"Up to (ms)": [f"{bound:.3g}" if bound is not None else "longer" for bound, _ in buckets],
+                  "Count": [count for _, count in buckets]}, x="Up to (ms)", y="Count")
+
+st.header("Profiles")
+if not snapshot["profiles"]:
+    st.info("No profiles recorded yet.")
+for name, profile in snapshot["profiles"].items():
+    with st.expander(f"{name} at {profile['recorded_at']}"):
+        if "cprofile" in profile:
+            st.code(profile["cprofile"], language=None)
+        if "tracemalloc" in profile:
+            memory = profile["tracemalloc"]
+            st.write(f"Peak traced memory: {memory['peak_bytes'] / 1024:,.1f} KiB")
+            st.dataframe(memory["top"], hide_index=True)
@@ -1,5 +1,13 @@
+import os
+import runpy
+
 import streamlit as st
 
+# The diagnostics page is kept out of the navigation; open it with '?view=diagnostics'
+if st.query_params.get("view") == "diagnostics":
+    runpy.run_path(os.path.join(os.path.dirname(__file__), "diagnostics.py"))
+    st.stop()
+
 st.set_page_config(page_title="Home", page_icon="🚙", layout="centered")
 
 st.title("🚙 Car Insurance Premium Predictor")
@@ -3,8 +3,7 @@ import os
 import sys
 import time
 
-import joblib
-import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
 
 import streamlit as st
@@ -20,24 +19,112 @@ project_root = os.path.abspath(os.path.join(
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.features import preprocess_features  # noqa: E402
+from src.credit import categorise_credit_score  # noqa: E402
+from src.instrumentation import profiled, span  # noqa: E402
+from src.modeling.bundle import BUNDLE_DIR, MANIFEST_FILE, ModelBundle  # noqa: E402
+from src.modeling.quote_cache import QuoteCache  # noqa: E402
+from src.modeling.rating_table import (METADATA_FILE,  # noqa: E402
+                                       RATING_TABLE_DIR, RatingTable)
+from src.modeling.registry import ModelRegistry  # noqa: E402
+from src.modeling.sensitivity import (SWEEP_RANGES, sensitivity,  # noqa: E402
+                                      sweep_values)
 
-# Paths to the model and scaler
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model_path = os.path.abspath(os.path.join(
-    BASE_DIR, '..', '..', 'models', 'ridge_model.joblib'))
-scaler_path = os.path.abspath(os.path.join(
-    BASE_DIR, '..', '..', 'models', 'scaler.joblib'))
-model_features_path = os.path.abspath(os.path.join(
-    BASE_DIR, '..', '..', 'models', 'model_features.joblib'))
+# Most curves drawn for the second input of a 2D sweep; the full grid is listed in a table
+MAX_SWEEP_CURVES = 6
+
+# Inputs shown individually in a premium's breakdown; the rest are combined
+MAX_EXPLAINED_INPUTS = 8
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_bundle(bundle_dir: str, manifest_mtime: int) -> ModelBundle:
+    """
+    Loads the model bundle once per process and shares it across reruns and sessions.
+
+    The cache is keyed on the manifest's modification time, so retraining the models replaces the cached bundle on the next rerun.
+
+    Args:
+        bundle_dir (str): Directory of the bundle written by `train.py`.
+        manifest_mtime (int): The manifest's modification time in nanoseconds.
+
+    Returns:
+        ModelBundle: The loaded bundle.
+    """
+    return ModelBundle.load(bundle_dir)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_rating_table(table_dir: str, metadata_mtime: int) -> RatingTable:
+    """
+    Loads the rating table once per process, keyed on its metadata's modification time like `load_bundle`.
+
+    Args:
+        table_dir (str): Directory of the table written by `rating_table.py`.
+        metadata_mtime (int): The metadata's modification time in nanoseconds.
+
+    Returns:
+        RatingTable: The loaded table.
+    """
+    return RatingTable.load(table_dir)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_registry(_bundle: ModelBundle, version: str) -> ModelRegistry:
+    """
+    Builds the model registry once per bundle version, configured by the `PREMIUM_PRIMARY_MODEL`, `PREMIUM_CHALLENGERS` and `PREMIUM_AB_SPLIT` environment variables.
+
+    Args:
+        _bundle (ModelBundle): The loaded bundle, left out of the cache key.
+        version (str): The bundle's content version.
+
+    Returns:
+        ModelRegistry: The registry every session routes its quotes through.
+    """
+    return ModelRegistry.from_env(_bundle)
+
+
+@st.cache_resource
+def get_quote_cache() -> QuoteCache:
+    """
+    Returns the quote cache shared by every session of the app.
+
+    Returns:
+        QuoteCache: The process-wide quote cache.
+    """
+    return QuoteCache()
 
-# Load model and scaler
-model = joblib.load(model_path)
-scaler, numeric_columns = joblib.load(scaler_path)
-model_features = joblib.load(model_features_path)
 
 # Add design elements to the page
 st.set_page_config(page_title="Predict Premium", page_icon="📊")
+
+# Load the model bundle; the Ridge model in it has the scaler and encoding folded into its coefficients
+try:
+    bundle = load_bundle(BUNDLE_DIR, os.stat(
+        os.path.join(BUNDLE_DIR, MANIFEST_FILE)).st_mtime_ns)
+except FileNotFoundError:
+    st.error("The model bundle is missing. Please retrain the models.")
+    st.stop()
+except ValueError:
+    st.error("The model bundle was built by an older version of the app. Please retrain the models.")
+    st.stop()
+model_version = bundle.version
+
+# Route each quote to the primary model or an A/B challenger, shadow-scoring it with the other challengers
+try:
+    registry = load_registry(bundle, model_version)
+except ValueError as error:
+    st.error(f"The model registry is misconfigured: {error}")
+    st.stop()
+
+# Standard profiles are priced from the rating table, if one was generated with the current bundle
+try:
+    rating_table = load_rating_table(RATING_TABLE_DIR, os.stat(
+        os.path.join(RATING_TABLE_DIR, METADATA_FILE)).st_mtime_ns)
+    if rating_table.metadata["bundle_version"] != model_version:
+        rating_table = None
+except (FileNotFoundError, ValueError):
+    rating_table = None
+
 st.title("🏎️ Predict Your Car Insurance Premium")
 
 st.header("Demographic information")
@@ -135,37 +222,6 @@ policy_term = st.selectbox(
 credit_score = int(st.number_input(
     "Enter your credit score:", value=350, placeholder="Enter your credit score...",  min_value=300, max_value=850, step=1))
 
-# Define the credit category based on the credit score given:
-
-
-def categorise_credit_score(credit_score):
-    """
-    Categorises a numerical credit score into a credit rating category
-
-    The categories are based on standard FICO credit score ranges:
-        - Poor: < 580
-        - Fair: 580-669
-        - Good: 670-739
-        - Very Good: 740-799
-        - Excellent: 800 and above
-    Args:
-        credit_score (int): The numerical credit score to categorise
-
-    Returns:
-        str: A string representing the credit score category ('Poor', 'Fair', 'Good', 'Very Good' or 'Excellent')
-    """
-    if credit_score < 580:
-        return "Poor"
-    elif 580 <= credit_score < 670:
-        return "Fair"
-    elif 670 <= credit_score < 740:
-        return "Good"
-    elif 740 <= credit_score < 800:
-        return "Very Good"
-    else:
-        return "Excellent"
-
-
 # Create a new feature called credit category based on user input
 credit_category = categorise_credit_score(credit_score)
 
@@ -197,32 +253,96 @@ with col2:
     pressed = st.button("Get your premium", type="primary")
 
 if pressed:
-    with st.spinner("Calculating premium..."):
-        time.sleep(1)
-
-        # Process input
-        input_df = pd.DataFrame([input_dictionary])
-        input_df_processed = preprocess_features(input_df)
-
-        # Ensure all required columns are present
-        for col in model_features:
-            if col not in input_df_processed.columns:
-                input_df_processed[col] = 0
-
-        input_df_processed = input_df_processed[model_features]
-
-        # Make sure numeric columns exist before scaling
-        missing_numeric_cols = [
-            col for col in numeric_columns if col not in input_df_processed.columns]
-        for col in missing_numeric_cols:
-            input_df_processed[col] = 0.0
-
-        # Scale the numerical features
-        input_df_processed[numeric_columns] = scaler.transform(
-            input_df_processed[numeric_columns]).astype('float64')
-
-        # Predict
-        prediction = model.predict(input_df_processed.values)
+    with st.spinner("Calculating premium..."), profiled("quote"):
+        # Reuse the premium if this exact profile was already quoted with the current model; routing is
+        # deterministic, so a cached premium always comes from the model the quote is routed to
+        quote_cache = get_quote_cache()
+        start = time.perf_counter()
+        model_name = registry.route(input_dictionary)
+        # A standard applicant gets the premium of their band, priced at its midpoint age, credit score and car value
+        with span("rating_table"):
+            priced_inputs = rating_table.priced_inputs(input_dictionary) \
+                if rating_table and rating_table.metadata["model"] == model_name else None
+            prediction = rating_table.lookup(priced_inputs) if priced_inputs else None
+        from_rating_table = prediction is not None
+
+        # Every quote is shadow-scored, whether it was priced by the model or found in the table or the cache
+        if from_rating_table:
+            registry.shadow(priced_inputs, model_name, prediction)
+        else:
+            prediction = quote_cache.get(input_dictionary, model_version)
+            if prediction is None:
+                prediction = registry.score_quote(input_dictionary, model_name)
+                quote_cache.put(input_dictionary, model_version, prediction)
+            else:
+                registry.shadow(input_dictionary, model_name, prediction)
+        prediction_time = time.perf_counter() - start
 
     # Display success message
-    st.success(f"Estimated Insurance Premium: R{prediction[0]:,.2f} per month")
+    cache_stats = quote_cache.stats()
+    if from_rating_table:
+        st.success(f"Standard rate for your age, credit score and car value bands: R{prediction:,.2f} per month")
+        st.caption(f"Read from the rating table in {prediction_time * 1000:.2f} ms. Everyone in your bands pays the "
+                   f"rate of a {priced_inputs['Age']}-year-old with a credit score of "
+                   f"{priced_inputs['Credit_Score']} and a car worth R{priced_inputs['Car_Value']:,}.")
+    else:
+        st.success(f"Estimated Insurance Premium: R{prediction:,.2f} per month")
+        st.caption(f"Calculated by the {model_name.replace('_', ' ')} model in {prediction_time * 1000:.1f} ms · "
+                   f"quote cache hit rate {cache_stats['hit_rate']:.0%} "
+                   f"({cache_stats['entries']:,} cached, {cache_stats['evictions']:,} evicted)")
+
+    # Break the premium down by input, largest effects first, explaining a standard rate by the inputs it was priced at
+    explanation = bundle.explain_quote(priced_inputs if from_rating_table else input_dictionary, model_name)
+    contributions = sorted(explanation["contributions"].items(),
+                           key=lambda item: -abs(item[1]))
+    shown = contributions[:MAX_EXPLAINED_INPUTS]
+    if len(contributions) > MAX_EXPLAINED_INPUTS:
+        shown.append(("Other inputs", sum(value for _, value in contributions[MAX_EXPLAINED_INPUTS:])))
+
+    st.subheader("What drives your premium")
+    st.bar_chart({"Input": [name.replace("_", " ") for name, _ in shown],
+                  "Contribution (R)": [value for _, value in shown]},
+                 x="Input", y="Contribution (R)", horizontal=True)
+    st.caption(f"An average applicant pays R{explanation['expected_value']:,.2f} per month; each bar shows how much "
+               + ("one of the answers your standard rate is priced at" if from_rating_table else "one of your answers")
+               + " adds to or takes off that.")
+
+st.header("What-if sensitivity")
+
+# Inputs to sweep and how finely, priced in one batch rather than one quote at a time
+sweep_features = st.multiselect("See how your premium changes with:", list(SWEEP_RANGES),
+                                default=["Car_Value"], max_selections=2)
+sweep_points = int(st.slider("Number of values per input:",
+                   min_value=5, max_value=100, value=30))
+
+if st.button("Show sensitivity") and sweep_features:
+    start = time.perf_counter()
+    with profiled("sensitivity"):
+        axes = {feature: sweep_values(feature, input_dictionary, sweep_points)
+                for feature in sweep_features}
+        sweep_model = registry.route(input_dictionary)
+        premiums = sensitivity(bundle, input_dictionary, axes, sweep_model)
+    sweep_time = time.perf_counter() - start
+
+    # Plot one curve per swept value of the second input, thinned out to a readable number of curves
+    x_feature = sweep_features[0]
+    chart = {x_feature: axes[x_feature]}
+    if len(sweep_features) == 1:
+        chart["Premium"] = premiums
+    else:
+        curve_feature = sweep_features[1]
+        curve_values = axes[curve_feature]
+        for index in np.unique(np.linspace(0, len(curve_values) - 1, MAX_SWEEP_CURVES).round().astype(int)):
+            chart[f"{curve_feature} {curve_values[index]:,}"] = premiums[:, index]
+    st.line_chart(chart, x=x_feature, x_label=x_feature.replace("_", " "),
+                  y_label="Monthly premium (R)")
+
+    if len(sweep_features) == 2:
+        with st.expander("All premiums"):
+            st.dataframe({x_feature: axes[x_feature], **{
+                f"{curve_feature} {value:,}": premiums[:, index] for index, value in enumerate(curve_values)}})
+    # The sweep prices exact answers, so say so when the quote itself is a banded standard rate
+    banded = rating_table is not None and rating_table.metadata["model"] == sweep_model \
+        and rating_table.cell(input_dictionary) is not None
+    st.caption(f"{premiums.size:,} premiums calculated in {sweep_time * 1000:.1f} ms"
+               + (" for your exact answers, whereas your quote is the standard rate of your bands" if banded else ""))
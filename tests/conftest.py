@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Add the project root directory to sys.path so that `src` resolves when the tests are run from anywhere
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
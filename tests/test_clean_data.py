@@ -0,0 +1,123 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.clean_data import (RAW_DATA_PATH, clean_dataset, clean_dataset_in_chunks, fix_employment_status,
+                            fix_invalid_driving_years)
+from src.schema import apply_schema, read_policies
+
+
+# The row-wise implementations the vectorised cleaning replaced, kept as the reference it must match
+def reference_fix_invalid_education_rows(data: pd.DataFrame) -> pd.DataFrame:
+    minimum_age_for_education_level = {"High School": 18, "Diploma": 18, "Degree": 18, "Postgraduate": 21}
+    return data[data.apply(
+        lambda row: row["Age"] >= minimum_age_for_education_level.get(row["Education_Level"], float('inf')), axis=1)]
+
+
+def reference_fix_employment_status(data: pd.DataFrame) -> pd.DataFrame:
+    employment_age_limits = {"Unemployed": (18, 65), "Student": (18, 35), "Employed": (18, 65),
+                             "Self-Employed": (18, 80), "Retired": (65, 100)}
+    target_distribution = {"Retired": 0.257376, "Student": 0.256475, "Employed": 0.250567,
+                           "Unemployed": 0.248917, "Self-Employed": 0.243140}
+    total_rows = len(data)
+    current_counts = Counter(data["Employment_Status"])
+
+    def fix_employment_smart(row):
+        age = row["Age"]
+        current_status = row["Employment_Status"]
+        min_age, max_age = employment_age_limits.get(current_status, (0, 150))
+        if min_age <= age <= max_age:
+            return current_status
+        valid_statuses = [status for status, (min_a, max_a) in employment_age_limits.items()
+                          if min_a <= age <= max_a]
+        if not valid_statuses:
+            return current_status
+        best_status = None
+        smallest_gap = float("inf")
+        for status in valid_statuses:
+            gap = abs(target_distribution.get(status, 0) - current_counts[status] / total_rows)
+            if gap < smallest_gap:
+                smallest_gap = gap
+                best_status = status
+        current_counts[best_status] += 1
+        return best_status
+
+    data["Employment_Status"] = data.apply(fix_employment_smart, axis=1)
+    return data
+
+
+def reference_clean_dataset(data: pd.DataFrame) -> pd.DataFrame:
+    data = data.dropna(how="all")
+    data = data.drop_duplicates().reset_index(drop=True)
+    data = reference_fix_invalid_education_rows(data)
+    data = reference_fix_employment_status(data)
+    return fix_invalid_driving_years(data)
+
+
+def synthetic_policies() -> pd.DataFrame:
+    """
+    Builds a frame that exercises the edge cases of the cleaning: ages on every limit and outside all of them, unknown education levels and statuses, repeated ages and duplicate rows, statuses and education levels with no rows, and near-balanced status counts, so that the greedy rebalancing changes its choice every few rows.
+    """
+    rng = np.random.default_rng(7)
+    n_rows = 5000
+    ages = rng.choice([17, 18, 20, 21, 22, 35, 36, 50, 64, 65, 66, 79, 80, 81, 100, 101], n_rows)
+    # No 'Retired' rows and no 'Postgraduate' rows at all, and statuses outside the age limits' spelling
+    statuses = rng.choice(["Student", "Employed", "Unemployed", "Self-Employed", "Self-employed"], n_rows)
+    education = rng.choice(["High School", "Diploma", "Degree", "Doctorate"], n_rows)
+    data = pd.DataFrame({
+        "Age": ages,
+        "Employment_Status": statuses,
+        "Education_Level": education,
+        "Years_Driving": rng.integers(0, 60, n_rows),
+    })
+    return pd.concat([data, data.iloc[:200], pd.DataFrame([dict.fromkeys(data.columns)])], ignore_index=True)
+
+
+def test_matches_row_wise_cleaning_on_raw_data():
+    raw = pd.read_csv(RAW_DATA_PATH)
+    pd.testing.assert_frame_equal(clean_dataset(raw.copy()), reference_clean_dataset(raw.copy()))
+
+
+def test_matches_row_wise_cleaning_on_edge_cases():
+    data = synthetic_policies()
+    expected = reference_clean_dataset(data.copy())
+    assert expected["Employment_Status"].value_counts().get("Retired", 0) > 0
+    pd.testing.assert_frame_equal(clean_dataset(data.copy()), expected)
+
+
+@pytest.mark.parametrize("ages", [[30, 40], [17, 101], []])
+def test_matches_row_wise_rebalancing_without_reassignable_rows(ages):
+    # Every status valid, no valid status at all, or no rows
+    data = pd.DataFrame({"Age": ages, "Employment_Status": ["Employed"] * len(ages)})
+    expected = reference_fix_employment_status(data.copy()) if ages else data.copy()
+    pd.testing.assert_frame_equal(fix_employment_status(data.copy()), expected)
+
+
+def test_matches_row_wise_cleaning_with_compact_types():
+    # The pipeline reads categorical columns; the cleaned values must not depend on it
+    expected = reference_clean_dataset(pd.read_csv(RAW_DATA_PATH))
+    cleaned = clean_dataset(read_policies(RAW_DATA_PATH))
+    assert cleaned["Employment_Status"].astype(str).tolist() == expected["Employment_Status"].tolist()
+    assert cleaned["Customer_ID"].tolist() == expected["Customer_ID"].tolist()
+
+
+@pytest.mark.parametrize("chunksize", [7, 250, 100_000])
+def test_chunked_cleaning_drops_duplicates_across_chunks(tmp_path, chunksize):
+    raw = pd.read_csv(RAW_DATA_PATH).head(2000)
+    # Repeat rows at random positions, so copies land in other chunks than their first occurrence
+    data = pd.concat([raw, raw.sample(500, random_state=0), pd.DataFrame([dict.fromkeys(raw.columns)])])
+    data = data.sample(frac=1, random_state=1).reset_index(drop=True)
+    chunk_numbers = pd.Series(data.index // chunksize)
+    first_chunk_numbers = chunk_numbers.groupby(data["Customer_ID"]).transform("min")
+    if chunksize < len(data):
+        assert (chunk_numbers[data.duplicated()] > first_chunk_numbers[data.duplicated()]).sum() > 100
+
+    input_path, output_path = tmp_path / "raw.csv", tmp_path / "cleaned.csv"
+    data.to_csv(input_path, index=False)
+    rows_written = clean_dataset_in_chunks(str(input_path), str(output_path), chunksize)
+
+    expected = clean_dataset(pd.read_csv(input_path)).reset_index(drop=True)
+    assert rows_written == len(expected)
+    pd.testing.assert_frame_equal(apply_schema(pd.read_csv(output_path)), apply_schema(expected))
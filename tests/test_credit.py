@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.credit import add_credit_category, categorise_credit_score, credit_categories
+from src.modeling.bundle import ModelBundle
+from src.modeling.linear_scorer import LinearScorer
+from src.modeling.predict import MODELS_DIR, load_artifacts, score_batch, score_quote
+from src.modeling.serve import validate_quote
+from tests.test_serve import QUOTE
+
+# Scores on and either side of every band edge
+SCORES = [300, 579, 579.5, 580, 669, 670, 739, 740, 799, 800, 850]
+CATEGORIES = ["Poor", "Poor", "Poor", "Fair", "Fair", "Good", "Good", "Very Good", "Very Good", "Excellent",
+              "Excellent"]
+
+
+def test_scores_and_arrays_are_banded_alike():
+    assert [categorise_credit_score(score) for score in SCORES] == CATEGORIES
+    assert credit_categories(np.array(SCORES)).tolist() == CATEGORIES
+    assert credit_categories(pd.Series([np.nan, 700])).tolist() == [None, "Good"]
+    assert credit_categories(float("nan")) is None
+
+
+def test_existing_category_is_kept():
+    quote = {**QUOTE, "Credit_Category": "Poor"}
+    assert add_credit_category(quote) is quote
+    assert add_credit_category(QUOTE)["Credit_Category"] == "Good"
+    assert add_credit_category(pd.DataFrame([QUOTE] * 2))["Credit_Category"].tolist() == ["Good", "Good"]
+
+
+@pytest.mark.parametrize("score", [
+    lambda quote: score_quote(quote, load_artifacts(MODELS_DIR, "xgboost")),
+    lambda quote: score_batch(pd.DataFrame([quote]), load_artifacts(MODELS_DIR, "xgboost"))[0],
+    lambda quote: LinearScorer.load().score_quote(quote),
+    lambda quote: LinearScorer.load().score_batch(pd.DataFrame([quote]))[0],
+    lambda quote: ModelBundle.load().score_quote(quote, "ridge"),
+    lambda quote: ModelBundle.load().score_quote(quote, "xgboost"),
+    lambda quote: validate_quote(quote, load_artifacts(MODELS_DIR, "ridge"))["Credit_Category"],
+])
+def test_every_entry_point_derives_the_category(score):
+    for credit_score, category in zip(SCORES, CATEGORIES):
+        quote = {**QUOTE, "Credit_Score": credit_score}
+        assert score(quote) == score({**quote, "Credit_Category": category})
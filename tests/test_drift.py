@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.modeling.drift import NumericSketch, binned_ks, load_baseline, psi
+from src.modeling.predict import MODELS_DIR
+
+
+def values(n_rows: int, shift: float = 0.0, seed: int = 0) -> np.ndarray:
+    sample = np.random.default_rng(seed).normal(50 + shift, 10, n_rows)
+    # Outliers on both sides of the bins, and missing values
+    outliers = [-1e6, 1e6, np.nan, np.nan, 30][:n_rows]
+    sample[:len(outliers)] = outliers
+    return sample
+
+
+def sketch_of(batches: list[np.ndarray]) -> NumericSketch:
+    sketch = NumericSketch(20, 80)
+    for batch in batches:
+        sketch.update(batch)
+    return sketch
+
+
+@pytest.mark.parametrize("sizes", [[1000, 2000, 3000], [0, 500, 0], [1, 1, 5000]])
+def test_merged_sketches_match_one_pass(sizes):
+    batches = [values(size, seed=seed) for seed, size in enumerate(sizes)]
+    one_pass = sketch_of([np.concatenate(batches)])
+
+    merged = NumericSketch(20, 80)
+    for batch in batches:
+        merged.merge(sketch_of([batch]))
+
+    np.testing.assert_array_equal(merged.counts, one_pass.counts)
+    assert (merged.count, merged.missing) == (one_pass.count, one_pass.missing)
+    assert (merged.minimum, merged.maximum) == (one_pass.minimum, one_pass.maximum)
+    assert merged.mean == pytest.approx(one_pass.mean, rel=1e-12)
+    assert merged.m2 == pytest.approx(one_pass.m2, rel=1e-9)
+    present = np.concatenate(batches)
+    present = present[~np.isnan(present)]
+    assert merged.std == pytest.approx(present.std(), rel=1e-9)
+
+
+def test_identical_data_does_not_drift():
+    counts = sketch_of([values(10_000)]).counts
+    assert psi(counts, counts) == 0.0
+    assert binned_ks(counts, counts) == 0.0
+
+
+def test_shifted_data_drifts():
+    baseline = sketch_of([values(10_000)]).counts
+    resampled = sketch_of([values(10_000, seed=1)]).counts
+    shifted = sketch_of([values(10_000, shift=5, seed=1)]).counts
+
+    # A fresh sample of the same distribution stays well under the warning level, a half-deviation shift does not
+    assert psi(baseline, resampled) < 0.01
+    assert binned_ks(baseline, resampled) < 0.02
+    assert psi(baseline, shifted) > 0.2
+    assert binned_ks(baseline, shifted) > 0.15
+    assert psi(baseline, sketch_of([values(10_000, shift=10, seed=1)]).counts) > psi(baseline, shifted)
+
+
+def test_shipped_models_have_a_baseline():
+    monitor = load_baseline(MODELS_DIR, "xgboost")
+    assert monitor.sketches["Age"].count > 0
+
+
+def test_missing_baseline_says_to_retrain(tmp_path):
+    with pytest.raises(FileNotFoundError, match="retrain with train.py"):
+        load_baseline(str(tmp_path))
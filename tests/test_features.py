@@ -0,0 +1,79 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.credit import add_credit_category
+from src.features import CLEANED_DATA_PATH, FeatureEncoder, preprocess_features
+from src.modeling.bundle import ModelBundle
+from src.modeling.linear_scorer import LinearScorer
+from src.modeling.predict import MODELS_DIR, load_artifacts, score_batch
+from src.schema import read_policies
+
+
+@pytest.fixture(scope="module")
+def records():
+    return add_credit_category(read_policies(CLEANED_DATA_PATH).drop(columns=["Customer_ID", "Premium_Amount"]))
+
+
+@pytest.fixture(scope="module", params=["shipped", "fitted"])
+def encoder(request, records):
+    if request.param == "shipped":
+        return joblib.load(os.path.join(MODELS_DIR, "feature_encoder.joblib"))
+    return FeatureEncoder().fit(records)
+
+
+def reference(encoder: FeatureEncoder, records: pd.DataFrame, categories: dict | None = None) -> np.ndarray:
+    # The training-time encoding, aligned to the model columns
+    return preprocess_features(records, categories).reindex(
+        columns=encoder.feature_names_, fill_value=0).to_numpy(dtype=float)
+
+
+@pytest.mark.parametrize("with_vocabulary", [False, True])
+def test_batch_matches_preprocess_features(encoder, records, with_vocabulary):
+    categories = encoder.categories_ if with_vocabulary else None
+    np.testing.assert_array_equal(encoder.transform(records), reference(encoder, records, categories))
+
+
+def test_single_rows_match_preprocess_features(encoder, records):
+    # A single row only has one category per column, so it needs the fitted vocabulary to keep its dummy
+    for _, row in records.sample(50, random_state=0).iterrows():
+        expected = reference(encoder, row.to_frame().T.astype(records.dtypes.to_dict()), encoder.categories_)
+        np.testing.assert_array_equal(encoder.transform(row.to_dict()), expected)
+
+
+def test_unknown_categories_are_rejected(encoder, records):
+    quote = records.iloc[0].to_dict()
+    with pytest.raises(ValueError, match="Unexpected values in Region: Atlantis"):
+        encoder.transform({**quote, "Region": "Atlantis"})
+
+    batch = records.head(3).astype({"Region": object})
+    batch.loc[batch.index[1], "Region"] = "Atlantis"
+    with pytest.raises(ValueError, match="Unexpected values in Region: Atlantis"):
+        encoder.transform(batch)
+
+
+def test_baseline_and_missing_categories_encode_as_zeros(encoder, records):
+    quote = records.iloc[0].to_dict()
+    baseline = encoder.transform({**quote, "Region": encoder.categories_["Region"][0]})
+    np.testing.assert_array_equal(encoder.transform({**quote, "Region": None}), baseline)
+
+    batch = pd.DataFrame([{**quote, "Region": encoder.categories_["Region"][0]}, {**quote, "Region": None}])
+    np.testing.assert_array_equal(encoder.transform(batch), np.vstack([baseline, baseline]))
+
+
+@pytest.mark.parametrize("score", [
+    lambda batch: score_batch(batch, load_artifacts(MODELS_DIR, "xgboost")),
+    lambda batch: LinearScorer.load().score_batch(batch),
+    lambda batch: [LinearScorer.load().score_quote(quote) for quote in batch.to_dict("records")],
+    lambda batch: ModelBundle.load().score_batch(batch, "ridge"),
+    lambda batch: ModelBundle.load().score_batch(batch, "xgboost"),
+])
+def test_scorers_reject_unknown_categories(records, score):
+    batch = records.head(3).astype({"Region": object})
+    score(batch)
+    batch.loc[batch.index[1], "Region"] = "Atlantis"
+    with pytest.raises(ValueError, match="Unexpected values in Region: Atlantis"):
+        score(batch)
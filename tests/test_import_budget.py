@@ -0,0 +1,11 @@
+import pytest
+
+from src.import_budget import IMPORT_BUDGETS, check_budgets
+
+
+@pytest.mark.parametrize("entry_point", list(IMPORT_BUDGETS))
+def test_entry_point_imports_within_budget(entry_point):
+    result = check_budgets({entry_point: IMPORT_BUDGETS[entry_point]})[entry_point]
+    assert not result["forbidden"], f"{entry_point} loads {result['forbidden']} at import time"
+    assert result["ms"] <= result["budget_ms"], \
+        f"{entry_point} imports in {result['ms']:.0f} ms, over its {result['budget_ms']} ms budget"
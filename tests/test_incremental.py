@@ -0,0 +1,66 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+
+from src.clean_data import CLEANED_DATA_PATH
+from src.credit import add_credit_category
+from src.features import preprocess_features
+from src.modeling.incremental import (_scale, compare_with_full_retrain, merge_statistics, ridge_from_statistics,
+                                      update_models)
+from src.modeling.predict import MODELS_DIR, load_artifacts
+from src.modeling.train import split_and_scale, sufficient_statistics
+from src.schema import read_policies
+from src.storage import write_dataset
+
+# Statistics shipped with the models, which incremental updates start from
+STATISTICS_PATH = os.path.join(MODELS_DIR, "ridge_statistics.joblib")
+
+
+@pytest.fixture(scope="module")
+def data():
+    # The processed features the shipped models were trained on
+    return preprocess_features(add_credit_category(read_policies(CLEANED_DATA_PATH).drop(columns="Customer_ID")))
+
+
+@pytest.mark.parametrize("n_old", [1, 5000, 11_000])
+def test_ridge_from_merged_statistics_matches_a_full_refit(data, n_old):
+    split = split_and_scale(data)
+    X = np.asarray(split["X_train_encoded"], dtype=float)
+    y = np.asarray(split["y_train"], dtype=float)
+    numeric_indices = [split["model_features"].index(col) for col in split["numeric_columns"]]
+
+    # The old rows' scaler stays the input scaling, as in update_models
+    old_scaler = StandardScaler().fit(X[:n_old, numeric_indices])
+    statistics = merge_statistics(sufficient_statistics(X[:n_old], y[:n_old]),
+                                  sufficient_statistics(X[n_old:], y[n_old:]))
+    model = ridge_from_statistics(statistics, old_scaler, numeric_indices, alpha=1.0)
+
+    full_scaler = StandardScaler().fit(X[:, numeric_indices])
+    full_model = Ridge(alpha=1.0).fit(_scale(X, full_scaler, numeric_indices), y)
+    np.testing.assert_allclose(model.predict(_scale(X, old_scaler, numeric_indices)),
+                               full_model.predict(_scale(X, full_scaler, numeric_indices)), rtol=0, atol=1e-6)
+
+
+def test_shipped_statistics_reproduce_the_shipped_ridge_model():
+    artifacts = load_artifacts(MODELS_DIR, "ridge")
+    model = ridge_from_statistics(joblib.load(STATISTICS_PATH), artifacts["scaler"], artifacts["numeric_indices"],
+                                  artifacts["model"].alpha)
+    np.testing.assert_allclose(model.coef_, artifacts["model"].coef_, rtol=0, atol=1e-8)
+    assert model.intercept_ == pytest.approx(artifacts["model"].intercept_, abs=1e-8)
+
+
+def test_shipped_models_update_like_a_full_retrain(data, tmp_path):
+    data_path = str(tmp_path / "features.csv")
+    write_dataset(data, data_path)
+    new_data = read_policies(CLEANED_DATA_PATH).sample(500, random_state=0)
+    new_data["Premium_Amount"] = new_data["Premium_Amount"] * 1.1
+
+    summary = update_models(new_data, MODELS_DIR, str(tmp_path / "updated"), boosting_rounds=5)
+    assert summary["n_samples"] == joblib.load(STATISTICS_PATH)["n_samples"] + 500
+
+    comparison = compare_with_full_retrain(data_path, new_data, summary)
+    assert comparison["ridge_max_abs_difference"] < 1e-6
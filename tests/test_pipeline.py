@@ -0,0 +1,31 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.pipeline import run_isolated
+
+WORKER_MB = 400
+
+
+def allocate(megabytes: int) -> float:
+    # Touch every page, so that the memory counts towards the resident set
+    return float(np.ones(megabytes * 2**20 // 8).sum())
+
+
+def allocate_in_worker(megabytes: int) -> float:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(allocate, megabytes).result()
+
+
+def test_peak_memory_includes_worker_processes():
+    result, measured = run_isolated(allocate_in_worker, {"megabytes": WORKER_MB})
+    assert result == WORKER_MB * 2**20 // 8
+    assert measured["peak_memory_mb"] >= WORKER_MB
+    assert measured["seconds"] > 0
+
+
+def test_peak_memory_of_the_stage_itself():
+    _, small = run_isolated(allocate, {"megabytes": 1})
+    _, large = run_isolated(allocate, {"megabytes": WORKER_MB})
+    assert small["peak_memory_mb"] < WORKER_MB <= large["peak_memory_mb"]
@@ -0,0 +1,97 @@
+import pytest
+
+from src.modeling.quote_cache import QuoteCache, quote_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def quote(age: int) -> dict:
+    return {"Age": age, "Region": "Gauteng"}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_key_ignores_field_order_and_number_types():
+    assert quote_key({"Age": 35, "Region": "Gauteng"}, 1) == quote_key({"Region": "Gauteng", "Age": 35.0}, 1)
+    assert quote_key(quote(35), 1) != quote_key(quote(36), 1)
+    assert quote_key(quote(35), 1) != quote_key(quote(35), 2)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = QuoteCache(max_entries=2, clock=clock)
+    cache.put(quote(1), "v1", 100.0)
+    cache.put(quote(2), "v1", 200.0)
+    # Reading the first quote makes the second the least recently used
+    assert cache.get(quote(1), "v1") == 100.0
+    cache.put(quote(3), "v1", 300.0)
+
+    assert cache.get(quote(2), "v1") is None
+    assert cache.get(quote(1), "v1") == 100.0
+    assert cache.get(quote(3), "v1") == 300.0
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = QuoteCache(ttl_seconds=60, clock=clock)
+    cache.put(quote(1), "v1", 100.0)
+    clock.now = 60.0
+    assert cache.get(quote(1), "v1") == 100.0
+
+    clock.now = 60.5
+    assert cache.get(quote(1), "v1") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+
+    # Storing it again starts a fresh time-to-live
+    cache.put(quote(1), "v1", 110.0)
+    clock.now = 120.0
+    assert cache.get(quote(1), "v1") == 110.0
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = QuoteCache(clock=clock)
+    assert cache.stats()["hit_rate"] == 0.0
+
+    computed = []
+    for age in [1, 2, 1, 1]:
+        cache.get_or_compute(quote(age), "v1", lambda: computed.append(age) or float(age))
+
+    assert computed == [1, 2]
+    assert cache.stats() == {
+        "entries": 2,
+        "hits": 2,
+        "misses": 2,
+        "hit_rate": 0.5,
+        "evictions": 0,
+        "expirations": 0,
+        "invalidations": 0,
+    }
+
+
+def test_new_model_version_invalidates_the_cache(clock):
+    cache = QuoteCache(clock=clock)
+    cache.put(quote(1), "v1", 100.0)
+    cache.put(quote(2), "v1", 200.0)
+
+    assert cache.get(quote(1), "v2") is None
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 0
+
+    # Premiums of the old version are gone even if it is asked for again
+    assert cache.get(quote(2), "v1") is None
+    assert cache.stats()["invalidations"] == 1
+
+    cache.put(quote(1), "v2", 150.0)
+    assert cache.get(quote(1), "v2") == 150.0
@@ -0,0 +1,40 @@
+import pytest
+
+from src.modeling.bundle import ModelBundle
+from src.modeling.rating_table import STANDARD_PROFILE, RatingTable, generate_rating_table
+
+QUOTE = {**STANDARD_PROFILE, "Age": 33, "Credit_Score": 612, "Car_Value": 123_456, "Car_Make": "Toyota",
+         "Car_Model": "Corolla", "Region": "Gauteng", "Vehicle_Usage": "Private", "Policy_Term": 12,
+         "Credit_Category": "Fair"}
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return ModelBundle.load()
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    table_dir = tmp_path_factory.mktemp("rating_table")
+    generate_rating_table(output_dir=str(table_dir), workers=1)
+    return RatingTable.load(str(table_dir))
+
+
+def test_priced_inputs_move_banded_inputs_to_their_midpoints(table):
+    priced = table.priced_inputs(QUOTE)
+    assert (priced["Age"], priced["Credit_Score"], priced["Car_Value"]) == (32, 624, 124_999)
+    assert {col: value for col, value in priced.items() if col not in table.metadata["bands"]} == \
+        {col: value for col, value in QUOTE.items() if col not in table.metadata["bands"]}
+    assert table.lookup(priced) == table.lookup(QUOTE)
+
+
+def test_explanation_of_priced_inputs_adds_up_to_the_table_premium(table, bundle):
+    explanation = bundle.explain_quote(table.priced_inputs(QUOTE), table.metadata["model"])
+    total = explanation["expected_value"] + sum(explanation["contributions"].values())
+    # The table stores premiums in whole cents
+    assert total == pytest.approx(table.lookup(QUOTE), abs=0.01)
+
+
+def test_quotes_outside_the_table_have_no_priced_inputs(table):
+    assert table.priced_inputs({**QUOTE, "Number_of_Claims": 2}) is None
+    assert table.priced_inputs({**QUOTE, "Years_Driving": 3}) is None
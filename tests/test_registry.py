@@ -0,0 +1,84 @@
+import json
+import logging
+
+import pytest
+
+from src.modeling.bundle import ModelBundle
+from src.modeling.quote_cache import quote_key
+from src.modeling.registry import ModelRegistry, compare_predictions
+
+QUOTE = {
+    "Age": 35, "Gender": "Female", "Region": "Gauteng", "Employment_Status": "Employed",
+    "Education_Level": "Degree", "Years_Driving": 10, "Car_Make": "Toyota", "Car_Model": "Corolla",
+    "Manufacture_Year": 2018, "Annual_Mileage": 15000, "Number_of_Accidents": 0, "Number_of_Claims": 0,
+    "Car_Value": 250000, "Marital_Status": "Married", "Has_AntiTheft_Device": 1, "Policy_Term": 12,
+    "Credit_Score": 700, "Vehicle_Usage": "Private", "Credit_Category": "Good",
+}
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return ModelBundle.load()
+
+
+class _BrokenModel:
+    def predict(self, features):
+        raise RuntimeError("corrupt trees")
+
+
+def test_log_pairs_every_routed_quote_without_inputs(bundle, tmp_path):
+    log_path = tmp_path / "shadow.jsonl"
+    registry = ModelRegistry(bundle, "ridge", ["xgboost"], log_path=str(log_path))
+    premium = registry.score_quote(QUOTE)
+    # A quote cache hit is shadowed as well, so the comparison is not limited to cache misses
+    registry.shadow(QUOTE, "ridge", premium)
+    registry.close()
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(records) == 2
+    for record in records:
+        assert "inputs" not in record
+        assert record["quote"] == quote_key(QUOTE, bundle.version)
+        assert record["premium"] == premium
+        assert record["challengers"]["xgboost"] == pytest.approx(bundle.score_quote(QUOTE, "xgboost"))
+    assert registry.stats()["routed"]["ridge"] == 2
+    assert compare_predictions(str(log_path))[0]["quotes"] == 2
+
+
+def test_failed_shadow_is_logged(tmp_path, caplog):
+    broken = ModelBundle.load()
+    broken.models["xgboost"] = _BrokenModel()
+    registry = ModelRegistry(broken, "ridge", ["xgboost"], log_path=str(tmp_path / "shadow.jsonl"))
+
+    with caplog.at_level(logging.ERROR, logger="src.modeling.registry"):
+        registry.score_quote(QUOTE)
+        registry.close()
+
+    stats = registry.stats()
+    assert stats["failed"] == 1 and stats["shadowed"] == 0
+    assert stats["last_error"] == "RuntimeError: corrupt trees"
+    assert "1 failures so far" in caplog.text and "corrupt trees" in caplog.text
+
+
+def test_routing_is_deterministic_and_follows_the_split(bundle):
+    registry = ModelRegistry(bundle, "ridge", split={"xgboost": 0.3}, log_path=None)
+    quotes = [{**QUOTE, "Age": age, "Car_Value": value}
+              for age in range(18, 80) for value in range(50_000, 500_000, 50_000)]
+    routes = [registry.route(quote) for quote in quotes]
+    assert routes == [registry.route(quote) for quote in quotes]
+    assert 0.2 < routes.count("xgboost") / len(routes) < 0.4
+    registry.close()
+
+
+def test_quotes_after_close_are_priced_without_shadowing(bundle, tmp_path):
+    log_path = tmp_path / "shadow.jsonl"
+    registry = ModelRegistry(bundle, "ridge", ["xgboost"], log_path=str(log_path))
+    registry.score_quote(QUOTE)
+    registry.close()
+
+    assert registry.score_quote(QUOTE) == pytest.approx(bundle.score_quote(QUOTE, "ridge"))
+    registry.shadow(QUOTE, "ridge", 100.0)
+    stats = registry.stats()
+    assert stats["routed"]["ridge"] == 3
+    assert stats["shadowed"] == 1 and stats["pending"] == 0
+    assert len(log_path.read_text().splitlines()) == 1
@@ -0,0 +1,91 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.modeling.predict import MODELS_DIR, artifacts_version, load_artifacts
+from src.modeling.quote_cache import QuoteCache
+from src.modeling.serve import MicroBatcher, PredictionServer, make_handler, validate_quote
+
+QUOTE = {
+    "Age": 35, "Gender": "Female", "Region": "Gauteng", "Employment_Status": "Employed",
+    "Education_Level": "Degree", "Years_Driving": 10, "Car_Make": "Toyota", "Car_Model": "Corolla",
+    "Manufacture_Year": 2018, "Annual_Mileage": 15000, "Number_of_Accidents": 0, "Number_of_Claims": 0,
+    "Car_Value": 250000, "Marital_Status": "Married", "Has_AntiTheft_Device": 1, "Policy_Term": 12,
+    "Credit_Score": 700, "Vehicle_Usage": "Private",
+}
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    return load_artifacts(MODELS_DIR, "ridge")
+
+
+@pytest.fixture(scope="module")
+def server_url(artifacts):
+    # Batch for long enough that concurrent quotes land in the same micro-batch
+    batcher = MicroBatcher(artifacts, max_wait_ms=200)
+    server = PredictionServer(("127.0.0.1", 0), make_handler(
+        artifacts, batcher, QuoteCache(), artifacts_version(MODELS_DIR, "ridge")))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url: str, body) -> tuple[int, dict]:
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+@pytest.mark.parametrize("field, value", [("Region", ["Gauteng"]), ("Gender", {"x": 1}), ("Car_Make", 3)])
+def test_validate_quote_rejects_non_string_categories(artifacts, field, value):
+    with pytest.raises(ValueError, match=field):
+        validate_quote({**QUOTE, field: value}, artifacts)
+
+
+@pytest.mark.parametrize("field, value", [("Region", "Atlantis"), ("Car_Make", "Tesla"), ("Gender", "")])
+def test_validate_quote_rejects_unknown_categories(artifacts, field, value):
+    with pytest.raises(ValueError, match=f"Field {field} must be one of: "):
+        validate_quote({**QUOTE, field: value}, artifacts)
+
+
+def test_unknown_category_is_a_bad_request(server_url, artifacts):
+    baseline = artifacts["encoder"].categories_["Region"][0]
+    assert post(f"{server_url}/quote", {**QUOTE, "Region": baseline})[0] == 200
+    assert post(f"{server_url}/quote", {**QUOTE, "Region": "Atlantis"}) == (400, {
+        "error": f"Field Region must be one of: {', '.join(artifacts['encoder'].categories_['Region'])}"})
+
+
+def test_malformed_quote_does_not_fail_its_micro_batch(server_url):
+    quotes = [{**QUOTE, "Age": 30 + i} for i in range(4)] + [{**QUOTE, "Region": ["x"]}]
+    with ThreadPoolExecutor(len(quotes)) as executor:
+        responses = list(executor.map(lambda quote: post(f"{server_url}/quote", quote), quotes))
+
+    for status, body in responses[:-1]:
+        assert status == 200
+        assert body["premium"] > 0
+    assert responses[-1] == (400, {"error": "Field Region must be a string"})
+
+
+def test_batcher_fails_only_the_quote_that_cannot_be_scored(artifacts):
+    # Bypass validation, as a record the encoder cannot handle would otherwise never reach the batcher
+    batcher = MicroBatcher(artifacts, max_wait_ms=200)
+    good = [validate_quote({**QUOTE, "Age": 30 + i}, artifacts) for i in range(3)]
+    bad = {**good[0], "Region": ["x"]}
+    futures = [batcher.submit(record) for record in [good[0], bad, *good[1:]]]
+
+    with pytest.raises(Exception):
+        futures[1].result(timeout=10)
+    premiums = [future.result(timeout=10) for future in futures[:1] + futures[2:]]
+    assert all(premium > 0 for premium in premiums)
+    assert batcher.batches == 1
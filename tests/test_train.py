@@ -0,0 +1,58 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.clean_data import CLEANED_DATA_PATH
+from src.features import preprocess_features
+from src.modeling.bundle import MANIFEST_FILE
+from src.modeling.train import (DEFAULT_PARAMS, build_trials, make_cv_splits, make_validation_split, save_artifacts,
+                                split_and_scale, train_models)
+from src.schema import read_policies
+
+
+@pytest.fixture(scope="module")
+def data():
+    return split_and_scale(read_policies(CLEANED_DATA_PATH).drop(columns="Customer_ID"))
+
+
+def _numeric(data: dict, X: np.ndarray) -> np.ndarray:
+    # The scaled columns come first in the feature matrix
+    return X[:, :len(data["numeric_columns"])].astype(float)
+
+
+@pytest.mark.parametrize("make_splits", [lambda data: [make_validation_split(data)],
+                                         lambda data: make_cv_splits(data, n_folds=3)])
+def test_search_splits_are_scaled_on_their_fit_part_only(data, make_splits):
+    for X_fit, y_fit, X_val, y_val in make_splits(data):
+        assert len(X_fit) == len(y_fit) and len(X_val) == len(y_val)
+        assert len(X_fit) + len(X_val) == len(data["X_train"])
+
+        # A scaler fitted on the fit rows alone centres them exactly; one fitted on the whole training set would not
+        fit_numeric = _numeric(data, X_fit)
+        non_constant = fit_numeric.std(axis=0) > 0
+        np.testing.assert_allclose(fit_numeric.mean(axis=0), 0, atol=1e-9)
+        np.testing.assert_allclose(fit_numeric.std(axis=0)[non_constant], 1, atol=1e-9)
+        assert np.abs(_numeric(data, X_val).mean(axis=0)).max() > 1e-6
+
+
+
+@pytest.mark.parametrize("search", ["grid", "random"])
+def test_models_left_out_of_the_search_space_keep_their_defaults(search):
+    trials = build_trials(search, {"Ridge": {"alpha": [0.1, 1.0]}})
+    assert trials == [("Random Forest", DEFAULT_PARAMS["Random Forest"]), ("Ridge", {"alpha": 0.1}),
+                      ("Ridge", {"alpha": 1.0}), ("XGBoost", DEFAULT_PARAMS["XGBoost"])]
+
+    with pytest.raises(ValueError, match="Unknown model in the search space: Lasso"):
+        build_trials(search, {"Lasso": {"alpha": [1.0]}})
+
+
+def test_search_space_without_ridge_saves_every_model(tmp_path):
+    df = preprocess_features(read_policies(CLEANED_DATA_PATH).drop(columns="Customer_ID"))
+    data = split_and_scale(df)
+    results, trials = train_models(data, "grid", {"XGBoost": {"n_estimators": [10, 20]}}, workers=1)
+    save_artifacts(df, data, results, trials, str(tmp_path))
+
+    with open(os.path.join(tmp_path, "bundle", MANIFEST_FILE)) as file:
+        assert sorted(json.load(file)["models"]) == ["random_forest", "ridge", "xgboost"]
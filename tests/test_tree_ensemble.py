@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import DMatrix, XGBRegressor
+
+from src.modeling.tree_ensemble import COMPLETE_MAX_DEPTH, TreeEnsemble, check_equivalence, export_trees
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+# XGBoost compares float32 features with float32 thresholds and adds float32 leaf values in its own order, so its
+# premiums, in the thousands of rand, can differ from the exported ensemble's float64 sum by about R0.02
+XGBOOST_TOLERANCE = 0.05
+
+# The exported ensemble compares float32 features with float64 thresholds and sends missing values down the same side
+# as scikit-learn's trees
+RANDOM_FOREST_TOLERANCE = 1e-6
+
+# Largest gap between a prediction and its expected value plus contributions, which only floating-point summation
+# order can open up
+ADDITIVITY_TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope="module")
+def data():
+    # Premium-like targets from a mix of continuous, binary and missing features
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 8))
+    X[:, 5] = rng.integers(0, 2, len(X))
+    y = 5000 + 800 * X[:, 0] - 300 * X[:, 1] ** 2 + 200 * X[:, 2] * X[:, 3] + 150 * X[:, 5] + rng.normal(0, 50, len(X))
+    X[rng.random(X.shape) < 0.02] = np.nan
+    return X, y
+
+
+def exported(model, tmp_path, model_name: str) -> TreeEnsemble:
+    export_trees(model, str(tmp_path), model_name)
+    return TreeEnsemble.load(str(tmp_path), model_name)
+
+
+MODELS = {
+    "xgboost": (lambda: XGBRegressor(n_estimators=60, max_depth=6, random_state=0), "complete", XGBOOST_TOLERANCE),
+    "random_forest": (lambda: RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0),
+                      "complete", RANDOM_FOREST_TOLERANCE),
+    "random_forest_unlimited": (lambda: RandomForestRegressor(n_estimators=5, random_state=0),
+                                "linked", RANDOM_FOREST_TOLERANCE),
+}
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_predictions_match_the_library(data, tmp_path, name):
+    make_model, layout, tolerance = MODELS[name]
+    X, y = data
+    model = make_model().fit(X, y)
+    ensemble = exported(model, tmp_path, name)
+
+    assert ensemble.metadata["layout"] == layout
+    if layout == "linked":
+        assert ensemble.metadata["max_depth"] > COMPLETE_MAX_DEPTH
+    np.testing.assert_allclose(ensemble.predict(X), model.predict(X), rtol=0, atol=tolerance)
+    np.testing.assert_allclose(ensemble.predict(X[7]), model.predict(X[7:8]), rtol=0, atol=tolerance)
+
+
+@pytest.mark.parametrize("name", list(MODELS))
+def test_contributions_add_up_to_predictions(data, tmp_path, name):
+    make_model, _, _ = MODELS[name]
+    X, y = data
+    ensemble = exported(make_model().fit(X, y), tmp_path, name)
+
+    contributions = ensemble.contributions(X)
+    assert contributions.shape == X.shape
+    np.testing.assert_allclose(ensemble.expected_value + contributions.sum(axis=1), ensemble.predict(X),
+                               rtol=0, atol=ADDITIVITY_TOLERANCE)
+
+
+def test_xgboost_contributions_match_the_library_path_attribution(data, tmp_path):
+    X, y = data
+    model = MODELS["xgboost"][0]().fit(X, y)
+    ensemble = exported(model, tmp_path, "xgboost")
+
+    library = model.get_booster().predict(DMatrix(X), pred_contribs=True, approx_contribs=True)
+    np.testing.assert_allclose(ensemble.contributions(X), library[:, :-1], rtol=0, atol=XGBOOST_TOLERANCE)
+    assert ensemble.expected_value == pytest.approx(float(library[0, -1]), abs=XGBOOST_TOLERANCE)
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(MODELS_DIR, "xgboost_trees.npy")),
+                    reason="no exported XGBoost model")
+def test_saved_xgboost_export_matches_the_saved_model():
+    result = check_equivalence(MODELS_DIR, "xgboost", n_rows=5000)
+    assert result["max_abs_difference"] <= XGBOOST_TOLERANCE
+    assert result["max_contribution_gap"] <= ADDITIVITY_TOLERANCE